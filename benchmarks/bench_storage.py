@@ -0,0 +1,487 @@
+#!/usr/bin/env python3
+"""
+Storage benchmark across every backend in the repo
+
+Seeds N notes, tasks and links into each engine, then times a sample of
+operations against the seeded store:
+
+    json      knowledgeflow core.json_storage.JSONStorage
+    sqlite    knowledgeflow core.database schema (notes, tasks, links, categories)
+    tasks5    tasks5 tasks_manager.storage.TaskStorage (tasks only)
+    tasks3    tasks3 tasks3.pkms.PKMS
+
+Seeding goes through each engine's bulk path (or straight to its files)
+and is not timed. Each operation then runs `--ops` times, or until
+`--max-seconds` have passed, and is reported as throughput plus p50/p99
+latency. Operations an engine has no API for are left out.
+
+Usage:
+    python benchmarks/bench_storage.py                      # 1k, 10k, 100k
+    python benchmarks/bench_storage.py -n 1000 -e json sqlite
+    python benchmarks/bench_storage.py -o results.json --baseline benchmarks/baseline.json
+    python benchmarks/bench_storage.py -n 1000 10000 --update-baseline
+
+With --baseline the run exits 1 if any operation's p50 is slower than
+the baseline by more than --tolerance. Baselines are only comparable on
+the machine that recorded them.
+"""
+
+import argparse
+import json
+import platform
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+for path in (REPO_ROOT / "knowledgeflow", REPO_ROOT / "tasks3" / "src", REPO_ROOT / "tasks5" / "src"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+DEFAULT_BASELINE = Path(__file__).parent / "baseline.json"
+DEFAULT_SIZES = (1000, 10000, 100000)
+
+# Words the seeded text is drawn from; searches pick one of them
+VOCABULARY = [f"{stem}{i}" for stem in ("alpha", "delta", "kappa", "sigma", "omega") for i in range(100)]
+TAGS = [f"tag{i}" for i in range(20)]
+PAGE_SIZE = 50
+
+
+# ===== SEED DATA =====
+
+def make_records(n: int, seed: int = 42) -> Dict[str, List]:
+    """
+    Deterministic notes, tasks and (note index, note index) link pairs
+    
+    Args:
+        n: Number of notes and of tasks; as many links are generated
+        seed: Random seed
+    
+    Returns:
+        Dict with 'notes', 'tasks' and 'links'
+    """
+    rng = random.Random(seed)
+    
+    def text(words):
+        return " ".join(rng.choice(VOCABULARY) for _ in range(words))
+    
+    notes = [{"title": f"Note {i} {text(2)}", "content": text(30), "tags": rng.sample(TAGS, 2)}
+             for i in range(n)]
+    tasks = [{"title": f"Task {i} {text(2)}", "description": text(15), "tags": rng.sample(TAGS, 1),
+              "status": rng.choice(("pending", "in-progress", "completed")),
+              "priority": rng.choice(("low", "medium", "high"))}
+             for i in range(n)]
+    links = sorted({(a, b) for a, b in ((rng.randrange(n), rng.randrange(n)) for _ in range(n)) if a != b})
+    return {"notes": notes, "tasks": tasks, "links": links}
+
+
+# ===== ENGINES =====
+
+class Engine:
+    """
+    One backend under test
+    
+    seed() fills a fresh store in `directory`; operations() returns
+    {name: fn(i)} for the i-th timed call. Keys handed to get/update use
+    the first half of the seeded IDs, deletes consume the second half.
+    """
+    
+    name = ""
+    
+    def __init__(self, directory: Path):
+        self.directory = directory
+    
+    def seed(self, data: Dict[str, List]):
+        raise NotImplementedError
+    
+    def operations(self, rng: random.Random) -> Dict[str, Callable[[int], object]]:
+        raise NotImplementedError
+    
+    def close(self):
+        pass
+
+
+def _split(ids: List) -> tuple:
+    half = len(ids) // 2
+    return ids[:half], ids[half:][::-1]
+
+
+class JSONEngine(Engine):
+    name = "json"
+    
+    def seed(self, data):
+        from core.json_storage import JSONStorage
+        self.storage = JSONStorage(self.directory)
+        notes = [dict(record, id=str(uuid.uuid4())) for record in data["notes"]]
+        tasks = [dict(record, id=str(uuid.uuid4())) for record in data["tasks"]]
+        self.storage.bulk_create("note", notes)
+        self.storage.bulk_create("task", tasks)
+        self.storage.bulk_link((notes[a]["id"], notes[b]["id"]) for a, b in data["links"])
+        self.note_ids = [note["id"] for note in notes]
+        self.task_ids = [task["id"] for task in tasks]
+    
+    def operations(self, rng):
+        s = self.storage
+        notes, doomed_notes = _split(self.note_ids)
+        tasks, doomed_tasks = _split(self.task_ids)
+        word = lambda: rng.choice(VOCABULARY)
+        return {
+            "get_note": lambda i: s.get_note(notes[i % len(notes)]),
+            "list_notes": lambda i: list(s.iter_notes(limit=PAGE_SIZE)),
+            "search_notes": lambda i: s.search_notes(word()),
+            "get_links": lambda i: s.get_links(notes[i % len(notes)]),
+            "get_task": lambda i: s.get_task(tasks[i % len(tasks)]),
+            "list_tasks": lambda i: list(s.iter_tasks(status="pending", limit=PAGE_SIZE)),
+            "search_tasks": lambda i: s.search_tasks(word()),
+            "update_note": lambda i: s.update_note(notes[i % len(notes)], content=f"edited {word()}"),
+            "update_task": lambda i: s.update_task(tasks[i % len(tasks)], status="completed"),
+            "create_note": lambda i: s.create_note(f"New {i}", word(), ["bench"]),
+            "create_task": lambda i: s.create_task(f"New {i}", word()),
+            "create_link": lambda i: s.create_link(rng.choice(notes), rng.choice(notes)),
+            "delete_note": lambda i: s.delete_note(doomed_notes[i]),
+            "delete_task": lambda i: s.delete_task(doomed_tasks[i]),
+        }
+
+
+class SQLiteEngine(Engine):
+    name = "sqlite"
+    
+    def seed(self, data):
+        import core.database as database
+        from core.bulk import import_to_sqlite
+        from core.categories import assign_category_to_notes, create_category
+        
+        self._database = database
+        self._saved_path = database.DB_PATH
+        database.DB_PATH = self.directory / "knowledgeflow.db"
+        database.init_database()
+        
+        import_to_sqlite([dict(record, type="note") for record in data["notes"]] +
+                         [dict(record, type="task") for record in data["tasks"]])
+        with database.connection() as conn:
+            self.note_ids = [row[0] for row in conn.execute("SELECT id FROM notes ORDER BY id")]
+            self.task_ids = [row[0] for row in conn.execute("SELECT id FROM tasks ORDER BY id")]
+            now = datetime.now().isoformat()
+            conn.executemany(
+                "INSERT INTO note_links (source_note_id, target_note_id, created_at) VALUES (?, ?, ?)",
+                ((self.note_ids[a], self.note_ids[b], now) for a, b in data["links"]))
+        
+        # A root with two levels below it, notes spread over the leaves
+        self.root = create_category("Bench")
+        leaves = []
+        for i in range(4):
+            branch = create_category(f"Branch {i}", parent_id=self.root)
+            leaves += [create_category(f"Leaf {i}.{j}", parent_id=branch) for j in range(4)]
+        for i, leaf in enumerate(leaves):
+            assign_category_to_notes(self.note_ids[i::len(leaves)], leaf)
+    
+    def operations(self, rng):
+        from core import search
+        from core.categories import get_notes_by_category
+        from core.links import create_link, get_all_links
+        connection = self._database.connection
+        notes, doomed_notes = _split(self.note_ids)
+        tasks, doomed_tasks = _split(self.task_ids)
+        word = lambda: rng.choice(VOCABULARY)
+        
+        def execute(sql, params=()):
+            with connection() as conn:
+                return conn.execute(sql, params).fetchall()
+        
+        now = datetime.now().isoformat
+        return {
+            "get_note": lambda i: execute("SELECT * FROM notes WHERE id = ?", (notes[i % len(notes)],)),
+            "list_notes": lambda i: execute("SELECT * FROM notes ORDER BY id DESC LIMIT ?", (PAGE_SIZE,)),
+            "search_notes": lambda i: search.search_notes(word()),
+            "get_links": lambda i: get_all_links(notes[i % len(notes)]),
+            "notes_in_category": lambda i: get_notes_by_category(self.root, include_descendants=True),
+            "get_task": lambda i: execute("SELECT * FROM tasks WHERE id = ?", (tasks[i % len(tasks)],)),
+            "list_tasks": lambda i: execute("SELECT * FROM tasks WHERE status = ? ORDER BY id DESC LIMIT ?",
+                                            ("pending", PAGE_SIZE)),
+            "search_tasks": lambda i: search.search_tasks(word()),
+            "update_note": lambda i: execute("UPDATE notes SET content = ?, updated_at = ? WHERE id = ?",
+                                             (f"edited {word()}", now(), notes[i % len(notes)])),
+            "update_task": lambda i: execute("UPDATE tasks SET status = 'completed' WHERE id = ?",
+                                             (tasks[i % len(tasks)],)),
+            "create_note": lambda i: execute(
+                "INSERT INTO notes (title, content, tags, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (f"New {i}", word(), '["bench"]', now(), now())),
+            "create_task": lambda i: execute("INSERT INTO tasks (title, description, created_at) VALUES (?, ?, ?)",
+                                             (f"New {i}", word(), now())),
+            "create_link": lambda i: create_link(rng.choice(notes), rng.choice(notes)),
+            "delete_note": lambda i: execute("DELETE FROM notes WHERE id = ?", (doomed_notes[i],)),
+            "delete_task": lambda i: execute("DELETE FROM tasks WHERE id = ?", (doomed_tasks[i],)),
+        }
+    
+    def close(self):
+        self._database.close_connections()
+        self._database.DB_PATH = self._saved_path
+
+
+class Tasks5Engine(Engine):
+    name = "tasks5"
+    
+    def seed(self, data):
+        from tasks_manager.storage import TaskStorage
+        now = datetime.now().isoformat()
+        tasks = [{"id": str(uuid.uuid4()), "title": record["title"], "description": record["description"],
+                  "status": record["status"], "priority": record["priority"], "due_date": None,
+                  "tags": record["tags"], "created_at": now, "updated_at": now}
+                 for record in data["tasks"]]
+        path = self.directory / "tasks.json"
+        with open(path, 'w') as f:
+            json.dump(tasks, f, indent=2)
+        self.storage = TaskStorage(str(path))
+        self.task_ids = [task["id"] for task in tasks]
+    
+    def operations(self, rng):
+        s = self.storage
+        tasks, doomed = _split(self.task_ids)
+        word = lambda: rng.choice(VOCABULARY)
+        return {
+            "get_task": lambda i: s.get_task(tasks[i % len(tasks)]),
+            "list_tasks": lambda i: list(s.iter_tasks(status="pending", limit=PAGE_SIZE)),
+            "search_tasks": lambda i: s.search_tasks(word()),
+            "update_task": lambda i: s.update_task(tasks[i % len(tasks)], status="completed"),
+            "create_task": lambda i: s.create_task(f"New {i}", word()),
+            "delete_task": lambda i: s.delete_task(doomed[i]),
+        }
+
+
+class Tasks3Engine(Engine):
+    name = "tasks3"
+    
+    def seed(self, data):
+        from tasks3.pkms import PKMS
+        path = self.directory / "pkms.db"
+        self.pkms = PKMS(path)
+        now = datetime.now().isoformat()
+        conn = sqlite3.connect(path)
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT INTO notes (title, content, tags, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                    ((r["title"], r["content"], json.dumps(r["tags"]), now, now) for r in data["notes"]))
+                conn.executemany(
+                    "INSERT INTO tasks (title, description, status, priority, tags, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    ((r["title"], r["description"], r["status"], r["priority"], json.dumps(r["tags"]), now)
+                     for r in data["tasks"]))
+                self.note_ids = [row[0] for row in conn.execute("SELECT id FROM notes ORDER BY id")]
+                self.task_ids = [row[0] for row in conn.execute("SELECT id FROM tasks ORDER BY id")]
+                conn.executemany(
+                    "INSERT INTO note_links (source_note_id, target_note_id, created_at) VALUES (?, ?, ?)",
+                    ((self.note_ids[a], self.note_ids[b], now) for a, b in data["links"]))
+        finally:
+            conn.close()
+    
+    def operations(self, rng):
+        p = self.pkms
+        notes = self.note_ids
+        tasks = self.task_ids
+        word = lambda: rng.choice(VOCABULARY)
+        # PKMS has no update_note, delete_* or paged task listing
+        return {
+            "get_note": lambda i: p.get_note(notes[i % len(notes)]),
+            "list_notes": lambda i: list(p.iter_notes(limit=PAGE_SIZE)),
+            "search_notes": lambda i: p.search_notes(word()),
+            "get_links": lambda i: p.get_linked_notes(notes[i % len(notes)]),
+            "get_task": lambda i: p.get_task(tasks[i % len(tasks)]),
+            "list_tasks": lambda i: p.list_tasks(status="pending"),
+            "update_task": lambda i: p.complete_task(tasks[i % len(tasks)]),
+            "create_note": lambda i: p.create_note(f"New {i}", word(), ["bench"]),
+            "create_task": lambda i: p.create_task(f"New {i}", word()),
+            "create_link": lambda i: p.link_notes(rng.choice(notes), rng.choice(notes)),
+        }
+
+
+ENGINES = {engine.name: engine for engine in (JSONEngine, SQLiteEngine, Tasks5Engine, Tasks3Engine)}
+
+
+# ===== MEASUREMENT =====
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    index = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+def measure(fn: Callable[[int], object], ops: int, max_seconds: float, min_ops: int = 5) -> Dict:
+    """
+    Call fn(0), fn(1), ... and summarize the latencies
+    
+    Stops after `ops` calls, or once max_seconds have passed and at
+    least min_ops calls were made.
+    
+    Returns:
+        Dict with ops, ops_per_sec, p50_ms and p99_ms
+    """
+    timings = []
+    started = time.perf_counter()
+    for i in range(ops):
+        before = time.perf_counter()
+        fn(i)
+        timings.append(time.perf_counter() - before)
+        if len(timings) >= min_ops and time.perf_counter() - started > max_seconds:
+            break
+    
+    total = sum(timings)
+    timings.sort()
+    return {
+        "ops": len(timings),
+        "ops_per_sec": round(len(timings) / total, 1) if total else None,
+        "p50_ms": round(percentile(timings, 0.50) * 1000, 4),
+        "p99_ms": round(percentile(timings, 0.99) * 1000, 4),
+    }
+
+
+def run_engine(name: str, n: int, ops: int, max_seconds: float, seed: int = 42,
+               data: Optional[Dict] = None, log=None) -> Dict[str, Dict]:
+    """
+    Seed a fresh store for one engine and time each of its operations
+    
+    Args:
+        name: Engine name (see ENGINES)
+        n: Number of notes and of tasks to seed
+        ops: Calls per operation (deletes are capped at n // 2)
+        max_seconds: Time budget per operation
+        seed: Random seed for the data and the calls
+        data: Records from make_records(n), to share them between engines
+        log: Optional callable given a progress line per operation
+    
+    Returns:
+        {operation: measurement}, plus 'seed_seconds'
+    """
+    data = data or make_records(n, seed)
+    directory = Path(tempfile.mkdtemp(prefix=f"bench-{name}-"))
+    engine = ENGINES[name](directory)
+    try:
+        started = time.perf_counter()
+        engine.seed(data)
+        results = {"seed_seconds": round(time.perf_counter() - started, 3)}
+        
+        rng = random.Random(seed)
+        for op, fn in engine.operations(rng).items():
+            count = min(ops, n // 2) if op.startswith("delete") else ops
+            results[op] = measure(fn, count, max_seconds)
+            if log:
+                log(f"{name:>7} n={n:<7} {op:<18} {results[op]['ops_per_sec']!s:>10} op/s  "
+                    f"p50 {results[op]['p50_ms']:.3f} ms  p99 {results[op]['p99_ms']:.3f} ms")
+        return results
+    finally:
+        engine.close()
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def run(sizes, engines, ops: int = 200, max_seconds: float = 5.0, seed: int = 42, log=None) -> Dict:
+    """
+    Benchmark every engine at every size
+    
+    Returns:
+        {'meta': {...}, 'results': {engine: {str(n): {operation: measurement}}}}
+    """
+    results = {}
+    for n in sizes:
+        data = make_records(n, seed)
+        for name in engines:
+            results.setdefault(name, {})[str(n)] = run_engine(name, n, ops, max_seconds, seed, data, log)
+    
+    meta = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "sqlite": sqlite3.sqlite_version,
+        "ops": ops,
+        "max_seconds": max_seconds,
+        "seed": seed,
+    }
+    return {"meta": meta, "results": results}
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float = 0.5, floor_ms: float = 0.05) -> List[Dict]:
+    """
+    Find operations whose p50 got slower than the baseline
+    
+    Args:
+        current: Output of run()
+        baseline: Output of an earlier run()
+        tolerance: Allowed slowdown as a fraction (0.5 = 50% slower)
+        floor_ms: Ignore operations whose p50 is below this in both runs
+    
+    Returns:
+        One dict per regression (engine, n, op, baseline_ms, current_ms, ratio)
+    """
+    regressions = []
+    for engine, sizes in current["results"].items():
+        for n, ops in sizes.items():
+            old_ops = baseline.get("results", {}).get(engine, {}).get(n, {})
+            for op, result in ops.items():
+                old = old_ops.get(op)
+                if not isinstance(result, dict) or not isinstance(old, dict):
+                    continue
+                before, after = old["p50_ms"], result["p50_ms"]
+                if max(before, after) < floor_ms:
+                    continue
+                ratio = after / before if before else float("inf")
+                if ratio > 1 + tolerance:
+                    regressions.append({"engine": engine, "n": int(n), "op": op, "baseline_ms": before,
+                                        "current_ms": after, "ratio": round(ratio, 2)})
+    return regressions
+
+
+# ===== COMMAND LINE =====
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Benchmark the notes/tasks storage engines")
+    parser.add_argument("-n", "--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+                        help="Numbers of notes and tasks to seed (default: 1000 10000 100000)")
+    parser.add_argument("-e", "--engines", nargs="+", choices=list(ENGINES), default=list(ENGINES),
+                        help="Engines to run (default: all)")
+    parser.add_argument("--ops", type=int, default=200, help="Calls per operation (default: 200)")
+    parser.add_argument("--max-seconds", type=float, default=5.0,
+                        help="Time budget per operation (default: 5)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("-o", "--output", type=Path, help="Write results as JSON here")
+    parser.add_argument("--baseline", type=Path, nargs="?", const=DEFAULT_BASELINE,
+                        help=f"Compare against this results file (default: {DEFAULT_BASELINE.name})")
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="Allowed p50 slowdown against the baseline (default: 0.5 = 50%%)")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="Write the results to the baseline file")
+    parser.add_argument("-q", "--quiet", action="store_true", help="No per-operation progress")
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    log = None if args.quiet else (lambda line: print(line, file=sys.stderr, flush=True))
+    results = run(args.sizes, args.engines, args.ops, args.max_seconds, args.seed, log)
+    
+    text = json.dumps(results, indent=2) + "\n"
+    if args.output:
+        args.output.write_text(text)
+    if args.update_baseline:
+        (args.baseline or DEFAULT_BASELINE).write_text(text)
+    if not args.output and not args.update_baseline:
+        sys.stdout.write(text)
+    
+    if args.baseline and not args.update_baseline:
+        regressions = compare(results, json.loads(args.baseline.read_text()), args.tolerance)
+        for r in regressions:
+            print(f"REGRESSION {r['engine']} n={r['n']} {r['op']}: p50 {r['baseline_ms']:.3f} -> "
+                  f"{r['current_ms']:.3f} ms ({r['ratio']}x)", file=sys.stderr)
+        if regressions:
+            return 1
+        print(f"No regressions against {args.baseline}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
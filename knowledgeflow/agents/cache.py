@@ -0,0 +1,114 @@
+"""
+Summary Cache
+Content-addressed, SQLite-backed cache for AI agent results
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+DEFAULT_CACHE_PATH = Path(__file__).parent.parent / "data" / "summary_cache.db"
+
+
+def cache_key(*parts) -> str:
+    """Hash everything that determines a result (model, prompt, limits, text)"""
+    payload = json.dumps(parts, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class SummaryCache:
+    """
+    Disk-backed cache of agent results with TTL and LRU eviction
+    
+    Entries older than ttl_seconds are treated as misses. When more than
+    max_entries are stored, the least recently used ones are evicted.
+    """
+    
+    def __init__(self, path: Optional[Path] = None, ttl_seconds: float = 30 * 24 * 3600,
+                 max_entries: int = 10000):
+        self.path = Path(path) if path is not None else DEFAULT_CACHE_PATH
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_results_accessed ON results(accessed_at)")
+        self._conn.commit()
+        self._count = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+    
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached value for key, or None on a miss"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            
+            if row is None or now - row[1] > self.ttl_seconds:
+                if row is not None:
+                    self._conn.execute("DELETE FROM results WHERE key = ?", (key,))
+                    self._conn.commit()
+                    self._count -= 1
+                self.misses += 1
+                return None
+            
+            self._conn.execute("UPDATE results SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+    
+    def set(self, key: str, value: str):
+        """Store a value, evicting least recently used entries past max_entries"""
+        now = time.time()
+        with self._lock:
+            exists = self._conn.execute("SELECT 1 FROM results WHERE key = ?", (key,)).fetchone()
+            self._conn.execute("""
+                INSERT OR REPLACE INTO results (key, value, created_at, accessed_at)
+                VALUES (?, ?, ?, ?)
+            """, (key, value, now, now))
+            if exists is None:
+                self._count += 1
+            
+            overflow = self._count - self.max_entries
+            if overflow > 0:
+                self._conn.execute("""
+                    DELETE FROM results WHERE key IN (
+                        SELECT key FROM results ORDER BY accessed_at LIMIT ?
+                    )
+                """, (overflow,))
+                self._count -= overflow
+            self._conn.commit()
+    
+    def clear(self):
+        """Drop every cached entry and reset the counters"""
+        with self._lock:
+            self._conn.execute("DELETE FROM results")
+            self._conn.commit()
+            self._count = 0
+            self.hits = 0
+            self.misses = 0
+    
+    def stats(self) -> dict:
+        """Hit/miss counters and current size"""
+        return {"hits": self.hits, "misses": self.misses, "entries": self._count}
+    
+    def close(self):
+        """Close the underlying database connection"""
+        self._conn.close()
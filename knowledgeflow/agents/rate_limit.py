@@ -0,0 +1,61 @@
+"""
+Rate limiting helpers for AI agents
+Token buckets for requests/min and tokens/min, plus jittered backoff
+"""
+
+import asyncio
+import random
+import time
+from typing import Callable, Optional
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at rate_per_minute
+    
+    acquire() waits until enough tokens are available. Requests larger
+    than the bucket are clamped to its capacity so they can't wait forever.
+    """
+    
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.tokens = self.capacity
+        self._clock = clock
+        self._updated = clock()
+        self._lock = asyncio.Lock()
+    
+    def _refill(self):
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+    
+    async def acquire(self, amount: float = 1):
+        """Take amount tokens, sleeping until they are available"""
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+
+class RateLimiter:
+    """Combined requests/min and tokens/min limits, as the OpenAI API enforces"""
+    
+    def __init__(self, requests_per_minute: float = 500, tokens_per_minute: float = 30000):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+    
+    async def acquire(self, tokens: int):
+        """Wait for one request slot and an estimated token budget"""
+        await self.requests.acquire(1)
+        await self.tokens.acquire(tokens)
+
+
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = 30.0) -> float:
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2**attempt)]"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
@@ -3,22 +3,113 @@ Summarizer Agent
 Uses OpenAI GPT-4o to summarize notes and tasks
 """
 
+import asyncio
 import os
-from typing import Optional
-from openai import OpenAI
+from typing import AsyncIterator, Optional, Tuple
+import openai
+from openai import AsyncOpenAI, OpenAI
+
+from agents.cache import SummaryCache, cache_key
+from agents.rate_limit import RateLimiter, backoff_delay
+
+
+def _is_retryable(error: Exception) -> bool:
+    """Rate limits, server errors and dropped connections are worth retrying"""
+    if isinstance(error, (openai.RateLimitError, openai.APIConnectionError)):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code >= 500
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Seconds the server asked us to wait, if it said"""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
 
 
 class SummarizerAgent:
     """AI agent that summarizes text using GPT-4o"""
     
-    def __init__(self, api_key: Optional[str] = None):
-        """Initialize the summarizer with OpenAI API key"""
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None,
+                 requests_per_minute: float = 500, tokens_per_minute: float = 30000,
+                 max_retries: int = 5, cache: Optional[SummaryCache] = None,
+                 use_cache: bool = True):
+        """
+        Initialize the summarizer with OpenAI API key
+        
+        Args:
+            api_key: OpenAI API key (defaults to OPENAI_API_KEY)
+            base_url: Alternative API endpoint, e.g. a local stub server
+            requests_per_minute: Request budget for the async batch path
+            tokens_per_minute: Token budget for the async batch path
+            max_retries: Retries on 429/5xx/connection errors in the async path
+            cache: Result cache to use (defaults to one under data/)
+            use_cache: Set False to always call the API
+        """
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
         if not self.api_key:
             raise ValueError("OpenAI API key is required. Set OPENAI_API_KEY environment variable.")
         
-        self.client = OpenAI(api_key=self.api_key)
+        self.base_url = base_url
+        self.client = OpenAI(api_key=self.api_key, base_url=base_url)
         self.model = "gpt-4o"
+        
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_retries = max_retries
+        self._async_loop = None
+        self._async_client = None
+        self._limiter = None
+        
+        if cache is None and use_cache:
+            cache = SummaryCache()
+        self.cache = cache if use_cache else None
+    
+    def cache_stats(self) -> dict:
+        """Hit/miss counters of the result cache (all zero when caching is off)"""
+        if self.cache is None:
+            return {"hits": 0, "misses": 0, "entries": 0}
+        return self.cache.stats()
+    
+    def _cache_key(self, messages: list, max_tokens: int) -> Optional[str]:
+        # The messages carry the prompt template, max_words and the text itself
+        if self.cache is None:
+            return None
+        return cache_key(self.model, messages, max_tokens)
+    
+    def _cache_get(self, key: Optional[str]) -> Optional[str]:
+        return self.cache.get(key) if key is not None else None
+    
+    def _cache_set(self, key: Optional[str], value: str):
+        if key is not None:
+            self.cache.set(key, value)
+    
+    def _summary_messages(self, text: str, max_words: int) -> list:
+        return [
+            {
+                "role": "developer",
+                "content": f"You are a summarization expert. Summarize the following text into approximately {max_words} words or less. Be concise and capture the key points."
+            },
+            {
+                "role": "user",
+                "content": f"Summarize this text:\n\n{text}"
+            }
+        ]
+    
+    def _note_text(self, note: dict) -> str:
+        return f"Title: {note.get('title', '')}\nContent: {note.get('content', '')}"
+    
+    def _task_text(self, task: dict) -> str:
+        text = f"Task: {task.get('title', '')}\nDescription: {task.get('description', '')}"
+        if task.get('status'):
+            text += f"\nStatus: {task['status']}"
+        if task.get('priority'):
+            text += f"\nPriority: {task['priority']}"
+        return text
     
     def summarize_text(self, text: str, max_words: int = 30) -> str:
         """
@@ -31,24 +122,22 @@ class SummarizerAgent:
         Returns:
             Summarized text
         """
+        messages = self._summary_messages(text, max_words)
+        key = self._cache_key(messages, 150)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+        
         try:
             response = self.client.chat.completions.create(
                 model=self.model,
-                messages=[
-                    {
-                        "role": "developer",
-                        "content": f"You are a summarization expert. Summarize the following text into approximately {max_words} words or less. Be concise and capture the key points."
-                    },
-                    {
-                        "role": "user",
-                        "content": f"Summarize this text:\n\n{text}"
-                    }
-                ],
+                messages=messages,
                 temperature=0.7,
                 max_tokens=150
             )
             
             summary = response.choices[0].message.content.strip()
+            self._cache_set(key, summary)
             return summary
         
         except Exception as e:
@@ -65,8 +154,7 @@ class SummarizerAgent:
         Returns:
             Summary of the note
         """
-        text = f"Title: {note.get('title', '')}\nContent: {note.get('content', '')}"
-        return self.summarize_text(text, max_words)
+        return self.summarize_text(self._note_text(note), max_words)
     
     def summarize_task(self, task: dict, max_words: int = 30) -> str:
         """
@@ -79,40 +167,162 @@ class SummarizerAgent:
         Returns:
             Summary of the task
         """
-        text = f"Task: {task.get('title', '')}\nDescription: {task.get('description', '')}"
-        if task.get('status'):
-            text += f"\nStatus: {task['status']}"
-        if task.get('priority'):
-            text += f"\nPriority: {task['priority']}"
-        
-        return self.summarize_text(text, max_words)
+        return self.summarize_text(self._task_text(task), max_words)
     
-    def batch_summarize(self, items: list, item_type: str = "note", max_words: int = 30) -> dict:
+    def batch_summarize(self, items: list, item_type: str = "note", max_words: int = 30,
+                        concurrency: int = 8) -> dict:
         """
         Summarize multiple items
         
+        Runs the async batch path, so up to `concurrency` requests are in
+        flight at once. Must not be called from inside a running event
+        loop; use abatch_summarize there instead.
+        
         Args:
             items: List of note or task dictionaries
             item_type: Either 'note' or 'task'
             max_words: Maximum words per summary
+            concurrency: Maximum concurrent API requests
         
         Returns:
             Dictionary mapping item IDs to summaries
         """
-        summaries = {}
+        async def run():
+            try:
+                return await self.abatch_summarize(items, item_type, max_words, concurrency)
+            finally:
+                await self.aclose()
         
-        for item in items:
-            item_id = item.get('id')
-            if not item_id:
-                continue
+        return asyncio.run(run())
+    
+    # ===== ASYNC BATCH PATH =====
+    
+    def _async_resources(self):
+        """Async client and rate limiter bound to the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._async_loop is not loop:
+            # Retries are handled here, with the rate limiter, not by the SDK
+            self._async_client = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url,
+                                             max_retries=0)
+            self._limiter = RateLimiter(self.requests_per_minute, self.tokens_per_minute)
+            self._async_loop = loop
+        return self._async_client, self._limiter
+    
+    async def aclose(self):
+        """Close the async HTTP client, if one was opened"""
+        if self._async_client is not None:
+            await self._async_client.close()
+        self._async_loop = None
+        self._async_client = None
+        self._limiter = None
+    
+    async def asummarize_text(self, text: str, max_words: int = 30) -> str:
+        """
+        Async version of summarize_text with rate limiting and retries
+        
+        429, 5xx and connection errors are retried with jittered
+        exponential backoff (honouring Retry-After when sent).
+        
+        Args:
+            text: The text to summarize
+            max_words: Maximum words in summary (default: 30)
+        
+        Returns:
+            Summarized text
+        """
+        max_tokens = 150
+        messages = self._summary_messages(text, max_words)
+        key = self._cache_key(messages, max_tokens)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+        
+        client, limiter = self._async_resources()
+        # Rough prompt size estimate (~4 characters per token) plus the completion budget
+        estimated_tokens = len(text) // 4 + 50 + max_tokens
+        
+        attempt = 0
+        while True:
+            await limiter.acquire(estimated_tokens)
+            try:
+                response = await client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=0.7,
+                    max_tokens=max_tokens
+                )
+                summary = response.choices[0].message.content.strip()
+                self._cache_set(key, summary)
+                return summary
             
-            if item_type == "note":
-                summaries[item_id] = self.summarize_note(item, max_words)
-            elif item_type == "task":
-                summaries[item_id] = self.summarize_task(item, max_words)
+            except Exception as e:
+                if attempt < self.max_retries and _is_retryable(e):
+                    delay = _retry_after(e)
+                    await asyncio.sleep(delay if delay is not None else backoff_delay(attempt))
+                    attempt += 1
+                    continue
+                return f"Error summarizing: {str(e)}"
+    
+    async def abatch_summarize_stream(self, items: list, item_type: str = "note",
+                                      max_words: int = 30,
+                                      concurrency: int = 8) -> AsyncIterator[Tuple[str, str]]:
+        """
+        Summarize items concurrently, yielding results as they complete
+        
+        Args:
+            items: List of note or task dictionaries
+            item_type: Either 'note' or 'task'
+            max_words: Maximum words per summary
+            concurrency: Maximum concurrent API requests
+        
+        Yields:
+            (item_id, summary) tuples in completion order
+        """
+        if item_type == "note":
+            to_text = self._note_text
+        elif item_type == "task":
+            to_text = self._task_text
+        else:
+            return
+        
+        semaphore = asyncio.Semaphore(concurrency)
         
+        async def run(item_id, text):
+            async with semaphore:
+                return item_id, await self.asummarize_text(text, max_words)
+        
+        pending = [
+            asyncio.ensure_future(run(item['id'], to_text(item)))
+            for item in items if item.get('id')
+        ]
+        try:
+            for next_done in asyncio.as_completed(pending):
+                yield await next_done
+        finally:
+            for task in pending:
+                task.cancel()
+    
+    async def abatch_summarize(self, items: list, item_type: str = "note", max_words: int = 30,
+                               concurrency: int = 8) -> dict:
+        """Async batch summarize; returns a dictionary mapping item IDs to summaries"""
+        summaries = {}
+        async for item_id, summary in self.abatch_summarize_stream(items, item_type, max_words,
+                                                                  concurrency):
+            summaries[item_id] = summary
         return summaries
     
+    def _title_messages(self, content: str, max_words: int) -> list:
+        return [
+            {
+                "role": "developer",
+                "content": f"You are a title generator. Generate a concise title of {max_words} words or less that captures the essence of the text."
+            },
+            {
+                "role": "user",
+                "content": f"Generate a title for:\n\n{content}"
+            }
+        ]
+    
     def generate_title(self, content: str, max_words: int = 5) -> str:
         """
         Generate a concise title from content
@@ -124,19 +334,16 @@ class SummarizerAgent:
         Returns:
             Generated title
         """
+        messages = self._title_messages(content, max_words)
+        key = self._cache_key(messages, 50)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+        
         try:
             response = self.client.chat.completions.create(
                 model=self.model,
-                messages=[
-                    {
-                        "role": "developer",
-                        "content": f"You are a title generator. Generate a concise title of {max_words} words or less that captures the essence of the text."
-                    },
-                    {
-                        "role": "user",
-                        "content": f"Generate a title for:\n\n{content}"
-                    }
-                ],
+                messages=messages,
                 temperature=0.7,
                 max_tokens=50
             )
@@ -144,6 +351,7 @@ class SummarizerAgent:
             title = response.choices[0].message.content.strip()
             # Remove quotes if present
             title = title.strip('"\'')
+            self._cache_set(key, title)
             return title
         
         except Exception as e:
@@ -21,15 +21,19 @@ if env_file.exists():
                 key, value = line.split('=', 1)
                 os.environ[key.strip()] = value.strip()
 
+# With arguments (`cli_v2.py task list --json`) run a single command
+# without the interactive UI, before rich is ever imported
+if __name__ == "__main__" and len(sys.argv) > 1:
+    from commands import main
+    sys.exit(main())
+
+# Only what every run needs is imported up front; tables, panels,
+# markdown and the OpenAI SDK are imported where they are first used
 from rich.console import Console
-from rich.table import Table
-from rich.panel import Panel
 from rich.prompt import Prompt, Confirm
-from rich import print as rprint
-from rich.markdown import Markdown
 
 from core.json_storage import JSONStorage
-from agents.summarizer import SummarizerAgent
+from core.client import connect
 
 
 class KnowledgeFlowCLI:
@@ -37,21 +41,31 @@ class KnowledgeFlowCLI:
     
     def __init__(self):
         self.console = Console()
-        self.storage = JSONStorage()
+        # Talk to the storage daemon if one is running (python -m core.daemon)
+        self.storage = connect() or JSONStorage()
         
-        # Initialize AI agent if API key is available
-        self.summarizer = None
-        if os.getenv("OPENAI_API_KEY"):
+        # The AI agent is created on the first AI action
+        self.ai_enabled = bool(os.getenv("OPENAI_API_KEY"))
+        self._summarizer = None
+        if not self.ai_enabled:
+            self.console.print("[yellow]⚠[/yellow] Set OPENAI_API_KEY to enable AI features")
+    
+    @property
+    def summarizer(self):
+        """AI summarizer, built on first use so plain commands never import openai"""
+        if self._summarizer is None and self.ai_enabled:
             try:
-                self.summarizer = SummarizerAgent()
-                self.console.print("[green]✓[/green] AI Summarizer initialized")
+                from agents.summarizer import SummarizerAgent
+                self._summarizer = SummarizerAgent()
             except Exception as e:
+                self.ai_enabled = False
                 self.console.print(f"[yellow]⚠[/yellow] AI Summarizer unavailable: {e}")
-        else:
-            self.console.print("[yellow]⚠[/yellow] Set OPENAI_API_KEY to enable AI features")
+        return self._summarizer
     
     def show_banner(self):
         """Display welcome banner"""
+        from rich.panel import Panel
+        
         banner = """
 ╔═══════════════════════════════════════════╗
 ║     📚 KnowledgeFlow v2 - JSON Edition    ║
@@ -101,8 +115,8 @@ class KnowledgeFlowCLI:
         self.console.print(f"\n[green]✓[/green] Note created with ID: {note['id']}")
         
         # Offer AI summary
-        if self.summarizer and content:
-            if Confirm.ask("Generate AI summary?", default=False):
+        if self.ai_enabled and content:
+            if Confirm.ask("Generate AI summary?", default=False) and self.summarizer:
                 summary = self.summarizer.summarize_note(note)
                 self.console.print(f"\n[cyan]AI Summary:[/cyan] {summary}")
     
@@ -110,12 +124,16 @@ class KnowledgeFlowCLI:
         """List all notes"""
         tag_filter = Prompt.ask("Filter by tag (optional)", default="")
         
-        notes = self.storage.list_notes(tag=tag_filter if tag_filter else None)
+        # Skip note bodies; the table only shows these columns
+        notes = sorted(self.storage.iter_notes(tag=tag_filter if tag_filter else None,
+                                               fields=("title", "tags", "created_at")),
+                       key=lambda note: note["created_at"])
         
         if not notes:
             self.console.print("[yellow]No notes found[/yellow]")
             return
         
+        from rich.table import Table
         table = Table(title=f"Notes ({len(notes)} total)")
         table.add_column("ID", style="cyan", no_wrap=True)
         table.add_column("Title", style="white")
@@ -144,6 +162,7 @@ class KnowledgeFlowCLI:
         
         self.console.print(f"\n[green]Found {len(results)} note(s)[/green]\n")
         
+        from rich.panel import Panel
         for note in results:
             panel = Panel(
                 f"[bold]{note['title']}[/bold]\n\n{note.get('content', '')[:200]}...",
@@ -157,18 +176,13 @@ class KnowledgeFlowCLI:
         """View a specific note"""
         note_id = Prompt.ask("Note ID (full or first 8 chars)")
         
-        # Try to find by partial ID
-        notes = self.storage.list_notes()
-        note = None
-        for n in notes:
-            if n['id'].startswith(note_id):
-                note = n
-                break
-        
+        note = self.find_item("note", note_id)
         if not note:
-            self.console.print("[red]Note not found[/red]")
             return
         
+        from rich.markdown import Markdown
+        from rich.panel import Panel
+        
         # Display note
         md_content = f"""# {note['title']}
 
@@ -184,6 +198,35 @@ class KnowledgeFlowCLI:
         md = Markdown(md_content)
         self.console.print(Panel(md, border_style="cyan"))
     
+    def find_item(self, kind: str, id_prefix: str):
+        """
+        Look up a note or task by full or short ID
+        
+        Prints an error and returns None if nothing matches, or lists
+        the candidates if the prefix matches more than one item.
+        """
+        id_prefix = id_prefix.strip()
+        matches = self.storage.resolve_prefix(kind, id_prefix) if id_prefix else []
+        
+        if not matches:
+            self.console.print(f"[red]{kind.title()} not found[/red]")
+            return None
+        
+        get = self.storage.get_note if kind == "note" else self.storage.get_task
+        if len(matches) > 1:
+            self.console.print(f"[yellow]'{id_prefix}' matches {len(matches)} {kind}s; "
+                               f"enter more characters:[/yellow]")
+            from rich.table import Table
+            table = Table()
+            table.add_column("ID", style="cyan")
+            table.add_column("Title", style="white")
+            for match in matches:
+                table.add_row(match, get(match)['title'])
+            self.console.print(table)
+            return None
+        
+        return get(matches[0])
+    
     # ===== TASK OPERATIONS =====
     
     def create_task(self):
@@ -206,8 +249,8 @@ class KnowledgeFlowCLI:
         self.console.print(f"\n[green]✓[/green] Task created with ID: {task['id']}")
         
         # Offer AI summary
-        if self.summarizer and description:
-            if Confirm.ask("Generate AI summary?", default=False):
+        if self.ai_enabled and description:
+            if Confirm.ask("Generate AI summary?", default=False) and self.summarizer:
                 summary = self.summarizer.summarize_task(task)
                 self.console.print(f"\n[cyan]AI Summary:[/cyan] {summary}")
     
@@ -219,14 +262,16 @@ class KnowledgeFlowCLI:
             default=""
         )
         
-        tasks = self.storage.list_tasks(
-            status=status_filter if status_filter else None
-        )
+        tasks = sorted(self.storage.iter_tasks(
+            status=status_filter if status_filter else None,
+            fields=("title", "status", "priority", "created_at")
+        ), key=lambda task: task["created_at"])
         
         if not tasks:
             self.console.print("[yellow]No tasks found[/yellow]")
             return
         
+        from rich.table import Table
         table = Table(title=f"Tasks ({len(tasks)} total)")
         table.add_column("ID", style="cyan", no_wrap=True)
         table.add_column("Title", style="white")
@@ -269,6 +314,7 @@ class KnowledgeFlowCLI:
         
         self.console.print(f"\n[green]Found {len(results)} task(s)[/green]\n")
         
+        from rich.panel import Panel
         for task in results:
             status_emoji = {
                 "pending": "⏳",
@@ -287,16 +333,8 @@ class KnowledgeFlowCLI:
         """Update task status"""
         task_id = Prompt.ask("Task ID (full or first 8 chars)")
         
-        # Find task
-        tasks = self.storage.list_tasks()
-        task = None
-        for t in tasks:
-            if t['id'].startswith(task_id):
-                task = t
-                break
-        
+        task = self.find_item("task", task_id)
         if not task:
-            self.console.print("[red]Task not found[/red]")
             return
         
         new_status = Prompt.ask(
@@ -319,20 +357,8 @@ class KnowledgeFlowCLI:
         item_type = Prompt.ask("Item type", choices=["note", "task"])
         item_id = Prompt.ask(f"{item_type.title()} ID (full or first 8 chars)")
         
-        # Find item
-        if item_type == "note":
-            items = self.storage.list_notes()
-        else:
-            items = self.storage.list_tasks()
-        
-        item = None
-        for i in items:
-            if i['id'].startswith(item_id):
-                item = i
-                break
-        
+        item = self.find_item(item_type, item_id)
         if not item:
-            self.console.print(f"[red]{item_type.title()} not found[/red]")
             return
         
         with self.console.status("[cyan]Generating summary..."):
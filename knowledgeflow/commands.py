@@ -0,0 +1,359 @@
+"""
+KnowledgeFlow Commands
+Non-interactive subcommands for scripts and pipelines
+
+    python cli_v2.py note add "Title" --content "..." --tags a,b
+    python cli_v2.py note list --tag work --json
+    python cli_v2.py task add "Title" --priority high
+    python cli_v2.py task list --status pending --json
+    python cli_v2.py task update 3f2a --status completed
+    python cli_v2.py search "query" --json
+
+With --json every record is written as one JSON object per line
+(NDJSON) as soon as it is read, so output can be piped into jq or
+another command. `note add -` / `task add -` read NDJSON records from
+stdin and create them all in one process.
+
+Errors go to stderr with exit status 1 (2 for bad arguments). Nothing
+here imports rich, so these commands start much faster than the menu.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import sys
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from core.client import connect, default_socket_path
+from core.json_storage import JSONStorage
+
+STATUSES = ["pending", "in_progress", "completed"]
+PRIORITIES = ["low", "medium", "high"]
+
+NOTE_FIELDS = ("title", "content", "tags")
+TASK_FIELDS = ("title", "description", "status", "priority", "due_date", "tags",
+               "linked_note_id")
+
+# NDJSON records `add -` reads from stdin before writing them
+ADD_CHUNK_SIZE = 500
+
+
+def open_storage(data_dir: Optional[Path] = None):
+    """The running daemon for data_dir if there is one, else the JSON files directly"""
+    return connect(default_socket_path(data_dir)) or JSONStorage(data_dir=data_dir)
+
+
+def split_tags(value: Optional[str]) -> List[str]:
+    """Parse a comma-separated tag list"""
+    return [tag.strip() for tag in (value or "").split(",") if tag.strip()]
+
+
+def write_record(record: Dict, out=None):
+    """Write one record as a line of JSON"""
+    out = out or sys.stdout
+    out.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + "\n")
+
+
+def format_record(kind: str, record: Dict) -> str:
+    """One-line plain text view of a note or task"""
+    line = f"{record['id'][:8]}  {record.get('title', '')}"
+    if kind == "task":
+        line += f"  [{record.get('status')}, {record.get('priority')}]"
+    if record.get("tags"):
+        line += "  #" + " #".join(record["tags"])
+    return line
+
+
+def emit(kind: str, records: Iterable[Dict], as_json: bool) -> int:
+    """
+    Print records as they stream in
+    
+    Returns:
+        Number of records printed
+    """
+    count = 0
+    for record in records:
+        if as_json:
+            write_record(record)
+        else:
+            print(format_record(kind, record))
+        count += 1
+    return count
+
+
+def resolve(storage, kind: str, id_prefix: str) -> Optional[str]:
+    """
+    Full ID for a note/task ID or unique prefix
+    
+    Prints the problem to stderr and returns None if nothing (or more
+    than one item) matches.
+    """
+    matches = storage.resolve_prefix(kind, id_prefix.strip()) if id_prefix.strip() else []
+    if not matches:
+        print(f"{kind.title()} not found: {id_prefix}", file=sys.stderr)
+        return None
+    if len(matches) > 1:
+        print(f"'{id_prefix}' matches {len(matches)} {kind}s: {', '.join(matches[:5])}",
+              file=sys.stderr)
+        return None
+    return matches[0]
+
+
+def read_ndjson(stream) -> Iterable[Dict]:
+    """Records from NDJSON input, skipping blank lines"""
+    for number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"stdin line {number}: {e}") from None
+        if not isinstance(record, dict):
+            raise ValueError(f"stdin line {number}: expected a JSON object")
+        yield record
+
+
+# ===== COMMANDS =====
+
+def cmd_add(args, storage) -> int:
+    """Create a note or task from arguments, or one per NDJSON line on stdin"""
+    create = storage.create_note if args.kind == "note" else storage.create_task
+    fields = NOTE_FIELDS if args.kind == "note" else TASK_FIELDS
+    
+    if args.title != "-":
+        params = {"title": args.title, "tags": split_tags(args.tags)}
+        if args.kind == "note":
+            params["content"] = args.content or ""
+        else:
+            params.update(description=args.description or "", status=args.status,
+                          priority=args.priority, due_date=args.due)
+        records = [params]
+    else:
+        records = ({key: value for key, value in record.items() if key in fields}
+                   for record in read_ndjson(sys.stdin))
+    
+    # Read a chunk, then write it under one short batch() (a local JSONStorage
+    # takes its locks once per chunk), so a slow producer on stdin never
+    # holds the locks while we wait for its next line
+    records = iter(records)
+    while True:
+        chunk = list(itertools.islice(records, ADD_CHUNK_SIZE))
+        if not chunk:
+            return 0
+        created = []
+        with getattr(storage, "batch", nullcontext)():
+            for params in chunk:
+                if not params.get("title"):
+                    print(f"Skipping {args.kind} without a title", file=sys.stderr)
+                    continue
+                created.append(create(**params))
+        for record in created:
+            if args.json:
+                write_record(record)
+            else:
+                print(record["id"])
+
+
+def cmd_list(args, storage) -> int:
+    """Stream notes or tasks"""
+    fields = args.fields.split(",") if args.fields else None
+    if fields is None and not args.json:
+        fields = ("title", "tags") if args.kind == "note" else ("title", "status", "priority", "tags")
+    
+    # --after is a cursor, not a lookup: it still works if that item was deleted
+    if args.kind == "note":
+        records = storage.iter_notes(tag=args.tag, after_id=args.after, limit=args.limit, fields=fields)
+    else:
+        records = storage.iter_tasks(status=args.status, priority=args.priority, tag=args.tag,
+                                     after_id=args.after, limit=args.limit, fields=fields)
+    emit(args.kind, records, args.json)
+    return 0
+
+
+def cmd_show(args, storage) -> int:
+    """Print one note or task in full"""
+    item_id = resolve(storage, args.kind, args.id)
+    if item_id is None:
+        return 1
+    record = storage.get_note(item_id) if args.kind == "note" else storage.get_task(item_id)
+    
+    if args.json:
+        write_record(record)
+        return 0
+    print(format_record(args.kind, record))
+    body = record.get("content") if args.kind == "note" else record.get("description")
+    if body:
+        print()
+        print(body)
+    return 0
+
+
+def cmd_update(args, storage) -> int:
+    """Change fields of a note or task"""
+    item_id = resolve(storage, args.kind, args.id)
+    if item_id is None:
+        return 1
+    
+    changes = {"title": args.title}
+    if args.tags is not None:
+        changes["tags"] = split_tags(args.tags)
+    if args.kind == "note":
+        changes["content"] = args.content
+    else:
+        changes.update(description=args.description, status=args.status,
+                       priority=args.priority, due_date=args.due)
+    changes = {key: value for key, value in changes.items() if value is not None}
+    if not changes:
+        print("Nothing to update", file=sys.stderr)
+        return 1
+    
+    update = storage.update_note if args.kind == "note" else storage.update_task
+    record = update(item_id, **changes)
+    if record is None:
+        # Deleted since it was resolved
+        print(f"{args.kind.title()} not found: {args.id}", file=sys.stderr)
+        return 1
+    if args.json:
+        write_record(record)
+    else:
+        print(format_record(args.kind, record))
+    return 0
+
+
+def cmd_delete(args, storage) -> int:
+    """Delete a note or task"""
+    item_id = resolve(storage, args.kind, args.id)
+    if item_id is None:
+        return 1
+    delete = storage.delete_note if args.kind == "note" else storage.delete_task
+    delete(item_id)
+    if args.json:
+        write_record({"id": item_id, "deleted": True})
+    else:
+        print(f"Deleted {args.kind} {item_id}")
+    return 0
+
+
+def cmd_search(args, storage) -> int:
+    """Search notes and/or tasks, best match first within each kind"""
+    operator = "or" if args.any else "and"
+    kinds = ["note", "task"] if args.type == "all" else [args.type]
+    
+    remaining = args.limit
+    for kind in kinds:
+        search = storage.search_notes if kind == "note" else storage.search_tasks
+        results = search(args.query, operator)
+        if remaining is not None:
+            results = results[:remaining]
+            remaining -= len(results)
+        if args.json:
+            for record in results:
+                write_record({"type": kind, **record})
+        else:
+            emit(kind, results, False)
+    return 0
+
+
+# ===== ARGUMENTS =====
+
+def build_parser() -> argparse.ArgumentParser:
+    """Parser for every subcommand"""
+    parser = argparse.ArgumentParser(
+        prog="cli_v2.py",
+        description="KnowledgeFlow commands (run without arguments for the interactive menu)")
+    parser.add_argument("--data-dir", type=Path, default=None, help="JSON storage directory")
+    kinds = parser.add_subparsers(dest="kind", required=True)
+    
+    # Options every subcommand accepts
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--json", action="store_true", help="Output NDJSON")
+    
+    for kind in ("note", "task"):
+        kind_parser = kinds.add_parser(kind, help=f"Work with {kind}s")
+        actions = kind_parser.add_subparsers(dest="action", required=True)
+        
+        add = actions.add_parser("add", parents=[common], help=f"Create a {kind}")
+        add.add_argument("title", help="Title, or '-' to read NDJSON records from stdin")
+        add.add_argument("-t", "--tags", help="Comma-separated tags")
+        add.set_defaults(handler=cmd_add)
+        
+        list_parser = actions.add_parser("list", parents=[common], help=f"List {kind}s")
+        list_parser.add_argument("--tag", help="Only items with this tag")
+        list_parser.add_argument("-n", "--limit", type=int, help="Show at most this many")
+        list_parser.add_argument("--after", help="Start after this ID, the last one of the previous page (items come in ID order)")
+        list_parser.add_argument("--fields", help="Comma-separated fields to output")
+        list_parser.set_defaults(handler=cmd_list)
+        
+        show = actions.add_parser("show", parents=[common], help=f"Show a {kind}")
+        show.add_argument("id", help="ID or unique prefix")
+        show.set_defaults(handler=cmd_show)
+        
+        update = actions.add_parser("update", parents=[common], help=f"Update a {kind}")
+        update.add_argument("id", help="ID or unique prefix")
+        update.add_argument("--title", help="New title")
+        update.add_argument("-t", "--tags", help="New comma-separated tags")
+        update.set_defaults(handler=cmd_update)
+        
+        delete = actions.add_parser("delete", parents=[common], help=f"Delete a {kind}")
+        delete.add_argument("id", help="ID or unique prefix")
+        delete.set_defaults(handler=cmd_delete)
+        
+        if kind == "note":
+            add.add_argument("-c", "--content", help="Note body")
+            update.add_argument("-c", "--content", help="New body")
+        else:
+            add.add_argument("-d", "--description", help="Task description")
+            add.add_argument("-s", "--status", choices=STATUSES, default="pending")
+            add.add_argument("-p", "--priority", choices=PRIORITIES, default="medium")
+            add.add_argument("--due", help="Due date (YYYY-MM-DD)")
+            list_parser.add_argument("-s", "--status", choices=STATUSES)
+            list_parser.add_argument("-p", "--priority", choices=PRIORITIES)
+            update.add_argument("-d", "--description", help="New description")
+            update.add_argument("-s", "--status", choices=STATUSES)
+            update.add_argument("-p", "--priority", choices=PRIORITIES)
+            update.add_argument("--due", help="New due date (YYYY-MM-DD)")
+    
+    search = kinds.add_parser("search", parents=[common], help="Search notes and tasks")
+    search.add_argument("query", help="Whole words; the last one (and any 'term*') also matches by prefix")
+    search.add_argument("--type", choices=["all", "note", "task"], default="all")
+    search.add_argument("--any", action="store_true", help="Match any term instead of all")
+    search.add_argument("-n", "--limit", type=int, help="Show at most this many results")
+    search.set_defaults(handler=cmd_search)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None, storage=None) -> int:
+    """
+    Run one subcommand
+    
+    Args:
+        argv: Arguments (default: sys.argv[1:])
+        storage: Backend to use (default: the daemon, else JSONStorage)
+    
+    Returns:
+        Exit status
+    """
+    args = build_parser().parse_args(argv)
+    owned = storage is None
+    if owned:
+        storage = open_storage(args.data_dir)
+    
+    try:
+        return args.handler(args, storage)
+    except BrokenPipeError:
+        # The reader went away (e.g. `| head`); don't fail again flushing at exit
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 0
+    except (ValueError, KeyError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if owned and hasattr(storage, "close"):
+            storage.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
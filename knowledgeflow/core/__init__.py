@@ -1,16 +1,40 @@
 """
 Core package for KnowledgeFlow
+
+The names below are imported on first access, so importing a single
+submodule (e.g. core.json_storage for the CLI) doesn't also load the
+SQLite layer and the models.
 """
 
-from .database import init_database, get_connection, migrate_existing_data
-from .models import Note, Task, NoteLink, Category
-
-__all__ = [
-    'init_database',
-    'get_connection',
-    'migrate_existing_data',
-    'Note',
-    'Task',
-    'NoteLink',
-    'Category'
-]
+import importlib
+
+_EXPORTS = {
+    'init_database': 'database',
+    'get_connection': 'database',
+    'connection': 'database',
+    'close_connections': 'database',
+    'migrate_existing_data': 'database',
+    'rebuild_search_index': 'database',
+    'Note': 'models',
+    'Task': 'models',
+    'NoteLink': 'models',
+    'Category': 'models',
+    'NoteRow': 'models',
+    'TaskRow': 'models',
+    'hydrate': 'models',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -0,0 +1,393 @@
+"""
+Bulk import/export
+Streams notes and tasks between JSONL files or Markdown vaults and the
+JSON or SQLite backends
+
+Imports write JSONStorage in chunks of CHUNK_SIZE records (one snapshot
+write each) and SQLite in one transaction, and resolve [[wikilinks]] in
+a second pass, after every note in the batch exists.
+"""
+
+import json
+import re
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from core.database import connection, iter_keyset
+from core.links import WIKILINK, detect_links_in_content
+
+FRONT_MATTER = "---"
+
+NOTE_COLUMNS = ("title", "content", "tags", "created_at", "updated_at")
+TASK_COLUMNS = ("title", "description", "status", "priority", "due_date", "tags", "created_at")
+
+# Records held in memory per bulk_create call when importing into JSONStorage
+CHUNK_SIZE = 5000
+
+
+def normalize_tags(value) -> List[str]:
+    """
+    Tags as a list of strings
+    
+    A string is read as comma-separated tags ("a, b" -> ["a", "b"]).
+    
+    Raises:
+        ValueError: If value is neither a list nor a string
+    """
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [tag.strip() for tag in value.split(",") if tag.strip()]
+    if isinstance(value, (list, tuple)):
+        return [str(tag) for tag in value]
+    raise ValueError(f"tags must be a list or a comma-separated string, not {value!r}")
+
+
+# ===== READERS =====
+
+def read_jsonl(path: Path) -> Iterator[Dict]:
+    """
+    Stream records from a JSON Lines file
+    
+    Each line is one object; its "type" field says 'note' or 'task'
+    (default 'note'). Blank lines are skipped.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}:{line_no}: invalid JSON ({e})") from None
+            if not isinstance(record, dict):
+                raise ValueError(f"{path}:{line_no}: expected a JSON object, got {type(record).__name__}")
+            record.setdefault("type", "note")
+            yield record
+
+
+def _parse_value(value: str):
+    value = value.strip()
+    if value.startswith("[") and value.endswith("]"):
+        return [_parse_value(item) for item in value[1:-1].split(",") if item.strip()]
+    if value.startswith('"'):
+        try:
+            return json.loads(value)
+        except json.JSONDecodeError:
+            pass
+    return value.strip('"\'')
+
+
+def parse_front_matter(text: str) -> Tuple[Dict, str]:
+    """
+    Split a Markdown document into its front matter and body
+    
+    Supports the simple YAML used by note apps: `key: value`,
+    `key: [a, b]` and `key:` followed by `- item` lines.
+    
+    Returns:
+        Tuple of (metadata dict, body text)
+    """
+    lines = text.split("\n")
+    if not lines or lines[0].strip() != FRONT_MATTER:
+        return {}, text
+    
+    meta = {}
+    key = None
+    for i, line in enumerate(lines[1:], 1):
+        if line.strip() == FRONT_MATTER:
+            return meta, "\n".join(lines[i + 1:]).lstrip("\n")
+        item = re.match(r"\s*-\s+(.*)", line)
+        if item and key is not None:
+            if not isinstance(meta[key], list):
+                meta[key] = []
+            meta[key].append(_parse_value(item.group(1)))
+        elif ":" in line:
+            key, value = line.split(":", 1)
+            key = key.strip()
+            meta[key] = _parse_value(value) if value.strip() else []
+    
+    # No closing marker: it wasn't front matter after all
+    return {}, text
+
+
+def read_markdown_vault(directory: Path) -> Iterator[Dict]:
+    """
+    Stream notes from a folder of Markdown files (recursively)
+    
+    The title comes from the front matter or the file name; tags from
+    the front matter as a list or comma-separated string.
+    """
+    for path in sorted(Path(directory).rglob("*.md")):
+        meta, body = parse_front_matter(path.read_text(encoding='utf-8'))
+        tags = meta.get("tags", [])
+        if isinstance(tags, str):
+            tags = [tag.strip() for tag in tags.split(",") if tag.strip()]
+        
+        note = {
+            "type": "note",
+            "title": meta.get("title") or path.stem,
+            "content": body,
+            "tags": [tag.lstrip("#") for tag in tags],
+        }
+        for field in ("id", "created_at", "updated_at"):
+            if meta.get(field):
+                note[field] = meta[field]
+        yield note
+
+
+def read_records(path: Path) -> Iterator[Dict]:
+    """Read a Markdown vault if path is a directory, JSONL otherwise"""
+    path = Path(path)
+    return read_markdown_vault(path) if path.is_dir() else read_jsonl(path)
+
+
+# ===== WRITERS =====
+
+def write_jsonl(records: Iterable[Dict], path: Path) -> int:
+    """Write records to a JSON Lines file, one at a time; returns the count"""
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            count += 1
+    return count
+
+
+def _file_name(title: str, used: set) -> str:
+    base = re.sub(r'[\\/:*?"<>|]+', "-", title).strip(" .") or "Untitled"
+    name, n = base, 1
+    while name.lower() in used:
+        n += 1
+        name = f"{base} ({n})"
+    used.add(name.lower())
+    return name + ".md"
+
+
+def write_markdown_vault(records: Iterable[Dict], directory: Path) -> int:
+    """
+    Write notes as Markdown files with front matter; returns the count
+    
+    Tasks are skipped. Note bodies are written unchanged, so [[wikilinks]]
+    survive the round trip.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    used = set()
+    count = 0
+    for record in records:
+        if record.get("type", "note") != "note":
+            continue
+        tags = ", ".join(json.dumps(tag) for tag in record.get("tags") or [])
+        lines = [FRONT_MATTER, f"title: {json.dumps(record.get('title', ''))}", f"tags: [{tags}]"]
+        for field in ("id", "created_at", "updated_at"):
+            if record.get(field) is not None:
+                lines.append(f"{field}: {record[field]}")
+        lines += [FRONT_MATTER, "", record.get("content") or ""]
+        
+        path = directory / _file_name(record.get("title", ""), used)
+        path.write_text("\n".join(lines), encoding='utf-8')
+        count += 1
+    return count
+
+
+# ===== JSON BACKEND =====
+
+def import_to_json(storage, records: Iterable[Dict], chunk_size: int = CHUNK_SIZE) -> Dict[str, int]:
+    """
+    Import records into a JSONStorage, one snapshot write per chunk
+    
+    Only a chunk of records is held at a time; the wikilink pass keeps
+    just a title -> id map and the link titles found in new notes.
+    
+    Args:
+        storage: Target JSONStorage
+        records: Note/task dictionaries with a "type" field
+        chunk_size: Records written per bulk_create call
+    
+    Returns:
+        Counts of notes, tasks and links created
+    """
+    title_ids = {}
+    for note in storage.iter_notes(fields=("title",)):
+        title_ids.setdefault(note["title"], note["id"])
+    
+    counts = {"notes": 0, "tasks": 0}
+    pending = {"note": [], "task": []}
+    pending_ids = set()
+    wikilinks: List[Tuple[str, List[str]]] = []
+    
+    def flush(kind):
+        if pending[kind]:
+            counts[kind + "s"] += storage.bulk_create(kind, pending[kind])
+            pending[kind] = []
+            if kind == "note":
+                pending_ids.clear()
+    
+    for record in records:
+        kind = "task" if record.get("type") == "task" else "note"
+        record = dict(record, tags=normalize_tags(record.get("tags")))
+        if kind == "note":
+            # Pick the ID here (as bulk_create would) so links can point at it
+            note_id = record.get("id")
+            if (not isinstance(note_id, str) or not note_id or note_id in pending_ids
+                    or storage.get_note(note_id) is not None):
+                note_id = record["id"] = str(uuid.uuid4())
+            pending_ids.add(note_id)
+            title_ids.setdefault(record.get("title") or "", note_id)
+            titles = detect_links_in_content(record.get("content") or "")
+            if titles:
+                wikilinks.append((note_id, titles))
+        
+        pending[kind].append(record)
+        if len(pending[kind]) >= chunk_size:
+            flush(kind)
+    flush("note")
+    flush("task")
+    
+    # Second pass: every imported note now exists, so titles resolve
+    pairs = []
+    for note_id, titles in wikilinks:
+        for title in titles:
+            target_id = title_ids.get(title)
+            if target_id is not None and target_id != note_id:
+                pairs.append((note_id, target_id))
+    counts["links"] = storage.bulk_link(pairs, WIKILINK)
+    return counts
+
+
+def export_from_json(storage) -> Iterator[Dict]:
+    """Stream every note and then every task out of a JSONStorage"""
+    for note in storage.iter_notes():
+        yield {"type": "note", **note}
+    for task in storage.iter_tasks():
+        yield {"type": "task", **task}
+
+
+# ===== SQLITE BACKEND =====
+
+def _row_values(record: Dict, columns: Tuple[str, ...], now: str) -> List:
+    values = []
+    for column in columns:
+        value = record.get(column)
+        if column == "tags":
+            value = json.dumps(normalize_tags(value))
+        elif column in ("created_at", "updated_at"):
+            value = value or now
+        elif column == "title":
+            value = value or ""
+        values.append(value)
+    return values
+
+
+def import_to_sqlite(records: Iterable[Dict]) -> Dict[str, int]:
+    """
+    Import records into the core SQLite database in a single transaction
+    
+    Args:
+        records: Note/task dictionaries with a "type" field
+    
+    Returns:
+        Counts of notes, tasks and links created
+    """
+    now = datetime.now().isoformat()
+    note_sql = f"INSERT INTO notes ({', '.join(NOTE_COLUMNS)}) VALUES ({', '.join('?' * len(NOTE_COLUMNS))})"
+    task_sql = f"INSERT INTO tasks ({', '.join(TASK_COLUMNS)}) VALUES ({', '.join('?' * len(TASK_COLUMNS))})"
+    counts = {"notes": 0, "tasks": 0, "links": 0}
+    wikilinks: List[Tuple[int, List[str]]] = []
+    
+    with connection() as conn:
+        cursor = conn.cursor()
+        for record in records:
+            if record.get("type") == "task":
+                cursor.execute(task_sql, _row_values(record, TASK_COLUMNS, now))
+                counts["tasks"] += 1
+                continue
+            
+            cursor.execute(note_sql, _row_values(record, NOTE_COLUMNS, now))
+            counts["notes"] += 1
+            titles = detect_links_in_content(record.get("content") or "")
+            if titles:
+                wikilinks.append((cursor.lastrowid, titles))
+        
+        # Second pass, same transaction: resolve titles now that all notes exist
+        wanted = {title for _, titles in wikilinks for title in titles}
+        title_ids = {}
+        if wanted:
+            cursor.execute("CREATE TEMP TABLE IF NOT EXISTS import_titles (title TEXT PRIMARY KEY)")
+            cursor.execute("DELETE FROM import_titles")
+            cursor.executemany("INSERT INTO import_titles VALUES (?)", [(t,) for t in wanted])
+            cursor.execute("""
+                SELECT n.title, MIN(n.id) FROM notes n
+                JOIN import_titles t ON t.title = n.title
+                GROUP BY n.title
+            """)
+            title_ids = dict(cursor.fetchall())
+            cursor.execute("DROP TABLE import_titles")
+        
+        rows = []
+        for note_id, titles in wikilinks:
+            targets = {title_ids[t] for t in titles if t in title_ids}
+            targets.discard(note_id)
+            rows.extend((note_id, target_id, WIKILINK, now) for target_id in sorted(targets))
+        if rows:
+            before = conn.total_changes
+            cursor.executemany("""
+                INSERT OR IGNORE INTO note_links (source_note_id, target_note_id, link_type, created_at)
+                VALUES (?, ?, ?, ?)
+            """, rows)
+            counts["links"] = conn.total_changes - before
+    
+    return counts
+
+
+def export_from_sqlite(batch_size: int = 500) -> Iterator[Dict]:
+    """
+    Stream every note and then every task out of the core SQLite database
+    
+    Rows are read in keyset pages and the connection is released between
+    them, so a slow or abandoned consumer never holds it.
+    """
+    for kind, table in (("note", "notes"), ("task", "tasks")):
+        for row in iter_keyset(table, batch_size=batch_size):
+            record = {"type": kind, **dict(row)}
+            record["tags"] = json.loads(record.get("tags") or "[]")
+            yield record
+
+
+if __name__ == "__main__":
+    import argparse
+    
+    from core.database import init_database
+    from core.json_storage import JSONStorage
+    
+    parser = argparse.ArgumentParser(description="Bulk import/export notes and tasks")
+    parser.add_argument("action", choices=["import", "export"])
+    parser.add_argument("path", type=Path, help="JSONL file or Markdown vault directory")
+    parser.add_argument("--backend", choices=["json", "sqlite"], default="json")
+    parser.add_argument("--data-dir", type=Path, default=None, help="JSON backend directory")
+    parser.add_argument("--format", choices=["jsonl", "markdown"], default=None,
+                        help="Export format (default: from the path's suffix)")
+    args = parser.parse_args()
+    
+    if args.backend == "sqlite":
+        init_database()
+        storage = None
+    else:
+        storage = JSONStorage(data_dir=args.data_dir)
+    
+    if args.action == "import":
+        records = read_records(args.path)
+        counts = import_to_sqlite(records) if storage is None else import_to_json(storage, records)
+        print(f"✓ Imported {counts['notes']} notes, {counts['tasks']} tasks, {counts['links']} links")
+    else:
+        records = export_from_sqlite() if storage is None else export_from_json(storage)
+        fmt = args.format or ("jsonl" if args.path.suffix == ".jsonl" else "markdown")
+        if fmt == "jsonl":
+            count = write_jsonl(records, args.path)
+        else:
+            count = write_markdown_vault(records, args.path)
+        print(f"✓ Exported {count} records to {args.path}")
@@ -1,13 +1,55 @@
 """
 Category management operations
+
+Categories form a tree of any depth. The category_closure table (see
+core.database) pairs every category with each of its ancestors, so
+"everything under Work" is a single query rather than a walk.
 """
 
 import sqlite3
-from typing import List, Optional
-from core.database import get_connection
-from core.models import Category
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import core.database as database
+from core.database import connection
+from core.models import Category, compile_hydrator, hydrate
+from core.search import to_fts_query
 from datetime import datetime
 
+# Subtree of a category (itself included), via the closure table
+SUBTREE = "SELECT descendant_id FROM category_closure WHERE ancestor_id = ?"
+
+# Tables that can be filed under categories, with their full-text tables
+ITEM_TABLES = {"notes": "notes_fts", "tasks": "tasks_fts"}
+
+# get_category_tree results by (database, type), with the stamp they were built
+# under (see _cache_stamp)
+_tree_cache: Dict = {}
+_generation = 0
+
+
+def _cache_stamp() -> Tuple:
+    """
+    Changes whenever the categories may have changed
+    
+    _generation covers writes made through this module; PRAGMA
+    data_version covers commits by any other connection, including other
+    processes and the daemon. data_version is per connection, so the
+    connection itself is part of the stamp.
+    """
+    with connection() as conn:
+        return (_generation, conn, conn.execute("PRAGMA data_version").fetchone()[0])
+
+
+def invalidate_category_cache():
+    """
+    Forget cached category trees
+    
+    Called by every category change in this module. Commits made through
+    other connections are noticed on their own.
+    """
+    global _generation
+    _generation += 1
+    _tree_cache.clear()
+
 
 def create_category(name: str, parent_id: Optional[int] = None, type: str = 'note') -> Optional[int]:
     """
@@ -21,35 +63,26 @@ def create_category(name: str, parent_id: Optional[int] = None, type: str = 'not
     Returns:
         Category ID if successful, None otherwise
     """
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    try:
-        now = datetime.now().isoformat()
-        cursor.execute("""
-            INSERT INTO categories (name, parent_id, type, created_at)
-            VALUES (?, ?, ?, ?)
-        """, (name, parent_id, type, now))
-        
+    with connection() as conn:
+        try:
+            now = datetime.now().isoformat()
+            cursor = conn.execute("""
+                INSERT INTO categories (name, parent_id, type, created_at)
+                VALUES (?, ?, ?, ?)
+            """, (name, parent_id, type, now))
+        except sqlite3.IntegrityError:
+            # Category name already exists
+            return None
         category_id = cursor.lastrowid
-        conn.commit()
-        return category_id
     
-    except sqlite3.IntegrityError:
-        # Category name already exists
-        return None
-    finally:
-        conn.close()
+    invalidate_category_cache()
+    return category_id
 
 
 def get_category(category_id: int) -> Optional[Category]:
     """Get category by ID"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("SELECT * FROM categories WHERE id = ?", (category_id,))
-    row = cursor.fetchone()
-    conn.close()
+    with connection() as conn:
+        row = conn.execute("SELECT * FROM categories WHERE id = ?", (category_id,)).fetchone()
     
     if row:
         return Category.from_db_row(row)
@@ -66,51 +99,219 @@ def get_all_categories(type: Optional[str] = None) -> List[Category]:
     Returns:
         List of Category objects
     """
-    conn = get_connection()
-    cursor = conn.cursor()
+    with connection() as conn:
+        if type:
+            cursor = conn.execute("SELECT * FROM categories WHERE type IN (?, 'both') ORDER BY name", (type,))
+        else:
+            cursor = conn.execute("SELECT * FROM categories ORDER BY name")
+        
+        categories = list(hydrate(cursor, Category))
     
-    if type:
-        cursor.execute("SELECT * FROM categories WHERE type IN (?, 'both') ORDER BY name", (type,))
-    else:
-        cursor.execute("SELECT * FROM categories ORDER BY name")
+    return categories
+
+
+def iter_categories(type: Optional[str] = None, after_id: Optional[int] = None,
+                    limit: Optional[int] = None, batch_size: int = 200) -> Iterator[Category]:
+    """
+    Stream categories in name order, fetching rows in batches
     
-    categories = [Category.from_db_row(row) for row in cursor.fetchall()]
-    conn.close()
+    Each batch is its own keyset query, so the connection is only held
+    while a batch is read, not while the caller iterates.
     
-    return categories
+    Args:
+        type: Filter by type ('note', 'task', 'both'), or None for all
+        after_id: Resume after this category (the last ID of the previous page)
+        limit: Maximum number of categories to yield
+        batch_size: Rows fetched from SQLite at a time
+    
+    Returns:
+        Iterator of Category objects
+    """
+    # Names are unique, so the last name seen is a keyset cursor
+    where, params = [], []
+    if type:
+        where.append("type IN (?, 'both')")
+        params.append(type)
+    
+    def page_sql(after_name: bool) -> str:
+        conditions = where + ["name > ?"] if after_name else where
+        sql = "SELECT * FROM categories"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        return sql + " ORDER BY name LIMIT ?"
+    
+    last_name = None
+    if after_id is not None:
+        with connection() as conn:
+            row = conn.execute("SELECT name FROM categories WHERE id = ?", (after_id,)).fetchone()
+        if row is None:
+            return
+        last_name = row['name']
+    
+    remaining = limit
+    while remaining is None or remaining > 0:
+        page_size = batch_size if remaining is None else min(batch_size, remaining)
+        with connection() as conn:
+            if last_name is None:
+                cursor = conn.execute(page_sql(False), [*params, page_size])
+            else:
+                cursor = conn.execute(page_sql(True), [*params, last_name, page_size])
+            build = compile_hydrator(Category, [col[0] for col in cursor.description])
+            rows = cursor.fetchall()
+        for row in rows:
+            yield build(row)
+        if len(rows) < page_size:
+            return
+        last_name = rows[-1]['name']
+        if remaining is not None:
+            remaining -= len(rows)
 
 
 def get_category_tree(type: Optional[str] = None) -> dict:
     """
     Get categories as a hierarchical tree
     
+    Every node is {'category': Category, 'children': [nodes...]}, to any
+    depth, with siblings in name order. Categories whose parent is
+    filtered out by type appear at the top level. The tree is cached
+    until categories change, so treat it as read-only.
+    
     Args:
         type: Filter by type
     
     Returns:
-        Dictionary representing category tree
+        Dictionary mapping each top-level category ID to its node
     """
+    key = (str(database.DB_PATH), type)
+    stamp = _cache_stamp()
+    cached = _tree_cache.get(key)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    
     categories = get_all_categories(type)
+    nodes = {c.id: {'category': c, 'children': []} for c in categories}
     
-    # Build tree
     tree = {}
-    category_dict = {c.id: c for c in categories}
-    
-    for cat in categories:
-        if cat.parent_id is None:
-            tree[cat.id] = {
-                'category': cat,
-                'children': []
-            }
-    
-    # Add children
     for cat in categories:
-        if cat.parent_id is not None and cat.parent_id in tree:
-            tree[cat.parent_id]['children'].append(cat)
+        parent = nodes.get(cat.parent_id)
+        if parent is None:
+            tree[cat.id] = nodes[cat.id]
+        else:
+            parent['children'].append(nodes[cat.id])
     
+    _tree_cache[key] = (stamp, tree)
     return tree
 
 
+def get_subtree_ids(category_id: int) -> List[int]:
+    """
+    IDs of a category and all its descendants, nearest first
+    
+    Args:
+        category_id: Category ID
+    
+    Returns:
+        List of category IDs (empty if the category doesn't exist)
+    """
+    with connection() as conn:
+        cursor = conn.execute("""
+            SELECT descendant_id FROM category_closure
+            WHERE ancestor_id = ?
+            ORDER BY depth, descendant_id
+        """, (category_id,))
+        return [row[0] for row in cursor]
+
+
+def get_category_path(category_id: int) -> List[Category]:
+    """
+    Ancestors of a category from the root down, ending with the category itself
+    
+    Args:
+        category_id: Category ID
+    
+    Returns:
+        List of Category objects (empty if the category doesn't exist)
+    """
+    with connection() as conn:
+        cursor = conn.execute("""
+            SELECT c.* FROM category_closure cc
+            JOIN categories c ON c.id = cc.ancestor_id
+            WHERE cc.descendant_id = ?
+            ORDER BY cc.depth DESC
+        """, (category_id,))
+        return list(hydrate(cursor, Category))
+
+
+def move_category(category_id: int, parent_id: Optional[int]) -> bool:
+    """
+    Give a category a new parent, taking its subtree along
+    
+    Args:
+        category_id: Category ID
+        parent_id: New parent category ID (None to make it top-level)
+    
+    Returns:
+        True if moved, False if a category doesn't exist or the new
+        parent is inside the category's own subtree
+    """
+    with connection() as conn:
+        if parent_id is not None:
+            inside = conn.execute("""
+                SELECT 1 FROM category_closure WHERE ancestor_id = ? AND descendant_id = ?
+            """, (category_id, parent_id)).fetchone()
+            exists = conn.execute("SELECT 1 FROM categories WHERE id = ?", (parent_id,)).fetchone()
+            if inside or not exists:
+                return False
+        cursor = conn.execute("UPDATE categories SET parent_id = ? WHERE id = ?", (parent_id, category_id))
+        moved = cursor.rowcount > 0
+    
+    invalidate_category_cache()
+    return moved
+
+
+def get_category_counts(type: Optional[str] = None) -> Dict[int, Dict[str, int]]:
+    """
+    Number of notes and tasks in every category, with subtree roll-ups
+    
+    Args:
+        type: Only categories of this type (plus 'both'), or None for all
+    
+    Returns:
+        Dictionary mapping category ID to {'notes', 'tasks'} (filed
+        directly in the category) and {'total_notes', 'total_tasks'}
+        (anywhere in its subtree)
+    """
+    sql = """
+        WITH note_counts AS (
+            SELECT category_id, COUNT(*) AS n FROM notes
+            WHERE category_id IS NOT NULL GROUP BY category_id
+        ), task_counts AS (
+            SELECT category_id, COUNT(*) AS n FROM tasks
+            WHERE category_id IS NOT NULL GROUP BY category_id
+        )
+        SELECT cc.ancestor_id AS id,
+               TOTAL(CASE WHEN cc.depth = 0 THEN nc.n END) AS notes,
+               TOTAL(CASE WHEN cc.depth = 0 THEN tc.n END) AS tasks,
+               TOTAL(nc.n) AS total_notes,
+               TOTAL(tc.n) AS total_tasks
+        FROM category_closure cc
+        JOIN categories c ON c.id = cc.ancestor_id
+        LEFT JOIN note_counts nc ON nc.category_id = cc.descendant_id
+        LEFT JOIN task_counts tc ON tc.category_id = cc.descendant_id
+    """
+    params = []
+    if type:
+        sql += " WHERE c.type IN (?, 'both')"
+        params.append(type)
+    sql += " GROUP BY cc.ancestor_id"
+    
+    with connection() as conn:
+        return {
+            row['id']: {name: int(row[name]) for name in ('notes', 'tasks', 'total_notes', 'total_tasks')}
+            for row in conn.execute(sql, params)
+        }
+
+
 def assign_category_to_note(note_id: int, category_id: Optional[int]) -> bool:
     """
     Assign a category to a note
@@ -122,14 +323,9 @@ def assign_category_to_note(note_id: int, category_id: Optional[int]) -> bool:
     Returns:
         True if successful
     """
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("UPDATE notes SET category_id = ? WHERE id = ?", (category_id, note_id))
-    
-    success = cursor.rowcount > 0
-    conn.commit()
-    conn.close()
+    with connection() as conn:
+        cursor = conn.execute("UPDATE notes SET category_id = ? WHERE id = ?", (category_id, note_id))
+        success = cursor.rowcount > 0
     
     return success
 
@@ -145,50 +341,191 @@ def assign_category_to_task(task_id: int, category_id: Optional[int]) -> bool:
     Returns:
         True if successful
     """
-    conn = get_connection()
-    cursor = conn.cursor()
+    with connection() as conn:
+        cursor = conn.execute("UPDATE tasks SET category_id = ? WHERE id = ?", (category_id, task_id))
+        success = cursor.rowcount > 0
     
-    cursor.execute("UPDATE tasks SET category_id = ? WHERE id = ?", (category_id, task_id))
+    return success
+
+
+# ===== BULK ASSIGNMENT =====
+#
+# Each function below runs as one statement (or one executemany) per
+# table inside a single transaction, and counts only the rows whose
+# category actually changed.
+
+def _check_kinds(kinds: Iterable[str]) -> Tuple[str, ...]:
+    kinds = tuple(kinds)
+    unknown = [kind for kind in kinds if kind not in ITEM_TABLES]
+    if unknown:
+        raise ValueError(f"Unknown item kind(s): {unknown}; expected {list(ITEM_TABLES)}")
+    return kinds
+
+
+def _category_exists(conn, category_id: Optional[int]) -> bool:
+    """True for None (uncategorized) or an existing category"""
+    if category_id is None:
+        return True
+    return conn.execute("SELECT 1 FROM categories WHERE id = ?", (category_id,)).fetchone() is not None
+
+
+def _assign_many(table: str, item_ids: Iterable[int], category_id: Optional[int]) -> int:
+    with connection() as conn:
+        if not _category_exists(conn, category_id):
+            return 0
+        cursor = conn.executemany(
+            f"UPDATE {table} SET category_id = ? WHERE id = ? AND category_id IS NOT ?",
+            ((category_id, item_id, category_id) for item_id in dict.fromkeys(item_ids))
+        )
+        return cursor.rowcount
+
+
+def assign_category_to_notes(note_ids: Iterable[int], category_id: Optional[int]) -> int:
+    """
+    Assign a category to many notes at once
     
-    success = cursor.rowcount > 0
-    conn.commit()
-    conn.close()
+    Args:
+        note_ids: Note IDs
+        category_id: Category ID (None to remove the category)
     
-    return success
+    Returns:
+        Number of notes whose category changed (0 if the category doesn't exist)
+    """
+    return _assign_many("notes", note_ids, category_id)
 
 
-def get_notes_by_category(category_id: int) -> List[dict]:
-    """Get all notes in a category"""
-    conn = get_connection()
-    cursor = conn.cursor()
+def assign_category_to_tasks(task_ids: Iterable[int], category_id: Optional[int]) -> int:
+    """
+    Assign a category to many tasks at once
     
-    cursor.execute("""
-        SELECT id, title, tags, created_at
-        FROM notes
-        WHERE category_id = ?
-        ORDER BY created_at DESC
-    """, (category_id,))
+    Args:
+        task_ids: Task IDs
+        category_id: Category ID (None to remove the category)
     
-    notes = [dict(row) for row in cursor.fetchall()]
-    conn.close()
+    Returns:
+        Number of tasks whose category changed (0 if the category doesn't exist)
+    """
+    return _assign_many("tasks", task_ids, category_id)
+
+
+def _assign_where(where: str, params: Tuple, category_id: Optional[int],
+                  kinds: Iterable[str]) -> Dict[str, int]:
+    """Set category_id on every row matching where ({table} is filled in) in each kind's table"""
+    kinds = _check_kinds(kinds)
+    counts = {kind: 0 for kind in kinds}
+    with connection() as conn:
+        if not _category_exists(conn, category_id):
+            return counts
+        for kind in kinds:
+            condition = where.format(table=kind, fts=ITEM_TABLES[kind])
+            cursor = conn.execute(
+                f"UPDATE {kind} SET category_id = ? WHERE ({condition}) AND category_id IS NOT ?",
+                (category_id, *params, category_id)
+            )
+            counts[kind] = cursor.rowcount
+    return counts
+
+
+def move_category_items(from_category_id: int, to_category_id: Optional[int],
+                        include_descendants: bool = True,
+                        kinds: Iterable[str] = ("notes", "tasks")) -> Dict[str, int]:
+    """
+    Refile every note and task in a category (and by default its subtree)
     
-    return notes
+    Args:
+        from_category_id: Category to empty
+        to_category_id: Category to move the items to (None to uncategorize them)
+        include_descendants: Also move items filed under subcategories
+        kinds: Which of 'notes' and 'tasks' to move
+    
+    Returns:
+        Number of items moved, by kind
+    """
+    where = f"category_id IN ({SUBTREE})" if include_descendants else "category_id = ?"
+    return _assign_where(where, (from_category_id,), to_category_id, kinds)
 
 
-def get_tasks_by_category(category_id: int) -> List[dict]:
-    """Get all tasks in a category"""
-    conn = get_connection()
-    cursor = conn.cursor()
+def assign_category_by_tag(tag: str, category_id: Optional[int],
+                           kinds: Iterable[str] = ("notes", "tasks")) -> Dict[str, int]:
+    """
+    File every note and task carrying a tag under a category
     
-    cursor.execute("""
-        SELECT id, title, status, priority, due_date
-        FROM tasks
-        WHERE category_id = ?
-        ORDER BY priority, due_date
-    """, (category_id,))
+    Args:
+        tag: Tag to match exactly
+        category_id: Category ID (None to remove the category)
+        kinds: Which of 'notes' and 'tasks' to update
     
-    tasks = [dict(row) for row in cursor.fetchall()]
-    conn.close()
+    Returns:
+        Number of items whose category changed, by kind
+    """
+    # CASE guards json_each against rows whose tags aren't valid JSON
+    where = ("CASE WHEN json_valid({table}.tags) THEN "
+             "EXISTS (SELECT 1 FROM json_each({table}.tags) WHERE value = ?) ELSE 0 END")
+    return _assign_where(where, (tag,), category_id, kinds)
+
+
+def assign_category_by_search(query: str, category_id: Optional[int],
+                              kinds: Iterable[str] = ("notes", "tasks"),
+                              operator: str = "AND") -> Dict[str, int]:
+    """
+    File every note and task matching a full-text search under a category
+    
+    Args:
+        query: Search text, as for core.search ("word*" matches by prefix)
+        category_id: Category ID (None to remove the category)
+        kinds: Which of 'notes' and 'tasks' to update
+        operator: 'AND' to require every word, 'OR' to accept any
+    
+    Returns:
+        Number of items whose category changed, by kind
+    """
+    match = to_fts_query(query, operator)
+    if not match:
+        return {kind: 0 for kind in _check_kinds(kinds)}
+    where = "id IN (SELECT rowid FROM {fts} WHERE {fts} MATCH ?)"
+    return _assign_where(where, (match,), category_id, kinds)
+
+
+def get_notes_by_category(category_id: int, include_descendants: bool = False) -> List[dict]:
+    """
+    Get all notes in a category
+    
+    Args:
+        category_id: Category ID
+        include_descendants: Also include notes in its subcategories, at any depth
+    """
+    where = f"category_id IN ({SUBTREE})" if include_descendants else "category_id = ?"
+    with connection() as conn:
+        cursor = conn.execute(f"""
+            SELECT id, title, tags, created_at
+            FROM notes
+            WHERE {where}
+            ORDER BY created_at DESC
+        """, (category_id,))
+        
+        notes = [dict(row) for row in cursor.fetchall()]
+    
+    return notes
+
+
+def get_tasks_by_category(category_id: int, include_descendants: bool = False) -> List[dict]:
+    """
+    Get all tasks in a category
+    
+    Args:
+        category_id: Category ID
+        include_descendants: Also include tasks in its subcategories, at any depth
+    """
+    where = f"category_id IN ({SUBTREE})" if include_descendants else "category_id = ?"
+    with connection() as conn:
+        cursor = conn.execute(f"""
+            SELECT id, title, status, priority, due_date
+            FROM tasks
+            WHERE {where}
+            ORDER BY priority, due_date
+        """, (category_id,))
+        
+        tasks = [dict(row) for row in cursor.fetchall()]
     
     return tasks
 
@@ -196,7 +533,9 @@ def get_tasks_by_category(category_id: int) -> List[dict]:
 def delete_category(category_id: int) -> bool:
     """
     Delete a category
-    Note: This will set category_id to NULL for associated notes/tasks
+    Note: This will set category_id to NULL for associated notes/tasks.
+    Subcategories are removed with it (ON DELETE CASCADE), so their
+    notes/tasks are cleared too.
     
     Args:
         category_id: Category ID
@@ -204,18 +543,17 @@ def delete_category(category_id: int) -> bool:
     Returns:
         True if successful
     """
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    # Set category_id to NULL for notes and tasks
-    cursor.execute("UPDATE notes SET category_id = NULL WHERE category_id = ?", (category_id,))
-    cursor.execute("UPDATE tasks SET category_id = NULL WHERE category_id = ?", (category_id,))
-    
-    # Delete category
-    cursor.execute("DELETE FROM categories WHERE id = ?", (category_id,))
-    
-    success = cursor.rowcount > 0
-    conn.commit()
-    conn.close()
+    with connection() as conn:
+        cursor = conn.cursor()
+        
+        # Set category_id to NULL for notes and tasks
+        cursor.execute(f"UPDATE notes SET category_id = NULL WHERE category_id IN ({SUBTREE})", (category_id,))
+        cursor.execute(f"UPDATE tasks SET category_id = NULL WHERE category_id IN ({SUBTREE})", (category_id,))
+        
+        # Delete category
+        cursor.execute("DELETE FROM categories WHERE id = ?", (category_id,))
+        
+        success = cursor.rowcount > 0
     
+    invalidate_category_cache()
     return success
@@ -0,0 +1,171 @@
+"""
+Storage Client
+Thin client for the storage daemon (see core.daemon)
+
+Kept apart from the server so that connecting costs the CLI almost
+nothing at startup.
+"""
+
+import json
+import os
+import threading
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Any, Optional
+
+from core.json_storage import VersionConflict
+
+DEFAULT_DATA_DIR = Path(__file__).parent.parent / "data"
+SOCKET_NAME = "knowledgeflow.sock"
+
+# Built-in request every daemon answers with its backend and method names
+HANDSHAKE = "describe"
+
+# Exceptions re-raised as themselves on the client side
+ERRORS = {
+    "ValueError": ValueError,
+    "KeyError": KeyError,
+    "TypeError": TypeError,
+    "VersionConflict": VersionConflict,
+}
+
+
+class DaemonError(RuntimeError):
+    """The daemon failed a request with an unexpected error"""
+
+
+def default_socket_path(data_dir: Optional[Path] = None, backend: str = "json") -> Path:
+    """
+    Socket path from KNOWLEDGEFLOW_SOCKET, else <data_dir>/knowledgeflow.sock
+    
+    Backends other than JSON get their own name (knowledgeflow-sqlite.sock)
+    so their daemons never take the socket the CLI looks for.
+    """
+    env = os.getenv("KNOWLEDGEFLOW_SOCKET")
+    if env:
+        return Path(env)
+    name = SOCKET_NAME if backend == "json" else f"knowledgeflow-{backend}.sock"
+    return Path(data_dir if data_dir is not None else DEFAULT_DATA_DIR) / name
+
+
+class StorageClient:
+    """
+    Thin client with the same method names as the served backend
+    
+    client.create_note(title="x") sends one request and returns the
+    result. Iterators (iter_notes, iter_tasks) come back as lists. Only
+    the methods the daemon reported in the handshake exist; any other
+    attribute raises AttributeError, so hasattr() tells what is served.
+    """
+    
+    def __init__(self, socket_path: Optional[Path] = None, timeout: Optional[float] = 30.0):
+        import socket  # deferred: most CLI runs find no daemon and never need it
+        
+        self.socket_path = Path(socket_path) if socket_path is not None else default_socket_path()
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.settimeout(timeout)
+        try:
+            self._sock.connect(str(self.socket_path))
+        except OSError:
+            self._sock.close()
+            raise
+        self._file = self._sock.makefile("rb")
+        self._next_id = 0
+        self._lock = threading.Lock()
+        
+        try:
+            info = self.call(HANDSHAKE)
+        except Exception:
+            self.close()
+            raise
+        self.backend: str = info["backend"]
+        self.methods = frozenset(info["methods"])
+    
+    def call(self, method: str, *args, **params) -> Any:
+        """Run one backend method in the daemon"""
+        with self._lock:
+            self._next_id += 1
+            request = {"id": self._next_id, "method": method, "args": args, "params": params}
+            self._sock.sendall(json.dumps(request, separators=(',', ':')).encode() + b"\n")
+            line = self._file.readline()
+        if not line:
+            raise ConnectionError("Daemon closed the connection")
+        
+        reply = json.loads(line)
+        error = reply.get("error")
+        if error is not None:
+            raise ERRORS.get(error["type"], DaemonError)(error["message"])
+        return reply["result"]
+    
+    def batch(self):
+        """
+        No-op stand-in for JSONStorage.batch()
+        
+        Each call is its own request, and the daemon already runs requests
+        that arrive together under one batch on its side.
+        """
+        return nullcontext()
+    
+    def __getattr__(self, name):
+        if name not in self.__dict__.get("methods", ()):
+            raise AttributeError(name)
+        
+        def method(*args, **params):
+            result = self.call(name, *args, **params)
+            if name.startswith("iter_"):
+                return iter(result)
+            if name == "get_versioned":
+                return tuple(result)
+            return result
+        
+        method.__name__ = name
+        return method
+    
+    def close(self):
+        self._file.close()
+        self._sock.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+
+
+def is_running(socket_path: Optional[Path] = None) -> bool:
+    """True if a daemon answers on socket_path"""
+    path = Path(socket_path) if socket_path is not None else default_socket_path()
+    if not path.exists():
+        return False
+    import socket
+    
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(str(path))
+        return True
+    except OSError:
+        return False
+    finally:
+        probe.close()
+
+
+def connect(socket_path: Optional[Path] = None, backend: str = "json") -> Optional[StorageClient]:
+    """
+    Client for the running daemon, or None if there isn't one
+    
+    Args:
+        socket_path: Daemon socket (default: default_socket_path(backend=backend))
+        backend: Backend the caller expects; a daemon serving another one
+            is ignored (None is returned)
+    """
+    path = Path(socket_path) if socket_path is not None else default_socket_path(backend=backend)
+    if not path.exists():
+        return None
+    try:
+        client = StorageClient(path)
+    except (OSError, ValueError, DaemonError):
+        return None
+    if client.backend != backend:
+        client.close()
+        return None
+    return client
@@ -0,0 +1,243 @@
+"""
+Storage Daemon
+Long-running server that owns a storage backend and serves it over a
+Unix domain socket
+
+Protocol: one JSON object per line in each direction.
+    request:  {"id": 1, "method": "create_note", "args": [...], "params": {"title": "..."}}
+    response: {"id": 1, "result": ...}
+          or  {"id": 1, "error": {"type": "ValueError", "message": "..."}}
+Clients open with a "describe" request, answered with the backend's
+name and the methods it serves.
+
+A single worker thread executes requests, so the backend needs no
+thread safety of its own. Requests that arrive together are run as
+one batch under the backend's batch() context (for JSONStorage: every
+collection lock taken once for the whole batch).
+
+Run `python -m core.daemon` to start it; the CLI connects through
+core.client automatically when its socket answers.
+"""
+
+import dataclasses
+import json
+import os
+import queue
+import socketserver
+import threading
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Dict, Optional
+
+from core.client import HANDSHAKE, default_socket_path, is_running
+
+# Methods the daemon exposes for each backend
+JSON_METHODS = frozenset({
+    "create_note", "get_note", "list_notes", "iter_notes", "update_note", "delete_note",
+    "search_notes", "create_task", "get_task", "list_tasks", "iter_tasks", "update_task",
+    "delete_task", "search_tasks", "create_link", "get_links", "bulk_create", "bulk_link",
+    "search_all", "resolve_prefix", "version", "get_versioned", "compare_and_update",
+    "compact",
+})
+SQLITE_METHODS = frozenset({
+    "create_note", "get_note", "list_notes", "iter_notes", "update_note", "delete_note",
+    "create_task", "get_task", "list_tasks", "iter_tasks", "update_task", "delete_task",
+    "search_notes", "search_tasks", "create_link", "delete_link", "get_forward_links",
+    "get_backlinks", "create_category", "get_category", "get_all_categories",
+    "get_category_tree", "assign_category_to_note", "assign_category_to_task",
+    "get_notes_by_category", "get_tasks_by_category", "delete_category",
+    "get_subtree_ids", "get_category_path", "move_category", "get_category_counts",
+    "assign_category_to_notes", "assign_category_to_tasks", "move_category_items",
+    "assign_category_by_tag", "assign_category_by_search",
+})
+
+
+def _jsonable(value):
+    """Turn backend results (iterators, model objects) into JSON-ready values"""
+    if isinstance(value, (dict, str, int, float, bool)) or value is None:
+        return value
+    if hasattr(value, "to_dict"):
+        return value.to_dict()
+    if dataclasses.is_dataclass(value):
+        return dataclasses.asdict(value)
+    if isinstance(value, (list, tuple, set, frozenset)) or hasattr(value, "__next__"):
+        return [_jsonable(item) for item in value]
+    raise TypeError(f"Cannot send {type(value).__name__} over the socket")
+
+
+class SQLiteBackend:
+    """The SQLite note, task, search, link and category functions as one object"""
+    
+    def __init__(self):
+        from core import categories, links, notes, search, tasks
+        from core.database import init_database
+        
+        init_database()
+        self._modules = (notes, tasks, search, links, categories)
+    
+    def __getattr__(self, name):
+        for module in self._modules:
+            function = getattr(module, name, None)
+            if function is not None:
+                return function
+        raise AttributeError(name)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """Reads requests from one client connection and writes the replies"""
+    
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+            except json.JSONDecodeError as e:
+                reply = {"id": None, "error": {"type": "ValueError", "message": f"Bad request: {e}"}}
+            else:
+                done = threading.Event()
+                slot = {"request": request, "done": done}
+                self.server.storage_daemon.requests.put(slot)
+                done.wait()
+                reply = slot["reply"]
+            self.wfile.write(json.dumps(reply, separators=(',', ':')).encode() + b"\n")
+            self.wfile.flush()
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class StorageDaemon:
+    """
+    Serves a backend's methods over a Unix domain socket
+    
+    Connections are handled by their own threads, which queue requests
+    for the single worker thread that runs them.
+    """
+    
+    def __init__(self, backend, socket_path: Path, methods=JSON_METHODS,
+                 max_batch: int = 256, backend_name: str = "json"):
+        """
+        Args:
+            backend: Object whose methods are served (e.g. JSONStorage)
+            socket_path: Where to listen
+            methods: Names of the methods clients may call
+            max_batch: Most requests run under one batch() context
+            backend_name: Reported to clients in the handshake ('json', 'sqlite')
+        """
+        self.backend = backend
+        self.backend_name = backend_name
+        self.socket_path = Path(socket_path)
+        self.methods = frozenset(methods)
+        self.max_batch = max_batch
+        self.requests: "queue.Queue[Optional[Dict]]" = queue.Queue()
+        self._server: Optional[_Server] = None
+        self._threads = []
+    
+    def _execute(self, request: Dict) -> Dict:
+        request_id = request.get("id")
+        method = request.get("method")
+        if method == HANDSHAKE:
+            return {"id": request_id, "result": {"backend": self.backend_name,
+                                                 "methods": sorted(self.methods)}}
+        if method not in self.methods:
+            return {"id": request_id, "error": {"type": "ValueError",
+                                                "message": f"Unknown method: {method!r}"}}
+        try:
+            result = getattr(self.backend, method)(*(request.get("args") or ()),
+                                                   **(request.get("params") or {}))
+            return {"id": request_id, "result": _jsonable(result)}
+        except Exception as e:
+            return {"id": request_id, "error": {"type": type(e).__name__, "message": str(e)}}
+    
+    def _work(self):
+        batch_context = getattr(self.backend, "batch", nullcontext)
+        while True:
+            slot = self.requests.get()
+            if slot is None:
+                return
+            batch = [slot]
+            while len(batch) < self.max_batch:
+                try:
+                    slot = self.requests.get_nowait()
+                except queue.Empty:
+                    break
+                if slot is None:
+                    self.requests.put(None)
+                    break
+                batch.append(slot)
+            
+            try:
+                with batch_context():
+                    for slot in batch:
+                        slot["reply"] = self._execute(slot["request"])
+            except Exception as e:
+                # e.g. a lock timeout: fail whatever didn't run rather than hang the clients
+                for slot in batch:
+                    slot.setdefault("reply", {"id": slot["request"].get("id"), "error": {
+                        "type": type(e).__name__, "message": str(e)}})
+            finally:
+                for slot in batch:
+                    slot["done"].set()
+    
+    def start(self):
+        """Bind the socket and start serving in background threads"""
+        if is_running(self.socket_path):
+            raise RuntimeError(f"A daemon is already listening on {self.socket_path}")
+        # A stale socket file from a crashed daemon
+        self.socket_path.unlink(missing_ok=True)
+        
+        self._server = _Server(str(self.socket_path), _Handler)
+        self._server.storage_daemon = self
+        os.chmod(self.socket_path, 0o600)
+        self._threads = [
+            threading.Thread(target=self._work, daemon=True),
+            threading.Thread(target=self._server.serve_forever, daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+    
+    def stop(self):
+        """Stop serving and remove the socket file"""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        self.requests.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        self.socket_path.unlink(missing_ok=True)
+    
+    def serve_forever(self):
+        """Serve until interrupted"""
+        self.start()
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Serve KnowledgeFlow storage over a Unix socket")
+    parser.add_argument("--backend", choices=["json", "sqlite"], default="json")
+    parser.add_argument("--data-dir", type=Path, default=None, help="JSON backend directory")
+    parser.add_argument("--socket", type=Path, default=None, help="Socket path")
+    args = parser.parse_args()
+    
+    if args.backend == "sqlite":
+        backend, methods = SQLiteBackend(), SQLITE_METHODS
+    else:
+        from core.json_storage import JSONStorage
+        backend, methods = JSONStorage(data_dir=args.data_dir), JSON_METHODS
+    
+    socket_path = args.socket or default_socket_path(args.data_dir, args.backend)
+    daemon = StorageDaemon(backend, socket_path, methods, backend_name=args.backend)
+    print(f"✓ Serving {args.backend} storage on {socket_path} (Ctrl+C to stop)")
+    daemon.serve_forever()
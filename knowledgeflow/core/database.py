@@ -3,21 +3,172 @@ Database module for KnowledgeFlow
 Handles all database operations and schema management
 """
 
+import os
 import sqlite3
+import threading
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Iterator, Optional, Sequence, Tuple
 from datetime import datetime
 import json
 
 # Database path
 DB_PATH = Path(__file__).parent.parent / "knowledgeflow.db"
 
+# Pragmas applied to every new connection
+CONNECTION_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "foreign_keys": "ON",
+    "cache_size": -20000,       # negative = KiB, so ~20 MB of page cache
+    "mmap_size": 268435456,     # 256 MB
+}
+
+
+class PooledConnection(sqlite3.Connection):
+    """
+    A sqlite3 connection that is reused by its thread
+    
+    close() hands the connection back to the pool instead of closing
+    it. If the caller left a transaction open it is rolled back, which
+    is what closing a fresh connection used to do.
+    """
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.file_id = None
+    
+    def close(self):
+        if self.checkouts > 0:
+            self.checkouts -= 1
+        if self.checkouts == 0 and self.in_transaction:
+            self.rollback()
+    
+    def dispose(self):
+        """Really close the underlying connection"""
+        super().close()
+
+
+class ConnectionManager:
+    """Hands out one reused connection per thread and database file"""
+    
+    def __init__(self, pragmas: Optional[Dict] = None):
+        self.pragmas = dict(CONNECTION_PRAGMAS if pragmas is None else pragmas)
+        self._local = threading.local()
+    
+    def _pool(self) -> Dict[str, PooledConnection]:
+        pool = getattr(self._local, "pool", None)
+        if pool is None:
+            pool = self._local.pool = {}
+        return pool
+    
+    def _file_id(self, path: str):
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (st.st_dev, st.st_ino)
+    
+    def get(self, path) -> PooledConnection:
+        """Return this thread's connection to path, opening it if needed"""
+        path = str(path)
+        pool = self._pool()
+        conn = pool.get(path)
+        
+        # Reconnect if the database file was deleted or replaced underneath us
+        if conn is not None and conn.checkouts == 0 and conn.file_id != self._file_id(path):
+            conn.dispose()
+            conn = None
+        
+        if conn is None:
+            conn = sqlite3.connect(path, factory=PooledConnection)
+            conn.row_factory = sqlite3.Row  # Return rows as dictionaries
+            for name, value in self.pragmas.items():
+                conn.execute(f"PRAGMA {name} = {value}")
+            conn.file_id = self._file_id(path)
+            pool[path] = conn
+        
+        conn.checkouts += 1
+        return conn
+    
+    def close_all(self):
+        """Close every connection opened by the current thread"""
+        pool = self._pool()
+        for conn in pool.values():
+            conn.dispose()
+        pool.clear()
+
+
+_manager = ConnectionManager()
+
 
 def get_connection():
-    """Get database connection"""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row  # Return rows as dictionaries
-    return conn
+    """
+    Get database connection
+    
+    The connection is shared by the calling thread; call close() when
+    done to hand it back (open transactions are rolled back).
+    """
+    return _manager.get(DB_PATH)
+
+
+@contextmanager
+def connection():
+    """
+    Context manager around get_connection()
+    
+    Commits when the block succeeds, rolls back if it raises.
+    """
+    conn = get_connection()
+    try:
+        yield conn
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def iter_keyset(table: str, where: str = "", params: Sequence = (), after_id: Optional[int] = None,
+                limit: Optional[int] = None, batch_size: int = 200) -> Iterator[sqlite3.Row]:
+    """
+    Stream a table's rows in id order, one LIMIT query per batch
+    
+    The connection is only held while a batch is read, so callers may
+    iterate slowly or stop early without pinning it.
+    
+    Args:
+        table: Table to read
+        where: Extra SQL condition on the rows (may use params)
+        params: Parameters for where
+        after_id: Start after this id (need not exist any more)
+        limit: Maximum number of rows
+        batch_size: Rows per query
+    """
+    sql = f"SELECT * FROM {table} WHERE id > ?"
+    if where:
+        sql += f" AND ({where})"
+    sql += " ORDER BY id LIMIT ?"
+    
+    last_id = after_id if after_id is not None else -1
+    remaining = limit
+    while remaining is None or remaining > 0:
+        page_size = batch_size if remaining is None else min(batch_size, remaining)
+        with connection() as conn:
+            rows = conn.execute(sql, (last_id, *params, page_size)).fetchall()
+        yield from rows
+        if len(rows) < page_size:
+            return
+        last_id = rows[-1]["id"]
+        if remaining is not None:
+            remaining -= len(rows)
+
+
+def close_connections():
+    """Close the current thread's pooled connections"""
+    _manager.close_all()
 
 
 def init_database():
@@ -87,16 +238,146 @@ def init_database():
     conn.commit()
     conn.close()
     
+    # Bring the schema (columns, indexes, search tables) up to date
+    migrate_existing_data()
+    
     return True
 
 
-# Migration functions
-def migrate_existing_data():
-    """Migrate data from old schema if needed"""
+# Full-text search tables: (fts table, content table, indexed columns)
+FTS_TABLES = [
+    ("notes_fts", "notes", ("title", "content", "tags")),
+    ("tasks_fts", "tasks", ("title", "description", "tags")),
+]
+
+
+def init_search_tables(cursor):
+    """
+    Create FTS5 external-content tables over notes and tasks
+    
+    The FTS tables store only the index; triggers keep them in sync with
+    the notes/tasks tables. A table created over existing rows is
+    populated right away.
+    """
+    for fts, table, columns in FTS_TABLES:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (fts,))
+        exists = cursor.fetchone() is not None
+        
+        cols = ", ".join(columns)
+        new_cols = ", ".join(f"new.{c}" for c in columns)
+        old_cols = ", ".join(f"old.{c}" for c in columns)
+        
+        cursor.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {fts}
+            USING fts5({cols}, content='{table}', content_rowid='id')
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_fts_insert AFTER INSERT ON {table} BEGIN
+                INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_cols});
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_fts_delete AFTER DELETE ON {table} BEGIN
+                INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_cols});
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_fts_update AFTER UPDATE OF {cols} ON {table} BEGIN
+                INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_cols});
+                INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_cols});
+            END
+        """)
+        
+        if not exists:
+            cursor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def init_category_closure(cursor):
+    """
+    Create the closure table of the category hierarchy
+    
+    category_closure has one row per (ancestor, descendant) pair,
+    including each category paired with itself at depth 0, so a whole
+    subtree is one indexed lookup. Triggers keep it in step with
+    inserts, deletes and parent changes on categories. A table created
+    over existing categories is populated right away.
+    """
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'category_closure'")
+    exists = cursor.fetchone() is not None
+    
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS category_closure (
+            ancestor_id INTEGER NOT NULL REFERENCES categories(id) ON DELETE CASCADE,
+            descendant_id INTEGER NOT NULL REFERENCES categories(id) ON DELETE CASCADE,
+            depth INTEGER NOT NULL,
+            PRIMARY KEY (ancestor_id, descendant_id)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_category_closure_descendant "
+                   "ON category_closure(descendant_id, depth)")
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS categories_closure_insert AFTER INSERT ON categories BEGIN
+            INSERT INTO category_closure (ancestor_id, descendant_id, depth)
+            SELECT ancestor_id, new.id, depth + 1 FROM category_closure
+            WHERE descendant_id = new.parent_id
+            UNION ALL
+            SELECT new.id, new.id, 0;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS categories_closure_delete AFTER DELETE ON categories BEGIN
+            DELETE FROM category_closure WHERE descendant_id = old.id OR ancestor_id = old.id;
+        END
+    """)
+    # Moving a category: detach its subtree from the old ancestors, attach it under the new ones
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS categories_closure_move AFTER UPDATE OF parent_id ON categories
+        WHEN new.parent_id IS NOT old.parent_id BEGIN
+            DELETE FROM category_closure
+            WHERE descendant_id IN (SELECT descendant_id FROM category_closure WHERE ancestor_id = new.id)
+              AND ancestor_id IN (SELECT ancestor_id FROM category_closure
+                                  WHERE descendant_id = new.id AND ancestor_id != new.id);
+            INSERT INTO category_closure (ancestor_id, descendant_id, depth)
+            SELECT up.ancestor_id, down.descendant_id, up.depth + down.depth + 1
+            FROM category_closure up, category_closure down
+            WHERE up.descendant_id = new.parent_id AND down.ancestor_id = new.id;
+        END
+    """)
+    
+    if not exists:
+        cursor.execute("""
+            INSERT OR IGNORE INTO category_closure (ancestor_id, descendant_id, depth)
+            WITH RECURSIVE walk(ancestor_id, descendant_id, depth) AS (
+                SELECT id, id, 0 FROM categories
+                UNION ALL
+                SELECT w.ancestor_id, c.id, w.depth + 1
+                FROM walk w JOIN categories c ON c.parent_id = w.descendant_id
+            )
+            SELECT ancestor_id, descendant_id, depth FROM walk
+        """)
+
+
+def rebuild_search_index():
+    """Rebuild the full-text indexes from the notes and tasks tables"""
     conn = get_connection()
     cursor = conn.cursor()
     
-    # Check if we need to add new columns to existing tables
+    init_search_tables(cursor)
+    for fts, _, _ in FTS_TABLES:
+        cursor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+    
+    conn.commit()
+    conn.close()
+
+
+# Migration functions
+#
+# Each migration moves the schema from version N-1 to N, where the
+# version is stored in PRAGMA user_version. Migrations must be safe to
+# run on databases that already have some of their changes applied.
+
+def _migrate_legacy_columns(cursor):
+    """v1: add columns missing from databases created by older versions"""
     cursor.execute("PRAGMA table_info(notes)")
     notes_columns = [col[1] for col in cursor.fetchall()]
     
@@ -114,13 +395,94 @@ def migrate_existing_data():
         cursor.execute("ALTER TABLE tasks ADD COLUMN linked_note_id INTEGER REFERENCES notes(id)")
     if 'completed_at' not in tasks_columns:
         cursor.execute("ALTER TABLE tasks ADD COLUMN completed_at TEXT")
+
+
+def _migrate_indexes(cursor):
+    """v2: secondary indexes for category, backlink, title and task ordering queries"""
+    # get_notes_by_category: WHERE category_id = ? ORDER BY created_at DESC
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_notes_category ON notes(category_id, created_at)")
+    # auto_create_links: WHERE title = ?
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_notes_title ON notes(title)")
+    # get_tasks_by_category: WHERE category_id = ? ORDER BY priority, due_date
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tasks_category ON tasks(category_id, priority, due_date)")
+    # Task lists ordered/filtered by priority, status and due date
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tasks_priority_due ON tasks(priority, due_date)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tasks_status_due ON tasks(status, due_date)")
+    # Foreign key lookups when a note is deleted
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tasks_linked_note ON tasks(linked_note_id)")
+    # get_backlinks: WHERE target_note_id = ? (source side is covered by the UNIQUE index)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_note_links_target ON note_links(target_note_id)")
+    # Category tree walks
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_categories_parent ON categories(parent_id)")
+
+
+def _migrate_search_tables(cursor):
+    """v3: FTS5 search tables over notes and tasks"""
+    init_search_tables(cursor)
+
+
+def _migrate_category_closure(cursor):
+    """v4: closure table for category subtree queries"""
+    init_category_closure(cursor)
+
+
+MIGRATIONS = [
+    _migrate_legacy_columns,
+    _migrate_indexes,
+    _migrate_search_tables,
+    _migrate_category_closure,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def get_schema_version() -> int:
+    """Return the schema version recorded in the database"""
+    with connection() as conn:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate_existing_data() -> int:
+    """
+    Apply any migrations the database hasn't seen yet
     
-    conn.commit()
-    conn.close()
+    Each migration runs in its own transaction together with the
+    user_version bump, so a failed migration leaves the database at
+    the previous version.
+    
+    Returns:
+        Number of migrations applied
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    applied = 0
+    
+    try:
+        version = cursor.execute("PRAGMA user_version").fetchone()[0]
+        for target, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+            cursor.execute("BEGIN")
+            try:
+                migration(cursor)
+                cursor.execute(f"PRAGMA user_version = {target}")
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            applied += 1
+    finally:
+        conn.close()
+    
+    return applied
 
 
 if __name__ == "__main__":
+    import sys
+    
     print("Initializing database...")
     init_database()
     migrate_existing_data()
     print("✓ Database initialized and migrated")
+    
+    if "--rebuild-search" in sys.argv[1:]:
+        rebuild_search_index()
+        print("✓ Search index rebuilt")
@@ -0,0 +1,179 @@
+"""
+File Locking
+Advisory inter-process locks and atomic file replacement
+
+Locks use fcntl.flock on a sidecar ".lock" file, so every process that
+goes through these helpers sees a consistent view of the data files.
+On platforms without fcntl the locks only serialize threads within
+one process.
+"""
+
+import itertools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+# Distinguishes temp files written by one process
+_temp_counter = itertools.count()
+
+
+class LockTimeout(TimeoutError):
+    """Raised when a lock could not be acquired in time"""
+
+
+class FileLock:
+    """
+    Shared/exclusive advisory lock on a file
+    
+    Re-entrant: nested acquisitions by the same thread only count, and
+    asking for a shared lock while holding the exclusive one is
+    satisfied by it. Upgrading a shared lock to exclusive is an error,
+    since flock() would drop the lock while converting it.
+    
+    The lock file can also hold a few bytes of state (see read/write),
+    which is only consistent while the lock is held.
+    """
+    
+    def __init__(self, path: Path, timeout: Optional[float] = None,
+                 poll_interval: float = 0.005):
+        """
+        Args:
+            path: Lock file, created if missing
+            timeout: Seconds to wait before raising LockTimeout (None waits forever)
+            poll_interval: Seconds between attempts while waiting with a timeout
+        """
+        self.path = Path(path)
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._thread_lock = threading.RLock()
+        self._fd: Optional[int] = None
+        self._depth = 0
+        self._exclusive = False
+    
+    @property
+    def held(self) -> bool:
+        return self._depth > 0
+    
+    def _flock(self, shared: bool):
+        if fcntl is None:
+            return
+        mode = fcntl.LOCK_SH if shared else fcntl.LOCK_EX
+        if self.timeout is None:
+            fcntl.flock(self._fd, mode)
+            return
+        
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                fcntl.flock(self._fd, mode | fcntl.LOCK_NB)
+                return
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    raise LockTimeout(f"Timed out waiting for {self.path}") from None
+                time.sleep(self.poll_interval)
+    
+    def acquire(self, shared: bool = False):
+        """Take the lock in shared (readers) or exclusive (writer) mode"""
+        self._thread_lock.acquire()
+        try:
+            if self._depth:
+                if not shared and not self._exclusive:
+                    raise RuntimeError(f"Cannot upgrade a shared lock on {self.path}")
+                self._depth += 1
+                return
+            
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                self._flock(shared)
+            except BaseException:
+                os.close(self._fd)
+                self._fd = None
+                raise
+            self._depth = 1
+            self._exclusive = not shared
+        except BaseException:
+            self._thread_lock.release()
+            raise
+    
+    def release(self):
+        """Release one level of the lock"""
+        self._depth -= 1
+        if self._depth == 0:
+            # Closing the descriptor drops the flock
+            os.close(self._fd)
+            self._fd = None
+            self._exclusive = False
+        self._thread_lock.release()
+    
+    @contextmanager
+    def __call__(self, shared: bool = False):
+        self.acquire(shared)
+        try:
+            yield self
+        finally:
+            self.release()
+    
+    def read(self) -> bytes:
+        """Contents of the lock file (lock must be held)"""
+        return os.pread(self._fd, 4096, 0)
+    
+    def write(self, data: bytes):
+        """Replace the contents of the lock file (exclusive lock must be held)"""
+        if not self._exclusive:
+            raise RuntimeError(f"Writing {self.path} needs the exclusive lock")
+        os.pwrite(self._fd, data, 0)
+        os.ftruncate(self._fd, len(data))
+
+
+def create_temp_file(path: Path, mode: int = 0o644):
+    """
+    Create a new, uniquely named temp file next to path
+    
+    pid + counter is unique among live writers; O_EXCL skips leftovers
+    of a crashed one (tempfile does the same but is slow to import).
+    
+    Returns:
+        Tuple of (temp file path, file descriptor open for writing)
+    """
+    path = Path(path)
+    while True:
+        temp_name = path.parent / f".{path.name}.{os.getpid()}.{next(_temp_counter)}.tmp"
+        try:
+            return temp_name, os.open(temp_name, os.O_WRONLY | os.O_CREAT | os.O_EXCL, mode)
+        except FileExistsError:
+            continue
+
+
+def atomic_write_json(path: Path, data, **dump_kwargs):
+    """
+    Write JSON to a uniquely named temp file, then rename it over path
+    
+    Concurrent writers each get their own temp file, so they can never
+    clobber each other's half-written output.
+    """
+    path = Path(path)
+    try:
+        mode = os.stat(path).st_mode & 0o777
+    except FileNotFoundError:
+        mode = 0o644
+    temp_name, fd = create_temp_file(path, mode)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, **dump_kwargs)
+        os.replace(temp_name, path)
+    except BaseException:
+        try:
+            os.unlink(temp_name)
+        except FileNotFoundError:
+            pass
+        raise
@@ -1,34 +1,407 @@
 """
 JSON Storage Layer
 Simple, portable storage for notes and tasks using JSON files
+
+Each collection is a snapshot file (notes.json, tasks.json, links.json)
+plus an append-only journal next to it (notes.journal.jsonl, ...).
+Mutations are appended to the journal; readers replay it over the
+snapshot, and compaction folds it back into the snapshot.
+
+Several processes can share a data directory: every read-modify-write
+holds an exclusive flock on the collection's .lock file, and reloads
+hold a shared one. The lock file also stores a version counter that
+each journal entry is stamped with, which get_versioned() and
+compare_and_update() use for optimistic updates.
+
+Notes and tasks can instead use a sharded snapshot: a directory
+(notes/, tasks/) of shard files bucketed by ID prefix plus a small
+manifest.json. Compaction then only rewrites the shards whose records
+changed. Run `python -m core.json_storage --shard` (or --unshard) to
+convert existing data.
 """
 
 import json
+import os
+import zlib
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional, Iterable, Iterator, Tuple
 from datetime import datetime
 import uuid
+from bisect import bisect_left, bisect_right, insort
+from contextlib import ExitStack, contextmanager
+from itertools import islice
+
+from core.file_lock import FileLock, atomic_write_json
+from core.search_index import InvertedIndex, tokenize_query
+
+
+class VersionConflict(Exception):
+    """A record changed since the version a compare-and-swap update expected"""
+
+
+def _file_signature(filepath: Path) -> Optional[Tuple[int, int, int]]:
+    """Return (mtime_ns, size, inode) for a file, or None if it is missing"""
+    try:
+        st = os.stat(filepath)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+# Fields (and their defaults) accepted when records are created in bulk
+NOTE_DEFAULTS = {"title": "", "content": "", "tags": []}
+TASK_DEFAULTS = {"title": "", "description": "", "status": "pending", "priority": "medium",
+                 "due_date": None, "tags": [], "linked_note_id": None}
+
+_NO_IDS = frozenset()
+
+
+def _shard_key(record_id: str, prefix_len: int) -> str:
+    """Shard bucket for an ID: its first prefix_len characters"""
+    key = record_id[:prefix_len].lower()
+    if len(key) == prefix_len and key.isalnum():
+        return key
+    # Not a usable file name; bucket by hash instead
+    return f"{zlib.crc32(record_id.encode()) % (16 ** prefix_len):0{prefix_len}x}"
+
+
+def _entry_id(entry: Dict) -> str:
+    """ID of the record a journal entry touches"""
+    return entry["record"]["id"] if "record" in entry else entry["id"]
+
+
+def _clone(record: Dict) -> Dict:
+    """Copy a record so callers can't mutate the resident cache"""
+    return {k: (list(v) if isinstance(v, list) else v) for k, v in record.items()}
+
+
+def _project(record: Dict, fields: Iterable[str]) -> Dict:
+    """Copy only the given fields of a record (plus its id)"""
+    projected = {"id": record["id"]}
+    for field in fields:
+        value = record.get(field)
+        projected[field] = list(value) if isinstance(value, list) else value
+    return projected
+
+
+def _new_task_table():
+    # Imported here so commands that never touch tasks don't load NumPy
+    from core.task_table import TaskTable
+    return TaskTable()
+
+
+class _Collection:
+    """
+    Resident view of one JSON file
+    
+    Keeps an id -> record dict (in file order) plus secondary indexes
+    of field value -> ids for the fields named in index_fields, an
+    inverted full-text index over text_fields, a sorted id list for
+    short-ID prefix lookups, and a map from the values of unique_fields
+    to the id of the record holding them.
+    
+    If a table factory is given, filters go to a columnar table of the
+    records (see core.task_table) instead, kept in step with every
+    change; table_filters maps filter names to its mask() arguments.
+    """
+    
+    def __init__(self, filepath: Path, index_fields: Iterable[str] = (),
+                 text_fields: Iterable[str] = (), unique_fields: Iterable[str] = (),
+                 table: Optional[Callable] = None, table_filters: Optional[Dict[str, str]] = None):
+        self.filepath = filepath
+        self.shard_dir = filepath.with_suffix("")
+        self.manifest_file = self.shard_dir / "manifest.json"
+        self.sharded = False
+        self.prefix_len = 2
+        self.shards: Dict[str, int] = {}
+        self.dirty_shards: set = set()
+        self.journal_file = filepath.with_name(filepath.stem + ".journal.jsonl")
+        self.index_file = filepath.with_name(filepath.stem + ".index.json")
+        self.lock = FileLock(filepath.with_suffix(".lock"))
+        self.text_fields = tuple(text_fields)
+        self.text_index = InvertedIndex(self.text_fields) if self.text_fields else None
+        self.journal_entries = 0
+        self.journal_torn = False
+        self.index_fields = tuple(index_fields)
+        self.signature = None
+        # Version of each record's last journaled change; the rest are at base_version
+        self.versions: Dict[str, int] = {}
+        self.base_version = 0
+        self.records: Dict[str, Dict] = {}
+        self.seq: Dict[str, int] = {}
+        self.sorted_ids: Optional[List[str]] = []
+        self.indexes: Dict[str, Dict[str, set]] = {f: {} for f in self.index_fields}
+        self.unique_fields = tuple(unique_fields)
+        self.unique: Dict[Tuple, str] = {}
+        self.table_factory = table
+        self.table_filters = dict(table_filters or {})
+        self.table = None  # created on load, so NumPy is only imported when needed
+        self._next_seq = 0
+    
+    @property
+    def snapshot_file(self) -> Path:
+        """File whose signature identifies the current snapshot"""
+        return self.manifest_file if self.sharded else self.filepath
+    
+    def touch(self, record_id: str):
+        """Mark the shard holding record_id as needing a rewrite"""
+        if self.sharded:
+            self.dirty_shards.add(_shard_key(record_id, self.prefix_len))
+    
+    def load(self, records: Iterable[Dict], signature,
+             text_index: Optional[InvertedIndex] = None):
+        """
+        Replace the resident state with freshly read records
+        
+        If a text_index already built for these records is passed in,
+        it is used as-is instead of re-tokenizing every record.
+        """
+        index_text = text_index is None
+        if self.text_fields:
+            self.text_index = text_index or InvertedIndex(self.text_fields)
+        self.records = {}
+        self.seq = {}
+        self.indexes = {f: {} for f in self.index_fields}
+        self.unique = {}
+        self.table = None  # filled in one go below
+        self._next_seq = 0
+        self.journal_entries = 0
+        self.journal_torn = False
+        self.dirty_shards = set()
+        self.versions = {}
+        # Sort once at the end rather than insorting every record
+        self.sorted_ids = None
+        for record in records:
+            self.add(record, index_text=False)
+        self.sorted_ids = sorted(self.records)
+        if index_text and self.text_index is not None:
+            self.text_index.extend(self.records.values())
+        if self.table_factory:
+            self.table = self.table_factory()
+            self.table.extend(self.records.values())
+        self.signature = signature
+    
+    def apply(self, entry: Dict):
+        """Apply one journal entry (create/update/delete) to the resident state"""
+        op = entry.get("op")
+        if op in ("create", "update"):
+            record = entry["record"]
+            existing = self.records.get(record["id"])
+            if existing is None:
+                self.add(record)
+            else:
+                # Replace in place so the record keeps its file position
+                self._unindex(existing)
+                self.records[record["id"]] = record
+                self._index(record)
+                if self.text_index is not None:
+                    self.text_index.add(record)
+        elif op == "delete":
+            self.remove(entry["id"])
+    
+    def _index_keys(self, record: Dict, field: str) -> List[str]:
+        value = record.get(field)
+        if isinstance(value, list):
+            return value
+        return [] if value is None else [value]
+    
+    def add(self, record: Dict, index_text: bool = True):
+        """Insert a record at the end of the collection"""
+        record_id = record["id"]
+        self.records[record_id] = record
+        self.seq[record_id] = self._next_seq
+        self._next_seq += 1
+        if self.sorted_ids is not None:
+            insort(self.sorted_ids, record_id)
+        self._index(record)
+        if index_text and self.text_index is not None:
+            self.text_index.add(record)
+    
+    def remove(self, record_id: str) -> Optional[Dict]:
+        """Remove a record, returning it if it existed"""
+        record = self.records.pop(record_id, None)
+        if record is not None:
+            self.seq.pop(record_id, None)
+            if self.table is not None:
+                self.table.remove(record_id)
+            i = bisect_left(self.sorted_ids, record_id)
+            if i < len(self.sorted_ids) and self.sorted_ids[i] == record_id:
+                del self.sorted_ids[i]
+            self._unindex(record)
+            if self.text_index is not None:
+                self.text_index.remove(record_id)
+        return record
+    
+    def reindex(self, record: Dict, old_values: Dict):
+        """Move a record between index buckets after it was changed in place"""
+        self._unindex({**record, **old_values})
+        self._index(record)
+        if self.text_index is not None:
+            self.text_index.add(record)
+    
+    def _index(self, record: Dict):
+        for field in self.index_fields:
+            buckets = self.indexes[field]
+            for key in self._index_keys(record, field):
+                buckets.setdefault(key, set()).add(record["id"])
+        if self.unique_fields:
+            # The first record with a given key keeps it
+            self.unique.setdefault(self.unique_key(record), record["id"])
+        if self.table is not None:
+            self.table.put(record)
+    
+    def _unindex(self, record: Dict):
+        for field in self.index_fields:
+            buckets = self.indexes[field]
+            for key in self._index_keys(record, field):
+                bucket = buckets.get(key)
+                if bucket is not None:
+                    bucket.discard(record["id"])
+                    if not bucket:
+                        del buckets[key]
+        if self.unique_fields:
+            key = self.unique_key(record)
+            if self.unique.get(key) == record["id"]:
+                del self.unique[key]
+    
+    def unique_key(self, record: Dict) -> Tuple:
+        """The record's values for unique_fields"""
+        return tuple(record.get(field) for field in self.unique_fields)
+    
+    def lookup(self, field: str, value) -> set:
+        """Ids of the records whose indexed field equals value (do not modify)"""
+        return self.indexes[field].get(value, _NO_IDS)
+    
+    def _matching_ids(self, criteria: Dict) -> List[str]:
+        """Ids of the records matching every (non-empty) criterion, in file order"""
+        if self.table is not None:
+            return self.table.ids_where(**{self.table_filters[f]: v for f, v in criteria.items()})
+        buckets = [self.indexes[field].get(value, set()) for field, value in criteria.items()]
+        buckets.sort(key=len)
+        ids = buckets[0].intersection(*buckets[1:])
+        return sorted(ids, key=self.seq.__getitem__)
+    
+    def filter(self, **criteria) -> List[Dict]:
+        """Return records matching all indexed field values, in file order"""
+        criteria = {k: v for k, v in criteria.items() if v}
+        if not criteria:
+            return list(self.records.values())
+        return [self.records[i] for i in self._matching_ids(criteria)]
+    
+    def iter_records(self, after_id: Optional[str] = None, **criteria) -> Iterator[Dict]:
+        """
+        Iterate records matching criteria in id order, starting after after_id
+        
+        after_id is a keyset cursor: iteration resumes at the first id
+        greater than it, whether or not that record still exists. The
+        collection can be changed while iterating; records created behind
+        the cursor are skipped, records deleted ahead of it are not seen.
+        """
+        criteria = {field: value for field, value in criteria.items() if value}
+        if not criteria:
+            return self._walk_ids(after_id)
+        
+        # Only the matching ids are copied and sorted
+        ids = sorted(self._matching_ids(criteria))
+        start = 0 if after_id is None else bisect_right(ids, after_id)
+        return (self.records[i] for i in islice(ids, start, None) if i in self.records)
+    
+    def _walk_ids(self, after_id: Optional[str]) -> Iterator[Dict]:
+        """Yield records in id order, re-seeking in sorted_ids before each one"""
+        last = after_id
+        while True:
+            ids = self.sorted_ids
+            i = 0 if last is None else bisect_right(ids, last)
+            if i >= len(ids):
+                return
+            last = ids[i]
+            record = self.records.get(last)
+            if record is not None:
+                yield record
+    
+    def resolve_prefix(self, prefix: str) -> List[str]:
+        """Return every id starting with prefix, in sorted order"""
+        ids = []
+        i = bisect_left(self.sorted_ids, prefix)
+        while i < len(self.sorted_ids) and self.sorted_ids[i].startswith(prefix):
+            ids.append(self.sorted_ids[i])
+            i += 1
+        return ids
+    
+    def search(self, query: str, operator: str = "and") -> List[Dict]:
+        """Full-text search over text_fields, best BM25 match first"""
+        if not tokenize_query(query):
+            # Nothing indexable (e.g. only punctuation): fall back to a substring scan
+            query_lower = query.lower()
+            return [r for r in self.records.values() if self._contains(r, query_lower)]
+        return [self.records[doc_id] for doc_id, _ in self.text_index.search(query, operator)]
+    
+    def _contains(self, record: Dict, query_lower: str) -> bool:
+        for field in self.text_fields:
+            value = record.get(field) or ""
+            values = value if isinstance(value, list) else [value]
+            if any(query_lower in str(v).lower() for v in values):
+                return True
+        return False
+    
+    def to_list(self) -> List[Dict]:
+        return list(self.records.values())
 
 
 class JSONStorage:
     """Manages JSON-based storage for notes and tasks"""
     
-    def __init__(self, data_dir: Optional[Path] = None):
-        """Initialize JSON storage"""
+    def __init__(self, data_dir: Optional[Path] = None, resident: bool = True,
+                 journal_threshold: int = 1000, sharded: bool = False,
+                 shard_prefix_len: int = 2):
+        """
+        Initialize JSON storage
+        
+        Args:
+            data_dir: Directory holding notes.json, tasks.json and links.json
+            resident: Keep each file parsed in memory and only re-read it
+                when its mtime/size changes on disk. With resident=False
+                every call re-reads the file, as before.
+            journal_threshold: Number of journal entries after which a
+                collection is compacted back into its snapshot file
+            sharded: Create new notes/tasks collections with the sharded
+                layout. Existing data keeps the layout found on disk; use
+                migrate_layout() to convert it.
+            shard_prefix_len: ID prefix length that picks a record's shard
+                (2 hex characters gives up to 256 shards)
+        """
         if data_dir is None:
             data_dir = Path(__file__).parent.parent / "data"
         
         self.data_dir = Path(data_dir)
         self.data_dir.mkdir(parents=True, exist_ok=True)
+        self.resident = resident
+        self.journal_threshold = journal_threshold
         
         self.notes_file = self.data_dir / "notes.json"
         self.tasks_file = self.data_dir / "tasks.json"
         self.links_file = self.data_dir / "links.json"
         
+        self._collections = {
+            self.notes_file: _Collection(self.notes_file, ("tags",),
+                                         ("title", "content", "tags")),
+            # Filtered through the columnar task table rather than set indexes
+            self.tasks_file: _Collection(self.tasks_file, (), ("title", "description", "tags"),
+                                         table=_new_task_table,
+                                         table_filters={"status": "status", "priority": "priority",
+                                                        "tags": "tag"}),
+            # Adjacency in both directions, plus (from_id, to_id) for dedup
+            self.links_file: _Collection(self.links_file, ("from_id", "to_id"),
+                                         unique_fields=("from_id", "to_id")),
+        }
+        
         # Initialize files if they don't exist
-        self._ensure_file(self.notes_file, [])
-        self._ensure_file(self.tasks_file, [])
-        self._ensure_file(self.links_file, [])
+        for filepath in (self.notes_file, self.tasks_file):
+            coll = self._collections[filepath]
+            with coll.lock():
+                self._init_layout(coll, sharded, shard_prefix_len)
+        with self._collections[self.links_file].lock():
+            self._ensure_file(self.links_file, [])
     
     def _ensure_file(self, filepath: Path, default_content):
         """Ensure file exists with default content"""
@@ -45,17 +418,301 @@ class JSONStorage:
     
     def _write_json(self, filepath: Path, data):
         """Write JSON file atomically"""
-        temp_file = filepath.with_suffix('.tmp')
-        with open(temp_file, 'w') as f:
-            json.dump(data, f, indent=2)
-        temp_file.replace(filepath)
+        atomic_write_json(filepath, data, indent=2)
+    
+    # ===== LOCKING AND VERSIONS =====
+    
+    @contextmanager
+    def _locked(self, filepath: Path) -> Iterator[_Collection]:
+        """Hold a collection's exclusive lock and yield it, freshly loaded"""
+        coll = self._collections[filepath]
+        with coll.lock():
+            yield self._collection(filepath)
+    
+    @contextmanager
+    def batch(self):
+        """
+        Hold every collection's exclusive lock for a run of operations
+        
+        The writes inside only re-enter locks already held, instead of
+        taking and dropping them once per call. Keep batches short:
+        other processes wait meanwhile.
+        """
+        with ExitStack() as stack:
+            # Same order as the nested locking elsewhere (notes/tasks before links)
+            for coll in self._collections.values():
+                stack.enter_context(coll.lock())
+            yield self
+    
+    def _read_version(self, coll: _Collection) -> Tuple[int, int]:
+        """(current version, version at the last compaction) from the lock file"""
+        try:
+            state = json.loads(coll.lock.read() or b"{}")
+        except json.JSONDecodeError:
+            state = {}
+        return state.get("version", 0), state.get("base", 0)
+    
+    def _write_version(self, coll: _Collection, version: int):
+        coll.lock.write(json.dumps({"version": version, "base": coll.base_version}).encode())
+    
+    def _next_version(self, coll: _Collection) -> int:
+        """Bump and return the collection's version (exclusive lock must be held)"""
+        version = self._read_version(coll)[0] + 1
+        self._write_version(coll, version)
+        return version
+    
+    def _kind_file(self, kind: str) -> Path:
+        files = {"note": self.notes_file, "task": self.tasks_file}
+        if kind not in files:
+            raise ValueError(f"Unknown kind: {kind!r}")
+        return files[kind]
+    
+    # ===== SHARDED LAYOUT =====
+    
+    def _init_layout(self, coll: _Collection, sharded: bool, prefix_len: int):
+        """Detect a collection's layout on disk, creating it if missing"""
+        manifest = self._read_manifest(coll)
+        if manifest is not None:
+            coll.sharded = True
+            coll.prefix_len = manifest["prefix_len"]
+        elif sharded and not coll.filepath.exists():
+            coll.sharded = True
+            coll.prefix_len = prefix_len
+            self._write_manifest(coll)
+        else:
+            self._ensure_file(coll.filepath, [])
+    
+    def _read_manifest(self, coll: _Collection) -> Optional[Dict]:
+        try:
+            with open(coll.manifest_file, 'r') as f:
+                return json.load(f)
+        except (json.JSONDecodeError, FileNotFoundError):
+            return None
+    
+    def _write_manifest(self, coll: _Collection):
+        manifest = self._read_manifest(coll) or {}
+        coll.shard_dir.mkdir(exist_ok=True)
+        self._write_json(coll.manifest_file, {
+            "layout": "sharded",
+            "prefix_len": coll.prefix_len,
+            "generation": manifest.get("generation", 0) + 1,
+            "shards": dict(sorted(coll.shards.items())),
+        })
+    
+    def _iter_shards(self, coll: _Collection) -> Iterator[Dict]:
+        """Yield a sharded snapshot's records one shard file at a time"""
+        for key in sorted(coll.shards):
+            try:
+                with open(coll.shard_dir / f"{key}.json", 'r') as f:
+                    yield from json.load(f)
+            except (json.JSONDecodeError, FileNotFoundError):
+                continue
+    
+    def _read_snapshot(self, coll: _Collection) -> List[Dict]:
+        """Read every record of a collection's snapshot"""
+        if not coll.sharded:
+            return self._read_json(coll.filepath)
+        coll.shards = (self._read_manifest(coll) or {}).get("shards", {})
+        # Shards are bucketed by ID, so restore creation order across them
+        return sorted(self._iter_shards(coll), key=lambda r: r.get("created_at") or "")
+    
+    def _write_shards(self, coll: _Collection, keys: Iterable[str]):
+        """Rewrite the given shards from resident records, then the manifest"""
+        buckets = {key: [] for key in keys}
+        for record in coll.to_list():
+            bucket = buckets.get(_shard_key(record["id"], coll.prefix_len))
+            if bucket is not None:
+                bucket.append(record)
+        
+        coll.shard_dir.mkdir(exist_ok=True)
+        for key, records in buckets.items():
+            shard_file = coll.shard_dir / f"{key}.json"
+            if records:
+                self._write_json(shard_file, records)
+                coll.shards[key] = len(records)
+            else:
+                shard_file.unlink(missing_ok=True)
+                coll.shards.pop(key, None)
+        # The manifest is replaced last, so readers see the new shards together
+        self._write_manifest(coll)
+        coll.dirty_shards = set()
+    
+    def migrate_layout(self, sharded: bool, prefix_len: int = 2):
+        """
+        Convert notes and tasks between single-file and sharded snapshots
+        
+        Pending journal entries are folded in, and the old files are
+        removed once the new snapshot is in place.
+        
+        Args:
+            sharded: True for one shard file per ID prefix, False for notes.json/tasks.json
+            prefix_len: ID prefix length that picks a record's shard
+        """
+        for filepath in (self.notes_file, self.tasks_file):
+            with self._locked(filepath) as coll:
+                self._migrate_collection(coll, sharded, prefix_len)
+    
+    def _migrate_collection(self, coll: _Collection, sharded: bool, prefix_len: int):
+        """Rewrite one collection in the requested layout"""
+        if coll.sharded == sharded and (not sharded or coll.prefix_len == prefix_len):
+            return
+        
+        was_sharded = coll.sharded
+        old_shards = [coll.shard_dir / f"{key}.json" for key in coll.shards]
+        
+        if sharded:
+            coll.sharded = True
+            coll.prefix_len = prefix_len
+            coll.shards = {}
+            self._write_shards(coll, {_shard_key(i, prefix_len) for i in coll.records})
+        else:
+            coll.sharded = False
+            self._write_json(coll.filepath, coll.to_list())
+        
+        coll.journal_file.unlink(missing_ok=True)
+        coll.journal_entries = 0
+        self._mark_compacted(coll)
+        if not was_sharded:
+            coll.filepath.unlink(missing_ok=True)
+        else:
+            if not sharded:
+                coll.manifest_file.unlink(missing_ok=True)
+            live = {coll.shard_dir / f"{key}.json" for key in coll.shards} if sharded else set()
+            for shard_file in old_shards:
+                if shard_file not in live:
+                    shard_file.unlink(missing_ok=True)
+            if not sharded and not any(coll.shard_dir.iterdir()):
+                coll.shard_dir.rmdir()
+        
+        if coll.text_index is not None:
+            coll.text_index.save(coll.index_file, _file_signature(coll.snapshot_file))
+        coll.signature = self._signature(coll)
+    
+    def _signature(self, coll: _Collection):
+        """Signature of a collection's snapshot and journal files"""
+        return (_file_signature(coll.snapshot_file), _file_signature(coll.journal_file))
+    
+    def _collection(self, filepath: Path) -> _Collection:
+        """Return the resident collection for a file, reloading it if stale"""
+        coll = self._collections[filepath]
+        signature = self._signature(coll)
+        if self.resident and coll.signature is not None and coll.signature == signature:
+            return coll
+        
+        # A shared lock keeps writers from compacting halfway through the reload
+        with coll.lock(shared=True):
+            signature = self._signature(coll)
+            text_index = None
+            if coll.text_fields:
+                text_index = InvertedIndex.load(coll.index_file, signature[0], coll.text_fields)
+            coll.load(self._read_snapshot(coll), signature, text_index)
+            if coll.text_fields and text_index is None:
+                # Persist the rebuilt index so the next cold start can skip tokenizing
+                coll.text_index.save(coll.index_file, signature[0])
+            coll.base_version = self._read_version(coll)[1]
+            self._replay_journal(coll)
+        return coll
+    
+    def _replay_journal(self, coll: _Collection):
+        """Replay journal entries over the freshly loaded snapshot"""
+        try:
+            with open(coll.journal_file, 'r') as f:
+                for line in f:
+                    coll.journal_torn = not line.endswith("\n")
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Torn write at the tail of the journal
+                        continue
+                    coll.apply(entry)
+                    coll.touch(_entry_id(entry))
+                    if "v" in entry:
+                        coll.versions[_entry_id(entry)] = entry["v"]
+                    coll.journal_entries += 1
+        except FileNotFoundError:
+            pass
+    
+    def _append(self, coll: _Collection, entry: Dict):
+        """
+        Append a mutation to the collection's journal, compacting past the threshold
+        
+        The caller must hold the collection's exclusive lock.
+        """
+        version = self._next_version(coll)
+        entry["v"] = version
+        line = json.dumps(entry, separators=(',', ':')) + "\n"
+        if coll.journal_torn:
+            # Start on a fresh line after a torn tail
+            line = "\n" + line
+            coll.journal_torn = False
+        with open(coll.journal_file, 'a') as f:
+            f.write(line)
+        coll.journal_entries += 1
+        coll.touch(_entry_id(entry))
+        coll.versions[_entry_id(entry)] = version
+        
+        if coll.journal_entries >= self.journal_threshold:
+            self._compact(coll)
+        else:
+            coll.signature = self._signature(coll)
+    
+    def _compact(self, coll: _Collection):
+        """Fold the journal into the snapshot file (or touched shards) and truncate the journal"""
+        if coll.sharded:
+            self._write_shards(coll, coll.dirty_shards)
+        else:
+            self._write_json(coll.filepath, coll.to_list())
+        if coll.text_index is not None:
+            coll.text_index.save(coll.index_file, _file_signature(coll.snapshot_file))
+        coll.journal_file.unlink(missing_ok=True)
+        coll.journal_entries = 0
+        self._mark_compacted(coll)
+        coll.signature = self._signature(coll)
+    
+    def _mark_compacted(self, coll: _Collection):
+        """Record that every change up to the current version is in the snapshot"""
+        version = self._read_version(coll)[0]
+        coll.base_version = version
+        coll.versions = {}
+        self._write_version(coll, version)
+    
+    def compact(self):
+        """Fold every collection's journal back into its snapshot file"""
+        for filepath in self._collections:
+            with self._locked(filepath) as coll:
+                if coll.journal_entries or coll.journal_file.exists():
+                    self._compact(coll)
+    
+    def _iter(self, coll: _Collection, after_id: Optional[str], limit: Optional[int],
+              fields: Optional[Iterable[str]], criteria: Dict) -> Iterator[Dict]:
+        """Copy records lazily out of a collection, honouring limit and projection"""
+        records = coll.iter_records(after_id, **criteria)
+        if limit is not None:
+            records = islice(records, limit)
+        if fields is None:
+            return (_clone(record) for record in records)
+        fields = tuple(fields)
+        return (_project(record, fields) for record in records)
+    
+    def _update_record(self, coll: _Collection, record_id: str, kwargs: Dict) -> Optional[Dict]:
+        """Apply field updates to a resident record and write through"""
+        record = coll.records.get(record_id)
+        if record is None:
+            return None
+        
+        old_values = {f: record.get(f) for f in coll.index_fields}
+        for key, value in kwargs.items():
+            if key in record and value is not None:
+                record[key] = value
+        record["updated_at"] = datetime.now().isoformat()
+        coll.reindex(record, old_values)
+        self._append(coll, {"op": "update", "record": record})
+        return _clone(record)
     
     # ===== NOTES =====
     
     def create_note(self, title: str, content: str = "", tags: List[str] = None) -> Dict:
         """Create a new note"""
-        notes = self._read_json(self.notes_file)
-        
         note = {
             "id": str(uuid.uuid4()),
             "title": title,
@@ -65,64 +722,68 @@ class JSONStorage:
             "updated_at": datetime.now().isoformat()
         }
         
-        notes.append(note)
-        self._write_json(self.notes_file, notes)
-        return note
+        with self._locked(self.notes_file) as notes:
+            notes.add(note)
+            self._append(notes, {"op": "create", "record": note})
+        return _clone(note)
     
     def get_note(self, note_id: str) -> Optional[Dict]:
         """Get a note by ID"""
-        notes = self._read_json(self.notes_file)
-        for note in notes:
-            if note["id"] == note_id:
-                return note
-        return None
+        note = self._collection(self.notes_file).records.get(note_id)
+        return _clone(note) if note is not None else None
     
     def list_notes(self, tag: Optional[str] = None) -> List[Dict]:
         """List all notes, optionally filtered by tag"""
-        notes = self._read_json(self.notes_file)
-        if tag:
-            notes = [n for n in notes if tag in n.get("tags", [])]
-        return notes
+        notes = self._collection(self.notes_file).filter(tags=tag)
+        return [_clone(n) for n in notes]
+    
+    def iter_notes(self, tag: Optional[str] = None, after_id: Optional[str] = None,
+                   limit: Optional[int] = None,
+                   fields: Optional[Iterable[str]] = None) -> Iterator[Dict]:
+        """
+        Stream notes in ID order, one page at a time
+        
+        Args:
+            tag: Only notes with this tag
+            after_id: Resume after this note (the last ID of the previous page)
+            limit: Maximum number of notes to yield
+            fields: Only copy these fields (the id is always included),
+                e.g. ("title", "tags") to skip note bodies
+        
+        Returns:
+            Iterator of note dictionaries
+        """
+        return self._iter(self._collection(self.notes_file), after_id, limit, fields,
+                          {"tags": tag})
     
     def update_note(self, note_id: str, **kwargs) -> Optional[Dict]:
         """Update a note"""
-        notes = self._read_json(self.notes_file)
-        
-        for note in notes:
-            if note["id"] == note_id:
-                for key, value in kwargs.items():
-                    if key in note and value is not None:
-                        note[key] = value
-                note["updated_at"] = datetime.now().isoformat()
-                self._write_json(self.notes_file, notes)
-                return note
-        return None
+        with self._locked(self.notes_file) as notes:
+            return self._update_record(notes, note_id, kwargs)
     
     def delete_note(self, note_id: str) -> bool:
         """Delete a note"""
-        notes = self._read_json(self.notes_file)
-        original_len = len(notes)
-        notes = [n for n in notes if n["id"] != note_id]
-        
-        if len(notes) < original_len:
-            self._write_json(self.notes_file, notes)
+        with self._locked(self.notes_file) as notes:
+            if notes.remove(note_id) is None:
+                return False
+            self._append(notes, {"op": "delete", "id": note_id})
             # Also remove any links involving this note
             self._remove_links_for_item(note_id)
             return True
-        return False
     
-    def search_notes(self, query: str) -> List[Dict]:
-        """Search notes by query"""
-        notes = self._read_json(self.notes_file)
-        query_lower = query.lower()
+    def search_notes(self, query: str, operator: str = "and") -> List[Dict]:
+        """
+        Search notes by title, content and tags
         
-        results = []
-        for note in notes:
-            if (query_lower in note["title"].lower() or 
-                query_lower in note.get("content", "").lower() or
-                any(query_lower in tag.lower() for tag in note.get("tags", []))):
-                results.append(note)
-        return results
+        Args:
+            query: Search terms; "term*" matches by prefix
+            operator: 'and' to require every term, 'or' to accept any
+        
+        Returns:
+            Matching notes, best BM25 match first
+        """
+        notes = self._collection(self.notes_file)
+        return [_clone(n) for n in notes.search(query, operator)]
     
     # ===== TASKS =====
     
@@ -131,8 +792,6 @@ class JSONStorage:
                    due_date: Optional[str] = None, tags: List[str] = None,
                    linked_note_id: Optional[str] = None) -> Dict:
         """Create a new task"""
-        tasks = self._read_json(self.tasks_file)
-        
         task = {
             "id": str(uuid.uuid4()),
             "title": title,
@@ -146,108 +805,344 @@ class JSONStorage:
             "updated_at": datetime.now().isoformat()
         }
         
-        tasks.append(task)
-        self._write_json(self.tasks_file, tasks)
-        return task
+        with self._locked(self.tasks_file) as tasks:
+            tasks.add(task)
+            self._append(tasks, {"op": "create", "record": task})
+        return _clone(task)
     
     def get_task(self, task_id: str) -> Optional[Dict]:
         """Get a task by ID"""
-        tasks = self._read_json(self.tasks_file)
-        for task in tasks:
-            if task["id"] == task_id:
-                return task
-        return None
+        task = self._collection(self.tasks_file).records.get(task_id)
+        return _clone(task) if task is not None else None
     
     def list_tasks(self, status: Optional[str] = None, 
                   priority: Optional[str] = None) -> List[Dict]:
         """List all tasks with optional filters"""
-        tasks = self._read_json(self.tasks_file)
+        tasks = self._collection(self.tasks_file).filter(status=status, priority=priority)
+        return [_clone(t) for t in tasks]
+    
+    def iter_tasks(self, status: Optional[str] = None, priority: Optional[str] = None,
+                   tag: Optional[str] = None, after_id: Optional[str] = None,
+                   limit: Optional[int] = None,
+                   fields: Optional[Iterable[str]] = None) -> Iterator[Dict]:
+        """
+        Stream tasks in ID order, one page at a time
         
-        if status:
-            tasks = [t for t in tasks if t["status"] == status]
-        if priority:
-            tasks = [t for t in tasks if t["priority"] == priority]
+        Args:
+            status: Only tasks with this status
+            priority: Only tasks with this priority
+            tag: Only tasks with this tag
+            after_id: Resume after this task (the last ID of the previous page)
+            limit: Maximum number of tasks to yield
+            fields: Only copy these fields (the id is always included)
         
-        return tasks
+        Returns:
+            Iterator of task dictionaries
+        """
+        return self._iter(self._collection(self.tasks_file), after_id, limit, fields,
+                          {"status": status, "priority": priority, "tags": tag})
     
     def update_task(self, task_id: str, **kwargs) -> Optional[Dict]:
         """Update a task"""
-        tasks = self._read_json(self.tasks_file)
-        
-        for task in tasks:
-            if task["id"] == task_id:
-                for key, value in kwargs.items():
-                    if key in task and value is not None:
-                        task[key] = value
-                task["updated_at"] = datetime.now().isoformat()
-                self._write_json(self.tasks_file, tasks)
-                return task
-        return None
+        with self._locked(self.tasks_file) as tasks:
+            return self._update_record(tasks, task_id, kwargs)
     
     def delete_task(self, task_id: str) -> bool:
         """Delete a task"""
-        tasks = self._read_json(self.tasks_file)
-        original_len = len(tasks)
-        tasks = [t for t in tasks if t["id"] != task_id]
-        
-        if len(tasks) < original_len:
-            self._write_json(self.tasks_file, tasks)
+        with self._locked(self.tasks_file) as tasks:
+            if tasks.remove(task_id) is None:
+                return False
+            self._append(tasks, {"op": "delete", "id": task_id})
             self._remove_links_for_item(task_id)
             return True
-        return False
     
-    def search_tasks(self, query: str) -> List[Dict]:
-        """Search tasks by query"""
-        tasks = self._read_json(self.tasks_file)
-        query_lower = query.lower()
+    def search_tasks(self, query: str, operator: str = "and") -> List[Dict]:
+        """
+        Search tasks by title, description and tags
+        
+        Args:
+            query: Search terms; "term*" matches by prefix
+            operator: 'and' to require every term, 'or' to accept any
+        
+        Returns:
+            Matching tasks, best BM25 match first
+        """
+        tasks = self._collection(self.tasks_file)
+        return [_clone(t) for t in tasks.search(query, operator)]
+    
+    def task_table(self):
+        """
+        Columnar table of every task for fast filtering and counting
+        
+        This is the resident table list_tasks/iter_tasks filter with: it
+        is updated in place by every write (and rebuilt only when another
+        process changes the tasks files). Treat it as read-only; see
+        core.task_table.
         
-        results = []
-        for task in tasks:
-            if (query_lower in task["title"].lower() or 
-                query_lower in task.get("description", "").lower() or
-                any(query_lower in tag.lower() for tag in task.get("tags", []))):
-                results.append(task)
-        return results
+        Returns:
+            TaskTable whose rows read like task dictionaries
+        """
+        return self._collection(self.tasks_file).table
     
     # ===== LINKS =====
     
     def create_link(self, from_id: str, to_id: str, link_type: str = "relates_to") -> Dict:
-        """Create a link between notes or tasks"""
-        links = self._read_json(self.links_file)
+        """Create a link between notes or tasks (or return the existing one)"""
+        with self._locked(self.links_file) as links:
+            existing = links.unique.get((from_id, to_id))
+            if existing is not None:
+                return _clone(links.records[existing])
+            
+            link = {
+                "id": str(uuid.uuid4()),
+                "from_id": from_id,
+                "to_id": to_id,
+                "link_type": link_type,
+                "created_at": datetime.now().isoformat()
+            }
+            
+            links.add(link)
+            self._append(links, {"op": "create", "record": link})
+            return _clone(link)
+    
+    def get_links(self, item_id: str, direction: str = "both") -> List[Dict]:
+        """
+        Get the links of an item, in the order they were created
         
-        # Check if link already exists
-        for link in links:
-            if link["from_id"] == from_id and link["to_id"] == to_id:
-                return link
+        Args:
+            item_id: Note or task ID
+            direction: 'out' for links from the item, 'in' for links to
+                it, or 'both'
         
-        link = {
-            "id": str(uuid.uuid4()),
-            "from_id": from_id,
-            "to_id": to_id,
-            "link_type": link_type,
-            "created_at": datetime.now().isoformat()
-        }
-        
-        links.append(link)
-        self._write_json(self.links_file, links)
-        return link
-    
-    def get_links(self, item_id: str) -> List[Dict]:
-        """Get all links for an item (both from and to)"""
-        links = self._read_json(self.links_file)
-        return [l for l in links if l["from_id"] == item_id or l["to_id"] == item_id]
+        Returns:
+            Link dictionaries
+        """
+        fields = {"out": ("from_id",), "in": ("to_id",), "both": ("from_id", "to_id")}.get(direction)
+        if fields is None:
+            raise ValueError(f"Unknown direction: {direction!r}")
+        links = self._collection(self.links_file)
+        ids = set().union(*(links.lookup(field, item_id) for field in fields))
+        return [_clone(links.records[i]) for i in sorted(ids, key=links.seq.__getitem__)]
     
     def _remove_links_for_item(self, item_id: str):
         """Remove all links involving an item"""
-        links = self._read_json(self.links_file)
-        links = [l for l in links if l["from_id"] != item_id and l["to_id"] != item_id]
-        self._write_json(self.links_file, links)
+        links = self._collection(self.links_file)
+        if not (links.lookup("from_id", item_id) or links.lookup("to_id", item_id)):
+            # Nothing to do, so don't take the links lock at all
+            return
+        
+        with self._locked(self.links_file) as links:
+            ids = links.lookup("from_id", item_id) | links.lookup("to_id", item_id)
+            for link_id in sorted(ids, key=links.seq.__getitem__):
+                links.remove(link_id)
+                self._append(links, {"op": "delete", "id": link_id})
+    
+    # ===== BULK OPERATIONS =====
+    
+    def bulk_create(self, kind: str, records: Iterable[Dict]) -> int:
+        """
+        Create many notes or tasks with one snapshot write
+        
+        Unlike create_note/create_task, nothing is journaled per record;
+        the collection is compacted once at the end. String IDs and
+        timestamps in the input are kept (unless the ID is taken), so
+        an export can be re-imported as-is.
+        
+        Args:
+            kind: 'note' or 'task'
+            records: Dictionaries with note or task fields; unknown keys are ignored
+        
+        Returns:
+            Number of records created
+        """
+        defaults = {"note": NOTE_DEFAULTS, "task": TASK_DEFAULTS}.get(kind)
+        if defaults is None:
+            raise ValueError(f"Unknown kind: {kind!r}")
+        with self._locked(self._kind_file(kind)) as coll:
+            count = 0
+            for fields in records:
+                now = datetime.now().isoformat()
+                record_id = fields.get("id")
+                if not isinstance(record_id, str) or not record_id or record_id in coll.records:
+                    record_id = str(uuid.uuid4())
+                
+                record = {"id": record_id}
+                for key, default in defaults.items():
+                    value = fields.get(key, default)
+                    record[key] = list(value) if isinstance(value, list) else value
+                record["created_at"] = fields.get("created_at") or now
+                record["updated_at"] = fields.get("updated_at") or now
+                
+                coll.add(record)
+                coll.touch(record_id)
+                count += 1
+            
+            if count:
+                self._next_version(coll)
+                self._compact(coll)
+            return count
+    
+    def bulk_link(self, pairs: Iterable[Tuple[str, str]], link_type: str = "relates_to") -> int:
+        """
+        Create many links with one snapshot write, skipping existing ones
+        
+        Args:
+            pairs: (from_id, to_id) tuples
+            link_type: Type recorded on every new link
+        
+        Returns:
+            Number of links created
+        """
+        with self._locked(self.links_file) as links:
+            count = 0
+            now = datetime.now().isoformat()
+            for from_id, to_id in pairs:
+                if (from_id, to_id) in links.unique:
+                    continue
+                links.add({
+                    "id": str(uuid.uuid4()),
+                    "from_id": from_id,
+                    "to_id": to_id,
+                    "link_type": link_type,
+                    "created_at": now
+                })
+                count += 1
+            
+            if count:
+                self._next_version(links)
+                self._compact(links)
+            return count
     
     # ===== UNIFIED SEARCH =====
     
-    def search_all(self, query: str) -> Dict[str, List[Dict]]:
+    def search_all(self, query: str, operator: str = "and") -> Dict[str, List[Dict]]:
         """Search across notes and tasks"""
         return {
-            "notes": self.search_notes(query),
-            "tasks": self.search_tasks(query)
+            "notes": self.search_notes(query, operator),
+            "tasks": self.search_tasks(query, operator)
         }
+    
+    # ===== OPTIMISTIC CONCURRENCY =====
+    
+    def version(self, kind: str) -> int:
+        """
+        Current version of the notes or tasks collection
+        
+        Every write bumps it, so an unchanged version means nothing changed.
+        """
+        coll = self._collections[self._kind_file(kind)]
+        with coll.lock(shared=True):
+            return self._read_version(coll)[0]
+    
+    def get_versioned(self, kind: str, record_id: str) -> Tuple[Optional[Dict], int]:
+        """
+        Read a note or task together with its version
+        
+        Args:
+            kind: 'note' or 'task'
+            record_id: ID of the record
+        
+        Returns:
+            Tuple of (record or None, version to pass to compare_and_update)
+        """
+        coll = self._collection(self._kind_file(kind))
+        record = coll.records.get(record_id)
+        version = coll.versions.get(record_id, coll.base_version)
+        return (_clone(record) if record is not None else None), version
+    
+    def compare_and_update(self, kind: str, record_id: str, expected_version: int,
+                           **kwargs) -> Optional[Dict]:
+        """
+        Update a note or task only if it is still at expected_version
+        
+        Args:
+            kind: 'note' or 'task'
+            record_id: ID of the record
+            expected_version: Version returned by get_versioned
+            **kwargs: Fields to change, as for update_note/update_task
+        
+        Returns:
+            The updated record, or None if it doesn't exist
+        
+        Raises:
+            VersionConflict: The record was changed (or the journal was
+                compacted) since expected_version was read
+        """
+        with self._locked(self._kind_file(kind)) as coll:
+            if record_id not in coll.records:
+                return None
+            current = coll.versions.get(record_id, coll.base_version)
+            if current != expected_version:
+                raise VersionConflict(
+                    f"{kind} {record_id} is at version {current}, expected {expected_version}")
+            return self._update_record(coll, record_id, kwargs)
+    
+    def modify(self, kind: str, record_id: str, change: Callable[[Dict], Dict],
+               retries: int = 10) -> Optional[Dict]:
+        """
+        Read-modify-write a note or task without holding the lock while computing
+        
+        change(record) returns the fields to update. If another writer
+        gets in first, the record is re-read and change is called again.
+        
+        Args:
+            kind: 'note' or 'task'
+            record_id: ID of the record
+            change: Function from the current record to a dict of new field values
+            retries: Attempts before giving up
+        
+        Returns:
+            The updated record, or None if it doesn't exist
+        
+        Raises:
+            VersionConflict: Every attempt lost the race
+        """
+        for attempt in range(retries):
+            record, version = self.get_versioned(kind, record_id)
+            if record is None:
+                return None
+            try:
+                return self.compare_and_update(kind, record_id, version, **change(record))
+            except VersionConflict:
+                if attempt == retries - 1:
+                    raise
+    
+    # ===== ID LOOKUP =====
+    
+    def resolve_prefix(self, kind: str, prefix: str) -> List[str]:
+        """
+        Find the full IDs that start with a short ID
+        
+        Generated IDs are lowercase hex, so an uppercase prefix also
+        matches them; imported IDs keep their case and match as typed.
+        
+        Args:
+            kind: 'note' or 'task'
+            prefix: Leading characters of the ID
+        
+        Returns:
+            Every matching ID in sorted order; more than one means the
+            prefix is ambiguous
+        """
+        coll = self._collection(self._kind_file(kind))
+        prefix = prefix.strip()
+        matches = coll.resolve_prefix(prefix)
+        if prefix.lower() != prefix:
+            matches = sorted(set(matches).union(coll.resolve_prefix(prefix.lower())))
+        return matches
+
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Convert JSON storage between layouts")
+    parser.add_argument("--data-dir", type=Path, default=None)
+    layout = parser.add_mutually_exclusive_group(required=True)
+    layout.add_argument("--shard", action="store_true", help="Split notes/tasks into shard files")
+    layout.add_argument("--unshard", action="store_true", help="Merge shards back into single files")
+    parser.add_argument("--prefix-len", type=int, default=2, help="ID prefix length per shard")
+    args = parser.parse_args()
+    
+    storage = JSONStorage(data_dir=args.data_dir)
+    storage.migrate_layout(sharded=args.shard, prefix_len=args.prefix_len)
+    print(f"✓ Converted {storage.data_dir} to the {'sharded' if args.shard else 'single-file'} layout")
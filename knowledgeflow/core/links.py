@@ -3,11 +3,40 @@ Note linking operations
 """
 
 import sqlite3
-from typing import List, Optional, Tuple
-from core.database import get_connection
+import weakref
+from typing import Dict, List, Optional, Tuple
+from core.database import connection
 from core.models import NoteLink
 from datetime import datetime
 
+# In-memory link graphs (core.link_graph) kept in step with the changes below
+_graphs = weakref.WeakSet()
+
+
+def register_graph(graph) -> None:
+    """
+    Apply every later link change made through this module to a graph
+    
+    Args:
+        graph: LinkGraph (held weakly, so it can still be garbage collected)
+    """
+    _graphs.add(graph)
+
+
+def _notify(method: str, *args) -> None:
+    for graph in list(_graphs):
+        getattr(graph, method)(*args)
+
+
+def note_created(note_id: int) -> None:
+    """Add a new note to the tracked link graphs"""
+    _notify("add_note", note_id)
+
+
+def note_deleted(note_id: int) -> None:
+    """Drop a deleted note, and every link to or from it, from the tracked link graphs"""
+    _notify("remove_note", note_id)
+
 
 def create_link(source_id: int, target_id: int, link_type: str = 'reference') -> Optional[int]:
     """
@@ -16,36 +45,33 @@ def create_link(source_id: int, target_id: int, link_type: str = 'reference') ->
     Args:
         source_id: Source note ID
         target_id: Target note ID
-        link_type: Type of link ('reference', 'related', 'parent', 'child')
+        link_type: Type of link ('reference', 'related', 'parent', 'child', 'wikilink')
     
     Returns:
         Link ID if successful, None otherwise
     """
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    try:
+    with connection() as conn:
+        cursor = conn.cursor()
+        
         # Validate notes exist
         cursor.execute("SELECT id FROM notes WHERE id IN (?, ?)", (source_id, target_id))
         if len(cursor.fetchall()) != 2:
             return None
         
-        # Create link
-        now = datetime.now().isoformat()
-        cursor.execute("""
-            INSERT INTO note_links (source_note_id, target_note_id, link_type, created_at)
-            VALUES (?, ?, ?, ?)
-        """, (source_id, target_id, link_type, now))
-        
+        try:
+            # Create link
+            now = datetime.now().isoformat()
+            cursor.execute("""
+                INSERT INTO note_links (source_note_id, target_note_id, link_type, created_at)
+                VALUES (?, ?, ?, ?)
+            """, (source_id, target_id, link_type, now))
+        except sqlite3.IntegrityError:
+            # Link already exists
+            return None
         link_id = cursor.lastrowid
-        conn.commit()
-        return link_id
     
-    except sqlite3.IntegrityError:
-        # Link already exists
-        return None
-    finally:
-        conn.close()
+    _notify("add_link", source_id, target_id, link_type)
+    return link_id
 
 
 def delete_link(source_id: int, target_id: int) -> bool:
@@ -59,18 +85,15 @@ def delete_link(source_id: int, target_id: int) -> bool:
     Returns:
         True if deleted, False otherwise
     """
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        DELETE FROM note_links
-        WHERE source_note_id = ? AND target_note_id = ?
-    """, (source_id, target_id))
-    
-    deleted = cursor.rowcount > 0
-    conn.commit()
-    conn.close()
+    with connection() as conn:
+        cursor = conn.execute("""
+            DELETE FROM note_links
+            WHERE source_note_id = ? AND target_note_id = ?
+        """, (source_id, target_id))
+        deleted = cursor.rowcount > 0
     
+    if deleted:
+        _notify("remove_link", source_id, target_id)
     return deleted
 
 
@@ -84,19 +107,14 @@ def get_forward_links(note_id: int) -> List[Tuple[int, str, str]]:
     Returns:
         List of (note_id, title, link_type) tuples
     """
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        SELECT n.id, n.title, nl.link_type
-        FROM note_links nl
-        JOIN notes n ON nl.target_note_id = n.id
-        WHERE nl.source_note_id = ?
-        ORDER BY nl.created_at DESC
-    """, (note_id,))
-    
-    links = cursor.fetchall()
-    conn.close()
+    with connection() as conn:
+        links = conn.execute("""
+            SELECT n.id, n.title, nl.link_type
+            FROM note_links nl
+            JOIN notes n ON nl.target_note_id = n.id
+            WHERE nl.source_note_id = ?
+            ORDER BY nl.created_at DESC
+        """, (note_id,)).fetchall()
     
     return [(row['id'], row['title'], row['link_type']) for row in links]
 
@@ -111,19 +129,14 @@ def get_backlinks(note_id: int) -> List[Tuple[int, str, str]]:
     Returns:
         List of (note_id, title, link_type) tuples
     """
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        SELECT n.id, n.title, nl.link_type
-        FROM note_links nl
-        JOIN notes n ON nl.source_note_id = n.id
-        WHERE nl.target_note_id = ?
-        ORDER BY nl.created_at DESC
-    """, (note_id,))
-    
-    links = cursor.fetchall()
-    conn.close()
+    with connection() as conn:
+        links = conn.execute("""
+            SELECT n.id, n.title, nl.link_type
+            FROM note_links nl
+            JOIN notes n ON nl.source_note_id = n.id
+            WHERE nl.target_note_id = ?
+            ORDER BY nl.created_at DESC
+        """, (note_id,)).fetchall()
     
     return [(row['id'], row['title'], row['link_type']) for row in links]
 
@@ -157,34 +170,104 @@ def detect_links_in_content(content: str) -> List[str]:
     return matches
 
 
-def auto_create_links(note_id: int, content: str) -> int:
+# Link type used for links derived from [[Title]] syntax, so re-syncing
+# a note's content never touches links that were created by hand
+WIKILINK = 'wikilink'
+
+# Stay well under SQLite's bound-parameter limit
+_CHUNK_SIZE = 500
+
+
+def resolve_titles(titles: List[str]) -> Dict[str, int]:
     """
-    Automatically create links based on [[Title]] syntax in content
+    Resolve note titles to IDs in as few queries as possible
+    
+    Args:
+        titles: Note titles
+    
+    Returns:
+        Dictionary mapping each found title to its note ID (the oldest
+        note wins when several share a title)
+    """
+    titles = list(dict.fromkeys(titles))
+    resolved = {}
+    
+    with connection() as conn:
+        for i in range(0, len(titles), _CHUNK_SIZE):
+            chunk = titles[i:i + _CHUNK_SIZE]
+            placeholders = ", ".join("?" * len(chunk))
+            cursor = conn.execute(f"""
+                SELECT title, MIN(id) AS id
+                FROM notes
+                WHERE title IN ({placeholders})
+                GROUP BY title
+            """, chunk)
+            resolved.update((row['title'], row['id']) for row in cursor)
+    
+    return resolved
+
+
+def sync_links(note_id: int, content: str) -> Tuple[int, int]:
+    """
+    Re-sync a note's [[Title]] links with its content
+    
+    Resolves every referenced title in one pass, then adds missing
+    wikilinks and removes wikilinks whose title no longer appears, all
+    in a single transaction. Links created by hand are left alone.
     
     Args:
         note_id: Source note ID
         content: Note content
     
     Returns:
-        Number of links created
+        Tuple of (links_created, links_removed)
     """
-    titles = detect_links_in_content(content)
-    if not titles:
-        return 0
+    targets = set(resolve_titles(detect_links_in_content(content)).values())
+    targets.discard(note_id)
     
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    links_created = 0
-    for title in titles:
-        # Find note with this title
-        cursor.execute("SELECT id FROM notes WHERE title = ?", (title,))
-        result = cursor.fetchone()
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT target_note_id FROM note_links
+            WHERE source_note_id = ? AND link_type = ?
+        """, (note_id, WIKILINK))
+        existing = {row[0] for row in cursor.fetchall()}
         
-        if result:
-            target_id = result['id']
-            if create_link(note_id, target_id):
-                links_created += 1
+        stale = existing - targets
+        cursor.executemany("""
+            DELETE FROM note_links
+            WHERE source_note_id = ? AND target_note_id = ? AND link_type = ?
+        """, [(note_id, target_id, WIKILINK) for target_id in stale])
+        removed = cursor.rowcount if stale else 0
+        
+        now = datetime.now().isoformat()
+        new = targets - existing
+        cursor.executemany("""
+            INSERT OR IGNORE INTO note_links (source_note_id, target_note_id, link_type, created_at)
+            VALUES (?, ?, ?, ?)
+        """, [(note_id, target_id, WIKILINK, now) for target_id in sorted(new)])
+        created = cursor.rowcount if new else 0
+    
+    for target_id in stale:
+        _notify("remove_link", note_id, target_id)
+    for target_id in sorted(new):
+        # A link made by hand to the same note keeps its type
+        _notify("add_link", note_id, target_id, WIKILINK)
+    return created, removed
+
+
+def auto_create_links(note_id: int, content: str) -> int:
+    """
+    Automatically create links based on [[Title]] syntax in content
+    
+    Links whose [[Title]] has been removed from the content are dropped
+    (see sync_links).
     
-    conn.close()
-    return links_created
+    Args:
+        note_id: Source note ID
+        content: Note content
+    
+    Returns:
+        Number of links created
+    """
+    return sync_links(note_id, content)[0]
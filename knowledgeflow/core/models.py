@@ -1,11 +1,107 @@
 """
 Data models for KnowledgeFlow
+
+Rows are turned into models by hydrators compiled once per (model,
+column list) and cached, so each row costs one itemgetter call plus
+the model constructor. NoteRow/TaskRow are __slots__ variants for
+large listings; they keep tags as JSON text until first accessed.
 """
 
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
 from datetime import datetime
-from typing import List, Optional
+from operator import itemgetter
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
 import json
+import sys
+
+
+def _decode_tags(value) -> List[str]:
+    if not value:
+        return []
+    return json.loads(value) if isinstance(value, str) else list(value)
+
+
+def _or_empty(value) -> str:
+    return value or ""
+
+
+def _or_none(value):
+    return value or None
+
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+_HYDRATORS: Dict[Tuple, Callable] = {}
+
+
+def compile_hydrator(cls, columns: Sequence[str], by_name: bool = False) -> Callable:
+    """
+    Build (and cache) a function that turns one row into a cls instance
+    
+    Args:
+        cls: Model class (a dataclass below, NoteRow or TaskRow)
+        columns: Column names of the rows, in order
+        by_name: Read values by column name (for dicts) instead of position
+    
+    Returns:
+        Function taking a row and returning a model; columns the model
+        doesn't have are ignored and missing fields keep their defaults
+    """
+    columns = tuple(columns)
+    key = (cls, columns, by_name)
+    hydrate = _HYDRATORS.get(key)
+    if hydrate is not None:
+        return hydrate
+    
+    names = getattr(cls, "ROW_FIELDS", None) or tuple(f.name for f in fields(cls))
+    converters = getattr(cls, "ROW_CONVERTERS", {})
+    present = [name for name in names if name in columns]
+    keys = present if by_name else [columns.index(name) for name in present]
+    
+    if not keys:
+        getter = lambda row: ()
+    elif len(keys) == 1:
+        single = itemgetter(keys[0])
+        getter = lambda row: (single(row),)
+    else:
+        getter = itemgetter(*keys)
+    
+    convert = [(i, converters[name]) for i, name in enumerate(present) if name in converters]
+    if len(present) == len(names) and not convert:
+        # Every field is there in constructor order: pass them positionally
+        hydrate = lambda row: cls(*getter(row))
+    else:
+        def hydrate(row):
+            values = list(getter(row))
+            for i, converter in convert:
+                values[i] = converter(values[i])
+            return cls(**dict(zip(present, values)))
+    
+    _HYDRATORS[key] = hydrate
+    return hydrate
+
+
+def hydrate(cursor, cls, batch_size: int = 1000) -> Iterator:
+    """
+    Stream an executed cursor's rows as cls instances
+    
+    The column mapping is compiled once from cursor.description, and
+    rows are read by position, so plain tuples and sqlite3.Row both work.
+    """
+    build = compile_hydrator(cls, [col[0] for col in cursor.description])
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        for row in rows:
+            yield build(row)
+
+
+def _from_row(cls, row):
+    """from_db_row for sqlite3.Row and dicts alike"""
+    return compile_hydrator(cls, tuple(row.keys()), by_name=True)(row)
 
 
 @dataclass
@@ -19,6 +115,9 @@ class Note:
     created_at: str = field(default_factory=lambda: datetime.now().isoformat())
     updated_at: str = field(default_factory=lambda: datetime.now().isoformat())
     
+    # Applied to raw column values when hydrating from a row
+    ROW_CONVERTERS = {'tags': _decode_tags, 'content': _or_empty}
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -32,17 +131,8 @@ class Note:
     
     @classmethod
     def from_db_row(cls, row):
-        """Create Note from database row"""
-        tags = json.loads(row['tags']) if row['tags'] else []
-        return cls(
-            id=row['id'],
-            title=row['title'],
-            content=row['content'] or "",
-            tags=tags,
-            category_id=row.get('category_id'),
-            created_at=row['created_at'],
-            updated_at=row['updated_at']
-        )
+        """Create Note from a database row (sqlite3.Row or dict)"""
+        return _from_row(cls, row)
 
 
 @dataclass
@@ -60,6 +150,8 @@ class Task:
     created_at: str = field(default_factory=lambda: datetime.now().isoformat())
     completed_at: Optional[str] = None
     
+    ROW_CONVERTERS = {'tags': _decode_tags, 'description': _or_empty}
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -77,21 +169,89 @@ class Task:
     
     @classmethod
     def from_db_row(cls, row):
-        """Create Task from database row"""
-        tags = json.loads(row['tags']) if row.get('tags') else []
-        return cls(
-            id=row['id'],
-            title=row['title'],
-            description=row.get('description') or "",
-            status=row['status'],
-            priority=row['priority'],
-            due_date=row.get('due_date'),
-            tags=tags,
-            category_id=row.get('category_id'),
-            linked_note_id=row.get('linked_note_id'),
-            created_at=row['created_at'],
-            completed_at=row.get('completed_at')
-        )
+        """Create Task from a database row (sqlite3.Row or dict)"""
+        return _from_row(cls, row)
+
+
+class _SlimRow:
+    """
+    Base for the __slots__ row variants
+    
+    Values are stored as read from the database. Tags stay JSON text
+    until .tags is first read, so listings that never look at them
+    don't pay for decoding.
+    """
+    __slots__ = ('_tags',)
+    ROW_FIELDS: Tuple[str, ...] = ()
+    
+    @property
+    def tags(self) -> List[str]:
+        tags = self._tags
+        if not isinstance(tags, list):
+            tags = self._tags = _decode_tags(tags)
+        return tags
+    
+    @tags.setter
+    def tags(self, value):
+        self._tags = value
+    
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.ROW_FIELDS}
+    
+    def __eq__(self, other):
+        return type(self) is type(other) and self.to_dict() == other.to_dict()
+    
+    def __repr__(self):
+        values = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.ROW_FIELDS)
+        return f"{type(self).__name__}({values})"
+
+
+class NoteRow(_SlimRow):
+    """Memory-light Note for large listings (see _SlimRow)"""
+    __slots__ = ('id', 'title', 'content', 'category_id', 'created_at', 'updated_at')
+    ROW_FIELDS = ('id', 'title', 'content', 'tags', 'category_id', 'created_at', 'updated_at')
+    
+    def __init__(self, id=None, title="", content="", tags=None, category_id=None,
+                 created_at=None, updated_at=None):
+        self.id = id
+        self.title = title
+        self.content = content
+        self._tags = tags
+        self.category_id = category_id
+        self.created_at = created_at
+        self.updated_at = updated_at
+    
+    def to_model(self) -> Note:
+        """Convert to the full Note dataclass"""
+        return Note(**{**self.to_dict(), 'content': self.content or ""})
+
+
+class TaskRow(_SlimRow):
+    """Memory-light Task for large listings (see _SlimRow)"""
+    __slots__ = ('id', 'title', 'description', 'status', 'priority', 'due_date',
+                 'category_id', 'linked_note_id', 'created_at', 'completed_at')
+    ROW_FIELDS = ('id', 'title', 'description', 'status', 'priority', 'due_date', 'tags',
+                  'category_id', 'linked_note_id', 'created_at', 'completed_at')
+    
+    def __init__(self, id=None, title="", description="", status="pending", priority="medium",
+                 due_date=None, tags=None, category_id=None, linked_note_id=None,
+                 created_at=None, completed_at=None):
+        self.id = id
+        self.title = title
+        self.description = description
+        # A handful of distinct values repeated on every row: share one copy
+        self.status = _intern(status)
+        self.priority = _intern(priority)
+        self.due_date = due_date
+        self._tags = tags
+        self.category_id = category_id
+        self.linked_note_id = linked_note_id
+        self.created_at = created_at
+        self.completed_at = completed_at
+    
+    def to_model(self) -> Task:
+        """Convert to the full Task dataclass"""
+        return Task(**{**self.to_dict(), 'description': self.description or ""})
 
 
 @dataclass
@@ -105,13 +265,7 @@ class NoteLink:
     
     @classmethod
     def from_db_row(cls, row):
-        return cls(
-            id=row['id'],
-            source_note_id=row['source_note_id'],
-            target_note_id=row['target_note_id'],
-            link_type=row['link_type'],
-            created_at=row['created_at']
-        )
+        return _from_row(cls, row)
 
 
 @dataclass
@@ -123,12 +277,8 @@ class Category:
     type: str = "note"  # 'note', 'task', or 'both'
     created_at: str = field(default_factory=lambda: datetime.now().isoformat())
     
+    ROW_CONVERTERS = {'parent_id': _or_none}
+    
     @classmethod
     def from_db_row(cls, row):
-        return cls(
-            id=row['id'],
-            name=row['name'],
-            parent_id=row['parent_id'] if row['parent_id'] else None,
-            type=row['type'],
-            created_at=row['created_at']
-        )
+        return _from_row(cls, row)
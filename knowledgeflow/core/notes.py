@@ -0,0 +1,156 @@
+"""
+Note operations
+Create, read, update and delete notes in the core SQLite database
+"""
+
+import json
+from typing import Iterator, List, Optional
+from core import links
+from core.database import connection, iter_keyset
+from core.models import Note, compile_hydrator
+from datetime import datetime
+
+# Columns update_note may change
+NOTE_FIELDS = ("title", "content", "tags", "category_id")
+
+# Matches rows whose JSON tags contain a value (rows with invalid JSON never match)
+HAS_TAG = ("CASE WHEN json_valid(tags) THEN "
+           "EXISTS (SELECT 1 FROM json_each(tags) WHERE value = ?) ELSE 0 END")
+
+
+def _hydrate(rows) -> List[Note]:
+    if not rows:
+        return []
+    build = compile_hydrator(Note, rows[0].keys())
+    return [build(row) for row in rows]
+
+
+def create_note(title: str, content: str = "", tags: List[str] = None,
+                category_id: Optional[int] = None) -> Note:
+    """
+    Create a note
+    
+    Args:
+        title: Note title
+        content: Note body
+        tags: List of tags
+        category_id: Category ID (optional)
+    
+    Returns:
+        The created Note
+    """
+    now = datetime.now().isoformat()
+    with connection() as conn:
+        note_id = conn.execute("""
+            INSERT INTO notes (title, content, tags, category_id, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (title, content, json.dumps(tags or []), category_id, now, now)).lastrowid
+        links.note_created(note_id)
+    return Note(id=note_id, title=title, content=content, tags=list(tags or []),
+                category_id=category_id, created_at=now, updated_at=now)
+
+
+def get_note(note_id: int) -> Optional[Note]:
+    """
+    Get a note by ID
+    
+    Args:
+        note_id: Note ID
+    
+    Returns:
+        Note object or None if not found
+    """
+    with connection() as conn:
+        rows = conn.execute("SELECT * FROM notes WHERE id = ?", (note_id,)).fetchall()
+    notes = _hydrate(rows)
+    return notes[0] if notes else None
+
+
+def list_notes(tag: Optional[str] = None) -> List[Note]:
+    """
+    List notes, newest first
+    
+    Args:
+        tag: Only notes with this tag
+    
+    Returns:
+        List of Note objects
+    """
+    sql = "SELECT * FROM notes"
+    params = ()
+    if tag:
+        sql += f" WHERE {HAS_TAG}"
+        params = (tag,)
+    with connection() as conn:
+        rows = conn.execute(sql + " ORDER BY created_at DESC, id DESC", params).fetchall()
+    return _hydrate(rows)
+
+
+def iter_notes(tag: Optional[str] = None, after_id: Optional[int] = None,
+               limit: Optional[int] = None, batch_size: int = 200) -> Iterator[Note]:
+    """
+    Stream notes in ID order, one batch at a time
+    
+    Args:
+        tag: Only notes with this tag
+        after_id: Resume after this note (the last ID of the previous page)
+        limit: Maximum number of notes to yield
+        batch_size: Rows fetched from SQLite at a time
+    
+    Returns:
+        Iterator of Note objects
+    """
+    where, params = (HAS_TAG, (tag,)) if tag else ("", ())
+    build = None
+    for row in iter_keyset("notes", where, params, after_id, limit, batch_size):
+        if build is None:
+            build = compile_hydrator(Note, row.keys())
+        yield build(row)
+
+
+def update_note(note_id: int, **fields) -> Optional[Note]:
+    """
+    Update a note
+    
+    Args:
+        note_id: Note ID
+        **fields: New values for title, content, tags or category_id;
+            None values and other keys are ignored
+    
+    Returns:
+        The updated Note, or None if it doesn't exist
+    """
+    changes = {key: value for key, value in fields.items() if key in NOTE_FIELDS and value is not None}
+    if "tags" in changes:
+        changes["tags"] = json.dumps(changes["tags"])
+    changes["updated_at"] = datetime.now().isoformat()
+    
+    assignments = ", ".join(f"{key} = ?" for key in changes)
+    with connection() as conn:
+        cursor = conn.execute(f"UPDATE notes SET {assignments} WHERE id = ?",
+                              (*changes.values(), note_id))
+        if cursor.rowcount == 0:
+            return None
+        rows = conn.execute("SELECT * FROM notes WHERE id = ?", (note_id,)).fetchall()
+    return _hydrate(rows)[0]
+
+
+def delete_note(note_id: int) -> bool:
+    """
+    Delete a note (its links go with it, in the database and in any
+    tracked LinkGraph)
+    
+    Args:
+        note_id: Note ID
+    
+    Returns:
+        True if deleted, False if not found
+    """
+    with connection() as conn:
+        # Tasks may point at the note; unlink them rather than fail the foreign key
+        conn.execute("UPDATE tasks SET linked_note_id = NULL WHERE linked_note_id = ?", (note_id,))
+        deleted = conn.execute("DELETE FROM notes WHERE id = ?", (note_id,)).rowcount > 0
+        if deleted:
+            # note_links rows went with it (ON DELETE CASCADE)
+            links.note_deleted(note_id)
+        return deleted
@@ -0,0 +1,123 @@
+"""
+Full-text search over notes and tasks
+Uses the FTS5 tables maintained by core.database
+"""
+
+import re
+from typing import List, Dict, Tuple
+from core.database import connection
+
+QUERY_PATTERN = re.compile(r"\w+\*?")
+
+
+def to_fts_query(query: str, operator: str = "AND", prefix_last: bool = True) -> str:
+    """
+    Turn free text into a safe FTS5 MATCH expression
+    
+    Every word is quoted so FTS5 operators and punctuation in user input
+    can't cause syntax errors; a trailing * is kept as a prefix match.
+    The last word is matched as a prefix too, so a word still being typed
+    ("pyth") finds "python" the way substring search used to.
+    
+    Args:
+        query: User search text
+        operator: 'AND' or 'OR' between terms
+        prefix_last: Match the last word by prefix even without a *
+    
+    Returns:
+        FTS5 query string (empty if the query has no words)
+    """
+    words = QUERY_PATTERN.findall(query)
+    if prefix_last and words and not words[-1].endswith("*"):
+        words[-1] += "*"
+    terms = []
+    for term in words:
+        if term.endswith("*"):
+            terms.append(f'"{term[:-1]}"*')
+        else:
+            terms.append(f'"{term}"')
+    return f" {operator.upper()} ".join(terms)
+
+
+def search_notes(query: str, limit: int = 20, operator: str = "AND",
+                 highlight: Tuple[str, str] = ("[", "]")) -> List[Dict]:
+    """
+    Search notes by title, content and tags
+    
+    Args:
+        query: Search text; the last word (and any "word*") matches by prefix
+        limit: Maximum number of hits
+        operator: 'AND' to require every word, 'OR' to accept any
+        highlight: Markers placed around matched words in the snippet
+    
+    Returns:
+        List of dicts with id, title, snippet and score, best match first
+    """
+    match = to_fts_query(query, operator)
+    if not match:
+        return []
+    
+    # Title matches weigh more than tag matches, which weigh more than content
+    with connection() as conn:
+        rows = conn.execute("""
+            SELECT n.id, n.title,
+                   snippet(notes_fts, 1, ?, ?, '...', 12) AS snippet,
+                   bm25(notes_fts, 10.0, 1.0, 5.0) AS rank
+            FROM notes_fts
+            JOIN notes n ON n.id = notes_fts.rowid
+            WHERE notes_fts MATCH ?
+            ORDER BY rank
+            LIMIT ?
+        """, (highlight[0], highlight[1], match, limit)).fetchall()
+    
+    hits = [
+        {'id': row['id'], 'title': row['title'], 'snippet': row['snippet'], 'score': -row['rank']}
+        for row in rows
+    ]
+    
+    return hits
+
+
+def search_tasks(query: str, limit: int = 20, operator: str = "AND",
+                 highlight: Tuple[str, str] = ("[", "]")) -> List[Dict]:
+    """
+    Search tasks by title, description and tags
+    
+    Args:
+        query: Search text; the last word (and any "word*") matches by prefix
+        limit: Maximum number of hits
+        operator: 'AND' to require every word, 'OR' to accept any
+        highlight: Markers placed around matched words in the snippet
+    
+    Returns:
+        List of dicts with id, title, status, priority, snippet and score
+    """
+    match = to_fts_query(query, operator)
+    if not match:
+        return []
+    
+    with connection() as conn:
+        rows = conn.execute("""
+            SELECT t.id, t.title, t.status, t.priority,
+                   snippet(tasks_fts, 1, ?, ?, '...', 12) AS snippet,
+                   bm25(tasks_fts, 10.0, 1.0, 5.0) AS rank
+            FROM tasks_fts
+            JOIN tasks t ON t.id = tasks_fts.rowid
+            WHERE tasks_fts MATCH ?
+            ORDER BY rank
+            LIMIT ?
+        """, (highlight[0], highlight[1], match, limit)).fetchall()
+    
+    hits = [
+        {
+            'id': row['id'],
+            'title': row['title'],
+            'status': row['status'],
+            'priority': row['priority'],
+            'snippet': row['snippet'],
+            'score': -row['rank']
+        }
+        for row in rows
+    ]
+    
+    return hits
@@ -0,0 +1,232 @@
+"""
+Inverted full-text index
+Term -> posting list (id -> positions) with BM25 ranking, used by
+JSONStorage to answer search queries without scanning every record
+"""
+
+import json
+import math
+import re
+from bisect import bisect_left, insort
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from core.file_lock import atomic_write_json
+
+TOKEN_PATTERN = re.compile(r"\w+")
+QUERY_PATTERN = re.compile(r"\w+\*?")
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase word tokens"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def tokenize_query(query: str) -> List[str]:
+    """Split a query into terms; a trailing * marks a prefix term"""
+    return QUERY_PATTERN.findall(query.lower())
+
+
+class InvertedIndex:
+    """
+    Positional inverted index over a set of text fields
+    
+    Each record's fields are tokenized into one position stream, so a
+    posting list maps record id -> positions of the term in that stream.
+    """
+    
+    def __init__(self, fields: Iterable[str]):
+        self.fields = tuple(fields)
+        self.postings: Dict[str, Dict[str, List[int]]] = {}
+        self.doc_len: Dict[str, int] = {}
+        self.total_len = 0
+        self._doc_terms: Dict[str, List[str]] = {}
+        self._terms: Optional[List[str]] = []  # sorted, for prefix lookups (None during extend)
+    
+    def __len__(self):
+        return len(self.doc_len)
+    
+    def _record_tokens(self, record: Dict) -> List[str]:
+        tokens = []
+        for field in self.fields:
+            value = record.get(field)
+            if isinstance(value, list):
+                for item in value:
+                    tokens.extend(tokenize(str(item)))
+            elif value:
+                tokens.extend(tokenize(str(value)))
+        return tokens
+    
+    def add(self, record: Dict):
+        """Index a record (replacing any previous version of it)"""
+        doc_id = record["id"]
+        if doc_id in self.doc_len:
+            self.remove(doc_id)
+        
+        tokens = self._record_tokens(record)
+        positions: Dict[str, List[int]] = {}
+        for pos, token in enumerate(tokens):
+            positions.setdefault(token, []).append(pos)
+        
+        for term, term_positions in positions.items():
+            posting = self.postings.get(term)
+            if posting is None:
+                posting = self.postings[term] = {}
+                if self._terms is not None:
+                    insort(self._terms, term)
+            posting[doc_id] = term_positions
+        
+        self.doc_len[doc_id] = len(tokens)
+        self.total_len += len(tokens)
+        self._doc_terms[doc_id] = list(positions)
+    
+    def remove(self, doc_id: str):
+        """Drop a record from the index"""
+        if doc_id not in self.doc_len:
+            return
+        
+        for term in self._doc_terms.pop(doc_id):
+            posting = self.postings[term]
+            posting.pop(doc_id, None)
+            if not posting:
+                del self.postings[term]
+                if self._terms is None:
+                    continue
+                i = bisect_left(self._terms, term)
+                if i < len(self._terms) and self._terms[i] == term:
+                    del self._terms[i]
+        
+        self.total_len -= self.doc_len.pop(doc_id)
+    
+    def extend(self, records: Iterable[Dict]):
+        """Index many records, sorting the term list once at the end rather than per new term"""
+        self._terms = None
+        try:
+            for record in records:
+                self.add(record)
+        finally:
+            self._terms = sorted(self.postings)
+    
+    def expand_prefix(self, prefix: str) -> List[str]:
+        """Return every indexed term starting with prefix"""
+        start = bisect_left(self._terms, prefix)
+        terms = []
+        for term in self._terms[start:]:
+            if not term.startswith(prefix):
+                break
+            terms.append(term)
+        return terms
+    
+    def _expand(self, query_term: str) -> List[str]:
+        if query_term.endswith("*"):
+            return self.expand_prefix(query_term[:-1])
+        return [query_term] if query_term in self.postings else []
+    
+    def search(self, query: str, operator: str = "and",
+               prefix_last: bool = True) -> List[Tuple[str, float]]:
+        """
+        Search the index
+        
+        Matching is by whole words, so "proj" finds "project" only as the
+        last (prefix) term, and nothing matches inside a word ("ing" does
+        not find "testing").
+        
+        Args:
+            query: Space-separated terms; "term*" matches any term with that prefix
+            operator: 'and' to require every term, 'or' to accept any
+            prefix_last: Treat the last term as a prefix, as if it ended in *
+        
+        Returns:
+            List of (id, score) tuples, best BM25 score first
+        """
+        query_terms = tokenize_query(query)
+        if not query_terms:
+            return []
+        if prefix_last and not query_terms[-1].endswith("*"):
+            query_terms[-1] += "*"
+        
+        # Each query term expands to one or more index terms
+        groups = [self._expand(term) for term in query_terms]
+        
+        if operator == "and":
+            if not all(groups):
+                return []
+            candidate_sets = []
+            for terms in groups:
+                if len(terms) == 1:
+                    candidate_sets.append(self.postings[terms[0]].keys())
+                else:
+                    candidate_sets.append(set().union(*(self.postings[t] for t in terms)))
+            candidate_sets.sort(key=len)
+            candidates = set(candidate_sets[0]).intersection(*candidate_sets[1:])
+        elif operator == "or":
+            candidates = set()
+            for terms in groups:
+                for term in terms:
+                    candidates.update(self.postings[term])
+        else:
+            raise ValueError(f"Unknown operator: {operator!r}")
+        
+        if not candidates:
+            return []
+        
+        scores = dict.fromkeys(candidates, 0.0)
+        n_docs = len(self.doc_len)
+        avg_len = self.total_len / n_docs if n_docs else 0.0
+        for term in {t for terms in groups for t in terms}:
+            posting = self.postings[term]
+            df = len(posting)
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            # Walk whichever side is smaller
+            docs = candidates if len(candidates) < df else posting
+            for doc_id in docs:
+                positions = posting.get(doc_id)
+                if positions is None or doc_id not in scores:
+                    continue
+                tf = len(positions)
+                norm = 1 - B + B * self.doc_len[doc_id] / avg_len if avg_len else 1.0
+                scores[doc_id] += idf * tf * (K1 + 1) / (tf + K1 * norm)
+        
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+    
+    # ===== PERSISTENCE =====
+    
+    def save(self, path: Path, stamp):
+        """Write the index to disk, tagged with the snapshot it was built from"""
+        data = {
+            "stamp": list(stamp) if stamp is not None else None,
+            "fields": list(self.fields),
+            "postings": self.postings,
+            "doc_len": self.doc_len,
+        }
+        atomic_write_json(path, data, separators=(',', ':'))
+    
+    @classmethod
+    def load(cls, path: Path, stamp, fields: Iterable[str]) -> Optional["InvertedIndex"]:
+        """Load an index from disk, or return None if it is missing or stale"""
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, FileNotFoundError):
+            return None
+        
+        fields = tuple(fields)
+        stamp = list(stamp) if stamp is not None else None
+        if data.get("stamp") != stamp or tuple(data.get("fields", ())) != fields:
+            return None
+        
+        index = cls(fields)
+        index.postings = data["postings"]
+        index.doc_len = data["doc_len"]
+        index.total_len = sum(index.doc_len.values())
+        index._terms = sorted(index.postings)
+        doc_terms: Dict[str, List[str]] = {doc_id: [] for doc_id in index.doc_len}
+        for term, posting in index.postings.items():
+            for doc_id in posting:
+                doc_terms[doc_id].append(term)
+        index._doc_terms = doc_terms
+        return index
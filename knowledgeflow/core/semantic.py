@@ -0,0 +1,355 @@
+"""
+Semantic Search
+Embedding-based search over notes and tasks
+
+Vectors live in a contiguous float32 matrix memory-mapped from disk,
+with a JSON sidecar mapping rows to record ids and content hashes.
+Records are only re-embedded when their text changes.
+"""
+
+import hashlib
+import json
+import os
+import re
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from core.file_lock import atomic_write_json, create_temp_file
+
+WORD_PATTERN = re.compile(r"\w+")
+
+# Text fields embedded for each record kind
+TEXT_FIELDS = {
+    "notes": ("title", "content", "tags"),
+    "tasks": ("title", "description", "tags"),
+}
+
+# Storage kind (for JSONStorage.version) of each index
+KINDS = {"notes": "note", "tasks": "task"}
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """Scale rows to unit length so a dot product is cosine similarity"""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class HashingEmbedder:
+    """
+    Local, deterministic embedder using hashed word and character n-grams
+    
+    Needs no network or model files, so it works offline and in tests.
+    Similar wording gives similar vectors; it does not know synonyms.
+    """
+    
+    def __init__(self, dim: int = 256, ngram: int = 3):
+        self.dim = dim
+        self.ngram = ngram
+        self.name = f"hashing-{dim}-{ngram}"
+    
+    def _features(self, text: str) -> List[str]:
+        features = []
+        for word in WORD_PATTERN.findall(text.lower()):
+            features.append(word)
+            padded = f" {word} "
+            for i in range(len(padded) - self.ngram + 1):
+                features.append("#" + padded[i:i + self.ngram])
+        return features
+    
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Embed texts into an (n, dim) float32 matrix of unit vectors"""
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                # crc32 is stable across runs, unlike hash()
+                h = zlib.crc32(feature.encode())
+                vectors[row, h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        return _normalize(vectors)
+
+
+class OpenAIEmbedder:
+    """Embedder backed by the OpenAI embeddings API"""
+    
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None,
+                 model: str = "text-embedding-3-small", dim: int = 1536):
+        """
+        Initialize the embedder with OpenAI API key
+        
+        Args:
+            api_key: OpenAI API key (defaults to OPENAI_API_KEY)
+            base_url: Alternative API endpoint
+            model: Embedding model name
+            dim: Vector size requested from the API
+        """
+        from openai import OpenAI
+        
+        api_key = api_key or os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            raise ValueError("OpenAI API key is required. Set OPENAI_API_KEY environment variable.")
+        
+        self.client = OpenAI(api_key=api_key, base_url=base_url)
+        self.model = model
+        self.dim = dim
+        self.name = f"openai-{model}-{dim}"
+    
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Embed texts into an (n, dim) float32 matrix of unit vectors"""
+        response = self.client.embeddings.create(model=self.model, input=texts,
+                                                 dimensions=self.dim)
+        data = sorted(response.data, key=lambda item: item.index)
+        return _normalize(np.array([item.embedding for item in data], dtype=np.float32))
+
+
+class VectorIndex:
+    """
+    Memory-mapped matrix of unit vectors with an id map
+    
+    Rows [0, len) are live; the file is grown by doubling so appends
+    don't rewrite it each time. Removing a row moves the last row into
+    its place, keeping the live rows contiguous.
+    """
+    
+    def __init__(self, path: Path, embedder_name: str, dim: int):
+        self.path = Path(path)
+        self.meta_file = self.path.with_suffix(".meta.json")
+        self.embedder_name = embedder_name
+        self.dim = dim
+        self.ids: List[str] = []
+        self.hashes: Dict[str, str] = {}
+        self.rows: Dict[str, int] = {}
+        self.matrix: Optional[np.memmap] = None
+        self._load()
+    
+    def __len__(self):
+        return len(self.ids)
+    
+    @property
+    def capacity(self) -> int:
+        return 0 if self.matrix is None else self.matrix.shape[0]
+    
+    def _load(self):
+        try:
+            with open(self.meta_file, 'r') as f:
+                meta = json.load(f)
+        except (json.JSONDecodeError, FileNotFoundError):
+            return
+        
+        # Vectors from another embedder are useless; start over
+        if meta.get("embedder") != self.embedder_name or meta.get("dim") != self.dim:
+            return
+        if not self.path.exists():
+            return
+        
+        capacity = self.path.stat().st_size // (4 * self.dim)
+        if capacity < len(meta["ids"]):
+            return
+        
+        self.ids = meta["ids"]
+        self.hashes = dict(zip(self.ids, meta["hashes"]))
+        self.rows = {record_id: row for row, record_id in enumerate(self.ids)}
+        if capacity:
+            self.matrix = np.memmap(self.path, dtype=np.float32, mode="r+",
+                                    shape=(capacity, self.dim))
+    
+    def _grow(self, needed: int):
+        capacity = max(64, self.capacity * 2, needed)
+        # A temp name of our own, so two processes growing the index can't clobber each other
+        temp_file, fd = create_temp_file(self.path)
+        os.close(fd)
+        try:
+            grown = np.memmap(temp_file, dtype=np.float32, mode="w+", shape=(capacity, self.dim))
+            if self.matrix is not None:
+                grown[:len(self.ids)] = self.matrix[:len(self.ids)]
+            grown.flush()
+            del grown
+            temp_file.replace(self.path)
+        except BaseException:
+            temp_file.unlink(missing_ok=True)
+            raise
+        self.matrix = np.memmap(self.path, dtype=np.float32, mode="r+",
+                                shape=(capacity, self.dim))
+    
+    def upsert(self, ids: List[str], vectors: np.ndarray, hashes: List[str]):
+        """Insert or overwrite the vectors for ids"""
+        new = [record_id for record_id in ids if record_id not in self.rows]
+        if len(self.ids) + len(new) > self.capacity:
+            self._grow(len(self.ids) + len(new))
+        
+        for record_id in new:
+            self.rows[record_id] = len(self.ids)
+            self.ids.append(record_id)
+        
+        rows = [self.rows[record_id] for record_id in ids]
+        self.matrix[rows] = vectors
+        self.hashes.update(zip(ids, hashes))
+    
+    def remove(self, ids: Iterable[str]):
+        """Drop the vectors for ids"""
+        for record_id in ids:
+            row = self.rows.pop(record_id, None)
+            if row is None:
+                continue
+            self.hashes.pop(record_id, None)
+            last_id = self.ids.pop()
+            if last_id != record_id:
+                self.matrix[row] = self.matrix[len(self.ids)]
+                self.ids[row] = last_id
+                self.rows[last_id] = row
+    
+    def save(self):
+        """Flush vectors and write the id map"""
+        if self.matrix is not None:
+            self.matrix.flush()
+        meta = {
+            "embedder": self.embedder_name,
+            "dim": self.dim,
+            "ids": self.ids,
+            "hashes": [self.hashes[record_id] for record_id in self.ids],
+        }
+        atomic_write_json(self.meta_file, meta, separators=(',', ':'))
+    
+    def search(self, vector: np.ndarray, k: int = 10) -> List[Tuple[str, float]]:
+        """
+        Find the rows most similar to a unit vector
+        
+        Args:
+            vector: Query vector of length dim
+            k: Number of results
+        
+        Returns:
+            List of (id, cosine similarity) tuples, best first
+        """
+        count = len(self.ids)
+        if count == 0 or k <= 0:
+            return []
+        
+        scores = self.matrix[:count] @ vector
+        if k < count:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(count)
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(self.ids[row], float(scores[row])) for row in top]
+
+
+class SemanticSearch:
+    """
+    Semantic search over a JSONStorage's notes and tasks
+    
+    Each search first syncs the vector index with storage, embedding
+    only records whose text changed since the last sync. The sync is
+    skipped outright while the storage version hasn't moved.
+    """
+    
+    def __init__(self, storage, embedder=None, index_dir: Optional[Path] = None,
+                 batch_size: int = 64):
+        """
+        Args:
+            storage: JSONStorage to index
+            embedder: Object with name, dim and embed(texts); defaults to HashingEmbedder
+            index_dir: Where vectors are stored (defaults to <data_dir>/semantic)
+            batch_size: Texts per embed() call
+        """
+        self.storage = storage
+        self.embedder = embedder or HashingEmbedder()
+        self.index_dir = Path(index_dir) if index_dir is not None else storage.data_dir / "semantic"
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size
+        self._indexes: Dict[str, VectorIndex] = {}
+        self._synced_versions: Dict[str, int] = {}
+    
+    def _index(self, kind: str) -> VectorIndex:
+        index = self._indexes.get(kind)
+        if index is None:
+            index = VectorIndex(self.index_dir / f"{kind}.vectors", self.embedder.name,
+                                self.embedder.dim)
+            self._indexes[kind] = index
+        return index
+    
+    def _records(self, kind: str) -> List[Dict]:
+        if kind == "notes":
+            return self.storage.list_notes()
+        if kind == "tasks":
+            return self.storage.list_tasks()
+        raise ValueError(f"Unknown kind: {kind!r}")
+    
+    def _text(self, kind: str, record: Dict) -> str:
+        parts = []
+        for field in TEXT_FIELDS[kind]:
+            value = record.get(field)
+            if isinstance(value, list):
+                parts.append(" ".join(str(item) for item in value))
+            elif value:
+                parts.append(str(value))
+        return "\n".join(parts)
+    
+    def sync(self, kind: str) -> int:
+        """
+        Bring the vector index for notes or tasks up to date
+        
+        Args:
+            kind: 'notes' or 'tasks'
+        
+        Returns:
+            Number of records (re-)embedded
+        """
+        if kind not in KINDS:
+            raise ValueError(f"Unknown kind: {kind!r}")
+        index = self._index(kind)
+        # Read before the records, so a write made during the sync is caught next time
+        version = self.storage.version(KINDS[kind])
+        if self._synced_versions.get(kind) == version:
+            return 0
+        records = self._records(kind)
+        
+        changed = []
+        for record in records:
+            text = self._text(kind, record)
+            digest = hashlib.sha1(text.encode()).hexdigest()
+            if index.hashes.get(record['id']) != digest:
+                changed.append((record['id'], text, digest))
+        
+        live = {record['id'] for record in records}
+        stale = [record_id for record_id in index.ids if record_id not in live]
+        if changed or stale:
+            index.remove(stale)
+            for start in range(0, len(changed), self.batch_size):
+                batch = changed[start:start + self.batch_size]
+                vectors = self.embedder.embed([text for _, text, _ in batch])
+                index.upsert([record_id for record_id, _, _ in batch], vectors,
+                             [digest for _, _, digest in batch])
+            index.save()
+        self._synced_versions[kind] = version
+        return len(changed)
+    
+    def _search(self, kind: str, query: str, k: int) -> List[Dict]:
+        self.sync(kind)
+        vector = self.embedder.embed([query])[0]
+        get = self.storage.get_note if kind == "notes" else self.storage.get_task
+        
+        results = []
+        for record_id, score in self._index(kind).search(vector, k):
+            record = get(record_id)
+            if record is not None:
+                record["score"] = score
+                results.append(record)
+        return results
+    
+    def search_notes(self, query: str, k: int = 10) -> List[Dict]:
+        """Notes most similar in meaning to query, each with a 'score'"""
+        return self._search("notes", query, k)
+    
+    def search_tasks(self, query: str, k: int = 10) -> List[Dict]:
+        """Tasks most similar in meaning to query, each with a 'score'"""
+        return self._search("tasks", query, k)
+    
+    def search_all(self, query: str, k: int = 10) -> Dict[str, List[Dict]]:
+        """Search notes and tasks"""
+        return {
+            "notes": self.search_notes(query, k),
+            "tasks": self.search_tasks(query, k),
+        }
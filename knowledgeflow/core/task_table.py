@@ -0,0 +1,401 @@
+"""
+Columnar Task Table
+Compact in-memory representation for very large task lists
+
+Status and priority are stored as int8 codes, timestamps as int64
+microseconds since the epoch, and tags as interned tuples of tag ids.
+Rows are exposed through TaskView, a read-only Mapping that behaves
+like the task dicts the rest of the code base passes around, and
+filters are evaluated as NumPy masks over whole columns.
+"""
+
+from collections.abc import Mapping
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from core.vocab import Vocab
+
+TASK_FIELDS = ("id", "title", "description", "status", "priority", "due_date", "tags",
+               "linked_note_id", "created_at", "updated_at")
+TIME_FIELDS = ("due_date", "created_at", "updated_at")
+
+# Codes for the usual values; anything else gets the next free code
+STATUSES = ("pending", "in_progress", "completed")
+PRIORITIES = ("low", "medium", "high")
+
+NO_TIME = np.iinfo(np.int64).min
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+
+class TaskView(Mapping):
+    """Read-only, dict-compatible view of one task in a TaskTable"""
+    
+    __slots__ = ("_table", "_id")
+    
+    def __init__(self, table: "TaskTable", task_id: str):
+        self._table = table
+        self._id = task_id
+    
+    def __getitem__(self, key):
+        return self._table._value(self._table._row(self._id), key)
+    
+    def __iter__(self):
+        return iter(TASK_FIELDS)
+    
+    def __len__(self):
+        return len(TASK_FIELDS)
+    
+    def __repr__(self):
+        return f"TaskView({dict(self)!r})"
+
+
+class TaskTable:
+    """
+    Column-oriented store of tasks
+    
+    Rows are kept in insertion order. Deleted rows are masked out and
+    reclaimed once they make up half the table.
+    """
+    
+    def __init__(self, capacity: int = 1024):
+        self.status_vocab = Vocab(STATUSES)
+        self.priority_vocab = Vocab(PRIORITIES)
+        self.tag_vocab = Vocab()
+        self._tag_sets: Dict[Tuple[int, ...], Tuple[int, ...]] = {(): ()}
+        self._tag_index = None  # (owner rows, tag ids), built on demand
+        
+        self.ids: List[Optional[str]] = []
+        self.titles: List[str] = []
+        self.descriptions: List[str] = []
+        self.linked_note_ids: List[Optional[str]] = []
+        self.tag_ids: List[Tuple[int, ...]] = []
+        self.rows: Dict[str, int] = {}
+        # Timestamps that isoformat() would not reproduce exactly, by (field, row)
+        self._raw_times: Dict[Tuple[str, int], str] = {}
+        
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.status = np.zeros(capacity, dtype=np.int8)
+        self.priority = np.zeros(capacity, dtype=np.int8)
+        self.times = {name: np.full(capacity, NO_TIME, dtype=np.int64) for name in TIME_FIELDS}
+        self._size = 0
+        self._dead = 0
+    
+    @classmethod
+    def from_records(cls, records: Iterable[Dict]) -> "TaskTable":
+        """Build a table from task dictionaries"""
+        table = cls()
+        table.extend(records)
+        return table
+    
+    def __len__(self):
+        return self._size - self._dead
+    
+    def __contains__(self, task_id):
+        return task_id in self.rows
+    
+    def __iter__(self) -> Iterator[TaskView]:
+        for row in np.flatnonzero(self.alive[:self._size]):
+            yield TaskView(self, self.ids[row])
+    
+    # ===== ENCODING =====
+    
+    def _encode_time(self, field: str, row: int, value: Optional[str]) -> int:
+        self._raw_times.pop((field, row), None)
+        if not value:
+            return NO_TIME
+        if len(value) == 26 and value[19] == "." and not value.endswith("000000") or len(value) == 19:
+            # Shapes isoformat() itself produces: no round-trip check needed
+            try:
+                parsed = datetime.fromisoformat(value)
+            except ValueError:
+                parsed = None
+            if parsed is not None and parsed.tzinfo is None:
+                return (parsed - EPOCH) // MICROSECOND
+        try:
+            parsed = datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            self._raw_times[(field, row)] = value
+            return NO_TIME
+        if parsed.tzinfo is not None or parsed.isoformat() != value:
+            # Dates without a time, offsets etc. are kept verbatim
+            self._raw_times[(field, row)] = value
+        return (parsed.replace(tzinfo=None) - EPOCH) // MICROSECOND
+    
+    def _decode_time(self, field: str, row: int) -> Optional[str]:
+        raw = self._raw_times.get((field, row))
+        if raw is not None:
+            return raw
+        value = int(self.times[field][row])
+        if value == NO_TIME:
+            return None
+        return (EPOCH + timedelta(microseconds=value)).isoformat()
+    
+    def _encode_tags(self, tags: Optional[Iterable[str]]) -> Tuple[int, ...]:
+        ids = tuple(self.tag_vocab.code(tag) for tag in tags or ())
+        # Rows with the same tags share one tuple
+        return self._tag_sets.setdefault(ids, ids)
+    
+    def _value(self, row: int, key: str):
+        if key == "id":
+            return self.ids[row]
+        if key == "title":
+            return self.titles[row]
+        if key == "description":
+            return self.descriptions[row]
+        if key == "status":
+            return self.status_vocab.values[self.status[row]]
+        if key == "priority":
+            return self.priority_vocab.values[self.priority[row]]
+        if key == "tags":
+            return [self.tag_vocab.values[i] for i in self.tag_ids[row]]
+        if key == "linked_note_id":
+            return self.linked_note_ids[row]
+        if key in self.times:
+            return self._decode_time(key, row)
+        raise KeyError(key)
+    
+    def _row(self, task_id: str) -> int:
+        row = self.rows.get(task_id)
+        if row is None:
+            raise KeyError(task_id)
+        return row
+    
+    def _grow(self):
+        capacity = len(self.alive) * 2
+        self.alive = np.resize(self.alive, capacity)
+        self.alive[self._size:] = False
+        self.status = np.resize(self.status, capacity)
+        self.priority = np.resize(self.priority, capacity)
+        for name in TIME_FIELDS:
+            self.times[name] = np.resize(self.times[name], capacity)
+    
+    # ===== MUTATION =====
+    
+    def add(self, record: Dict):
+        """Append a task (replacing any row with the same id)"""
+        if record["id"] in self.rows:
+            self.remove(record["id"])
+        if self._size == len(self.alive):
+            self._grow()
+        
+        row = self._size
+        self._size += 1
+        self.ids.append(record["id"])
+        self.titles.append(record.get("title", ""))
+        self.descriptions.append(record.get("description", ""))
+        self.linked_note_ids.append(record.get("linked_note_id"))
+        self.tag_ids.append(self._encode_tags(record.get("tags")))
+        self.rows[record["id"]] = row
+        
+        self.alive[row] = True
+        self.status[row] = self.status_vocab.code(record.get("status") or "pending")
+        self.priority[row] = self.priority_vocab.code(record.get("priority") or "medium")
+        for name in TIME_FIELDS:
+            self.times[name][row] = self._encode_time(name, row, record.get(name))
+        self._tag_index = None
+    
+    def put(self, record: Dict):
+        """Insert a task, or overwrite an existing one in place (keeping its row)"""
+        if record["id"] not in self.rows:
+            self.add(record)
+            return
+        self.update(record["id"],
+                    title=record.get("title", ""),
+                    description=record.get("description", ""),
+                    status=record.get("status") or "pending",
+                    priority=record.get("priority") or "medium",
+                    tags=record.get("tags"),
+                    linked_note_id=record.get("linked_note_id"),
+                    **{name: record.get(name) for name in TIME_FIELDS})
+    
+    def extend(self, records: Iterable[Dict]):
+        """Append many tasks, filling each column in one go"""
+        records = list(records)
+        ids = [record["id"] for record in records]
+        if len(set(ids)) < len(ids) or not self.rows.keys().isdisjoint(ids):
+            # Replacements must go through add() one by one
+            for record in records:
+                self.add(record)
+            return
+        
+        start, end = self._size, self._size + len(records)
+        while end > len(self.alive):
+            self._grow()
+        status, priority = [], []
+        times = {name: [] for name in TIME_FIELDS}
+        for row, record in enumerate(records, start):
+            self.titles.append(record.get("title", ""))
+            self.descriptions.append(record.get("description", ""))
+            self.linked_note_ids.append(record.get("linked_note_id"))
+            self.tag_ids.append(self._encode_tags(record.get("tags")))
+            status.append(self.status_vocab.code(record.get("status") or "pending"))
+            priority.append(self.priority_vocab.code(record.get("priority") or "medium"))
+            for name in TIME_FIELDS:
+                times[name].append(self._encode_time(name, row, record.get(name)))
+        
+        self.ids.extend(ids)
+        self.rows.update(zip(ids, range(start, end)))
+        self.alive[start:end] = True
+        self.status[start:end] = status
+        self.priority[start:end] = priority
+        for name in TIME_FIELDS:
+            self.times[name][start:end] = times[name]
+        self._size = end
+        self._tag_index = None
+    
+    def update(self, task_id: str, **fields) -> bool:
+        """Change fields of a task in place; returns False if it doesn't exist"""
+        row = self.rows.get(task_id)
+        if row is None:
+            return False
+        
+        for key, value in fields.items():
+            if key == "title":
+                self.titles[row] = value
+            elif key == "description":
+                self.descriptions[row] = value
+            elif key == "status":
+                self.status[row] = self.status_vocab.code(value)
+            elif key == "priority":
+                self.priority[row] = self.priority_vocab.code(value)
+            elif key == "tags":
+                self.tag_ids[row] = self._encode_tags(value)
+                self._tag_index = None
+            elif key == "linked_note_id":
+                self.linked_note_ids[row] = value
+            elif key in self.times:
+                self.times[key][row] = self._encode_time(key, row, value)
+            else:
+                raise KeyError(key)
+        return True
+    
+    def remove(self, task_id: str) -> bool:
+        """Delete a task; returns False if it doesn't exist"""
+        row = self.rows.pop(task_id, None)
+        if row is None:
+            return False
+        
+        self.alive[row] = False
+        self.ids[row] = None
+        self.titles[row] = self.descriptions[row] = ""
+        self.tag_ids[row] = ()
+        for name in TIME_FIELDS:
+            self._raw_times.pop((name, row), None)
+        self._dead += 1
+        self._tag_index = None
+        
+        if self._dead > 1024 and self._dead * 2 >= self._size:
+            self._compact()
+        return True
+    
+    def _compact(self):
+        """Drop deleted rows, keeping the order of the live ones"""
+        keep = np.flatnonzero(self.alive[:self._size])
+        capacity = max(1024, len(keep) * 2)
+        
+        def take(column, fill):
+            packed = np.full(capacity, fill, dtype=column.dtype)
+            packed[:len(keep)] = column[keep]
+            return packed
+        
+        self.alive = take(self.alive, False)
+        self.status = take(self.status, 0)
+        self.priority = take(self.priority, 0)
+        self.times = {name: take(column, NO_TIME) for name, column in self.times.items()}
+        
+        old_rows = keep.tolist()
+        self.ids = [self.ids[r] for r in old_rows]
+        self.titles = [self.titles[r] for r in old_rows]
+        self.descriptions = [self.descriptions[r] for r in old_rows]
+        self.linked_note_ids = [self.linked_note_ids[r] for r in old_rows]
+        self.tag_ids = [self.tag_ids[r] for r in old_rows]
+        new_row = {old: new for new, old in enumerate(old_rows)}
+        self._raw_times = {(name, new_row[row]): value
+                           for (name, row), value in self._raw_times.items() if row in new_row}
+        self.rows = {task_id: row for row, task_id in enumerate(self.ids)}
+        self._size = len(keep)
+        self._dead = 0
+    
+    # ===== QUERIES =====
+    
+    def _tag_mask(self, tag: str) -> np.ndarray:
+        code = self.tag_vocab.codes.get(tag)
+        mask = np.zeros(self._size, dtype=bool)
+        if code is None:
+            return mask
+        if self._tag_index is None:
+            lengths = np.fromiter((len(t) for t in self.tag_ids), dtype=np.int64,
+                                  count=self._size)
+            owners = np.repeat(np.arange(self._size), lengths)
+            flat = np.fromiter((i for t in self.tag_ids for i in t), dtype=np.int32,
+                               count=int(lengths.sum()))
+            self._tag_index = (owners, flat)
+        owners, flat = self._tag_index
+        mask[owners[flat == code]] = True
+        return mask
+    
+    def mask(self, status: Optional[str] = None, priority: Optional[str] = None,
+             tag: Optional[str] = None, due_before: Optional[str] = None) -> np.ndarray:
+        """
+        Boolean mask over rows matching every given filter
+        
+        Args:
+            status: Only tasks with this status
+            priority: Only tasks with this priority
+            tag: Only tasks with this tag
+            due_before: Only tasks due strictly before this ISO date/time
+        """
+        size = self._size
+        mask = self.alive[:size].copy()
+        if status:
+            code = self.status_vocab.codes.get(status, -1)
+            mask &= self.status[:size] == code
+        if priority:
+            code = self.priority_vocab.codes.get(priority, -1)
+            mask &= self.priority[:size] == code
+        if tag:
+            mask &= self._tag_mask(tag)
+        if due_before:
+            limit = (datetime.fromisoformat(due_before).replace(tzinfo=None) - EPOCH) // timedelta(microseconds=1)
+            due = self.times["due_date"][:size]
+            mask &= (due != NO_TIME) & (due < limit)
+        return mask
+    
+    def list_tasks(self, status: Optional[str] = None, priority: Optional[str] = None,
+                   tag: Optional[str] = None, due_before: Optional[str] = None) -> List[TaskView]:
+        """Tasks matching the filters, in insertion order"""
+        rows = np.flatnonzero(self.mask(status, priority, tag, due_before))
+        return [TaskView(self, self.ids[row]) for row in rows]
+    
+    def ids_where(self, status: Optional[str] = None, priority: Optional[str] = None,
+                  tag: Optional[str] = None, due_before: Optional[str] = None) -> List[str]:
+        """IDs of the tasks matching the filters, in insertion order"""
+        ids = self.ids
+        return [ids[row] for row in np.flatnonzero(self.mask(status, priority, tag, due_before)).tolist()]
+    
+    def count(self, status: Optional[str] = None, priority: Optional[str] = None,
+              tag: Optional[str] = None, due_before: Optional[str] = None) -> int:
+        """Number of tasks matching the filters"""
+        return int(np.count_nonzero(self.mask(status, priority, tag, due_before)))
+    
+    def count_by(self, field: str) -> Dict[str, int]:
+        """Task counts per status or priority"""
+        if field not in ("status", "priority"):
+            raise ValueError(f"Can only count by status or priority, not {field!r}")
+        column, vocab = (self.status, self.status_vocab) if field == "status" else \
+            (self.priority, self.priority_vocab)
+        counts = np.bincount(column[:self._size][self.alive[:self._size]],
+                             minlength=len(vocab.values))
+        return {vocab.values[code]: int(n) for code, n in enumerate(counts) if n}
+    
+    def get(self, task_id: str) -> Optional[TaskView]:
+        """View of one task, or None"""
+        return TaskView(self, task_id) if task_id in self.rows else None
+    
+    def to_records(self) -> Iterator[Dict]:
+        """Yield every task as a plain dict"""
+        for view in self:
+            yield dict(view)
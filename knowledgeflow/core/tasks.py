@@ -0,0 +1,176 @@
+"""
+Task operations
+Create, read, update and delete tasks in the core SQLite database
+"""
+
+import json
+from typing import Iterator, List, Optional
+from core.database import connection, iter_keyset
+from core.models import Task, compile_hydrator
+from core.notes import HAS_TAG
+from datetime import datetime
+
+# Columns update_task may change
+TASK_FIELDS = ("title", "description", "status", "priority", "due_date", "tags",
+               "category_id", "linked_note_id")
+
+
+def _hydrate(rows) -> List[Task]:
+    if not rows:
+        return []
+    build = compile_hydrator(Task, rows[0].keys())
+    return [build(row) for row in rows]
+
+
+def _filters(status: Optional[str], priority: Optional[str], tag: Optional[str]):
+    where, params = [], []
+    if status:
+        where.append("status = ?")
+        params.append(status)
+    if priority:
+        where.append("priority = ?")
+        params.append(priority)
+    if tag:
+        where.append(HAS_TAG)
+        params.append(tag)
+    return " AND ".join(where), tuple(params)
+
+
+def create_task(title: str, description: str = "", status: str = "pending",
+                priority: str = "medium", due_date: Optional[str] = None,
+                tags: List[str] = None, category_id: Optional[int] = None,
+                linked_note_id: Optional[int] = None) -> Task:
+    """
+    Create a task
+    
+    Args:
+        title: Task title
+        description: Task description
+        status: Task status (pending, in_progress, completed)
+        priority: Task priority (low, medium, high)
+        due_date: Due date (ISO format string)
+        tags: List of tags
+        category_id: Category ID (optional)
+        linked_note_id: Related note ID (optional)
+    
+    Returns:
+        The created Task
+    """
+    now = datetime.now().isoformat()
+    completed_at = now if status == "completed" else None
+    with connection() as conn:
+        task_id = conn.execute("""
+            INSERT INTO tasks (title, description, status, priority, due_date, tags,
+                               category_id, linked_note_id, created_at, completed_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (title, description, status, priority, due_date, json.dumps(tags or []),
+              category_id, linked_note_id, now, completed_at)).lastrowid
+    return Task(id=task_id, title=title, description=description, status=status,
+                priority=priority, due_date=due_date, tags=list(tags or []),
+                category_id=category_id, linked_note_id=linked_note_id,
+                created_at=now, completed_at=completed_at)
+
+
+def get_task(task_id: int) -> Optional[Task]:
+    """
+    Get a task by ID
+    
+    Args:
+        task_id: Task ID
+    
+    Returns:
+        Task object or None if not found
+    """
+    with connection() as conn:
+        rows = conn.execute("SELECT * FROM tasks WHERE id = ?", (task_id,)).fetchall()
+    tasks = _hydrate(rows)
+    return tasks[0] if tasks else None
+
+
+def list_tasks(status: Optional[str] = None, priority: Optional[str] = None) -> List[Task]:
+    """
+    List tasks, oldest first
+    
+    Args:
+        status: Filter by status
+        priority: Filter by priority
+    
+    Returns:
+        List of Task objects
+    """
+    where, params = _filters(status, priority, None)
+    sql = "SELECT * FROM tasks" + (f" WHERE {where}" if where else "") + " ORDER BY id"
+    with connection() as conn:
+        rows = conn.execute(sql, params).fetchall()
+    return _hydrate(rows)
+
+
+def iter_tasks(status: Optional[str] = None, priority: Optional[str] = None,
+               tag: Optional[str] = None, after_id: Optional[int] = None,
+               limit: Optional[int] = None, batch_size: int = 200) -> Iterator[Task]:
+    """
+    Stream tasks in ID order, one batch at a time
+    
+    Args:
+        status: Only tasks with this status
+        priority: Only tasks with this priority
+        tag: Only tasks with this tag
+        after_id: Resume after this task (the last ID of the previous page)
+        limit: Maximum number of tasks to yield
+        batch_size: Rows fetched from SQLite at a time
+    
+    Returns:
+        Iterator of Task objects
+    """
+    where, params = _filters(status, priority, tag)
+    build = None
+    for row in iter_keyset("tasks", where, params, after_id, limit, batch_size):
+        if build is None:
+            build = compile_hydrator(Task, row.keys())
+        yield build(row)
+
+
+def update_task(task_id: int, **fields) -> Optional[Task]:
+    """
+    Update a task
+    
+    Setting status to 'completed' stamps completed_at; any other status
+    clears it.
+    
+    Args:
+        task_id: Task ID
+        **fields: New values for the columns in TASK_FIELDS; None values
+            and other keys are ignored
+    
+    Returns:
+        The updated Task, or None if it doesn't exist
+    """
+    changes = {key: value for key, value in fields.items() if key in TASK_FIELDS and value is not None}
+    if "tags" in changes:
+        changes["tags"] = json.dumps(changes["tags"])
+    
+    with connection() as conn:
+        row = conn.execute("SELECT status FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        if row is None:
+            return None
+        if "status" in changes and changes["status"] != row["status"]:
+            changes["completed_at"] = datetime.now().isoformat() if changes["status"] == "completed" else None
+        if changes:
+            assignments = ", ".join(f"{key} = ?" for key in changes)
+            conn.execute(f"UPDATE tasks SET {assignments} WHERE id = ?", (*changes.values(), task_id))
+        rows = conn.execute("SELECT * FROM tasks WHERE id = ?", (task_id,)).fetchall()
+    return _hydrate(rows)[0]
+
+
+def delete_task(task_id: int) -> bool:
+    """
+    Delete a task
+    
+    Args:
+        task_id: Task ID
+    
+    Returns:
+        True if deleted, False if not found
+    """
+    with connection() as conn:
+        return conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,)).rowcount > 0
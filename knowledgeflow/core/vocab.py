@@ -0,0 +1,26 @@
+"""
+Vocabulary
+Interning of repeated strings (statuses, tags, link types) as small ints
+
+Shared by the columnar tables, which store the codes in NumPy arrays.
+"""
+
+from typing import Dict, Iterable, List
+
+
+class Vocab:
+    """Two-way mapping between strings and small integer codes"""
+    
+    def __init__(self, values: Iterable[str] = ()):
+        self.values: List[str] = []
+        self.codes: Dict[str, int] = {}
+        for value in values:
+            self.code(value)
+    
+    def code(self, value: str) -> int:
+        """Code for value, assigning the next free one if it's new"""
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
@@ -9,42 +9,13 @@ import json
 from datetime import datetime
 from pathlib import Path
 
-# Database setup
-DB_PATH = Path(__file__).parent / "knowledgeflow.db"
+from core.database import DB_PATH, init_database
+from core import search
 
 
 def init_db():
-    """Initialize the database with basic schema"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    # Notes table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS notes (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            title TEXT NOT NULL,
-            content TEXT,
-            tags TEXT,
-            created_at TEXT,
-            updated_at TEXT
-        )
-    """)
-    
-    # Tasks table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS tasks (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            title TEXT NOT NULL,
-            description TEXT,
-            status TEXT DEFAULT 'pending',
-            priority TEXT DEFAULT 'medium',
-            due_date TEXT,
-            created_at TEXT
-        )
-    """)
-    
-    conn.commit()
-    conn.close()
+    """Initialize the database with the core schema (including search index)"""
+    init_database()
     print("✓ Database initialized")
 
 
@@ -119,17 +90,8 @@ def view_note(note_id):
 
 
 def search_notes(query):
-    """Search notes by title or content"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        SELECT id, title, content FROM notes 
-        WHERE title LIKE ? OR content LIKE ?
-    """, (f"%{query}%", f"%{query}%"))
-    
-    results = cursor.fetchall()
-    conn.close()
+    """Search notes by title, content or tags, best match first"""
+    results = search.search_notes(query)
     
     if not results:
         print(f"No notes found for '{query}'")
@@ -137,10 +99,9 @@ def search_notes(query):
     
     print(f"\n🔍 Search results for '{query}':")
     print("-" * 60)
-    for note_id, title, content in results:
-        preview = content[:80] + "..." if len(content) > 80 else content
-        print(f"  #{note_id} - {title}")
-        print(f"      {preview}")
+    for hit in results:
+        print(f"  #{hit['id']} - {hit['title']}")
+        print(f"      {hit['snippet']}")
     print("-" * 60)
 
 
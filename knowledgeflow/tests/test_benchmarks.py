@@ -0,0 +1,69 @@
+"""
+Smoke tests for the storage benchmark harness (benchmarks/bench_storage.py)
+
+Only checks that every engine seeds and runs each operation at a tiny
+size; the numbers themselves are never asserted on.
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "benchmarks"))
+
+import bench_storage
+
+
+@pytest.mark.parametrize("engine", list(bench_storage.ENGINES))
+def test_every_engine_runs(engine):
+    """Test that each engine seeds and measures all of its operations"""
+    results = bench_storage.run_engine(engine, n=40, ops=3, max_seconds=1.0)
+    
+    assert results["seed_seconds"] >= 0
+    ops = {op: r for op, r in results.items() if op != "seed_seconds"}
+    assert "get_task" in ops and "create_task" in ops
+    for measurement in ops.values():
+        assert measurement["ops"] == 3
+        assert measurement["p50_ms"] <= measurement["p99_ms"]
+
+
+def test_sqlite_engine_restores_db_path():
+    """Test that benchmarking never touches the real knowledgeflow database"""
+    import core.database as database
+    before = database.DB_PATH
+    bench_storage.run_engine("sqlite", n=10, ops=1, max_seconds=1.0)
+    assert database.DB_PATH == before
+
+
+def test_compare_flags_slow_operations():
+    """Test that only slowdowns past the tolerance (and above the floor) are reported"""
+    def results(**p50s):
+        return {"results": {"json": {"1000": {op: {"p50_ms": ms} for op, ms in p50s.items()}}}}
+    
+    baseline = results(get_note=1.0, search_notes=2.0, list_notes=0.01)
+    current = results(get_note=1.4, search_notes=4.0, list_notes=0.04, create_note=9.0)
+    
+    assert bench_storage.compare(current, baseline, tolerance=0.5) == [
+        {"engine": "json", "n": 1000, "op": "search_notes", "baseline_ms": 2.0,
+         "current_ms": 4.0, "ratio": 2.0}]
+    assert bench_storage.compare(current, baseline, tolerance=2.0) == []
+
+
+def test_main_writes_results_and_checks_baseline(tmp_path):
+    """Test the command line: JSON output, baseline update and the regression exit code"""
+    baseline = tmp_path / "baseline.json"
+    argv = ["-n", "20", "-e", "json", "--ops", "2", "-q"]
+    
+    assert bench_storage.main(argv + ["--baseline", str(baseline), "--update-baseline"]) == 0
+    recorded = json.loads(baseline.read_text())
+    assert set(recorded["results"]["json"]["20"]) >= {"get_note", "search_notes", "delete_task"}
+    
+    # Pretend everything used to be 1000x faster
+    for op in recorded["results"]["json"]["20"].values():
+        if isinstance(op, dict):
+            op["p50_ms"] /= 1000
+    baseline.write_text(json.dumps(recorded))
+    assert bench_storage.main(argv + ["-o", str(tmp_path / "out.json"), "--baseline", str(baseline),
+                                      "--tolerance", "0.5"]) == 1
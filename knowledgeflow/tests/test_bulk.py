@@ -0,0 +1,169 @@
+"""
+Tests for bulk import/export
+"""
+
+import json
+import pytest
+import core.database as database
+from core import bulk
+from core.database import close_connections, connection, init_database
+from core.json_storage import JSONStorage
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """Point the core database at a temporary file"""
+    monkeypatch.setattr(database, "DB_PATH", tmp_path / "knowledgeflow.db")
+    init_database()
+    yield database.DB_PATH
+    close_connections()
+
+
+@pytest.fixture
+def vault(tmp_path):
+    """A small Markdown vault with front matter and wikilinks"""
+    root = tmp_path / "vault"
+    (root / "sub").mkdir(parents=True)
+    (root / "Python.md").write_text(
+        "---\ntitle: Python\ntags: [lang, \"code\"]\n---\n\nSee [[Django]] and [[Missing]]."
+    )
+    (root / "sub" / "Django.md").write_text(
+        "---\ntags:\n  - web\n  - '#python'\n---\nBuilt on [[Python]]."
+    )
+    (root / "Plain.md").write_text("No front matter, links to [[Plain]] itself.")
+    return root
+
+
+def test_parse_front_matter():
+    """Test the supported front matter forms"""
+    meta, body = bulk.parse_front_matter('---\ntitle: "A: b"\ntags: x, y\n---\nBody')
+    
+    assert meta == {"title": "A: b", "tags": "x, y"}
+    assert body == "Body"
+    assert bulk.parse_front_matter("---\nnot closed") == ({}, "---\nnot closed")
+
+
+def test_markdown_vault_into_json(tmp_path, vault):
+    """Test importing a vault with one write and a wikilink second pass"""
+    storage = JSONStorage(data_dir=tmp_path / "data")
+    
+    counts = bulk.import_to_json(storage, bulk.read_records(vault))
+    
+    assert counts == {"notes": 3, "tasks": 0, "links": 2}
+    assert not list((tmp_path / "data").glob("*.journal.jsonl"))
+    notes = {n["title"]: n for n in storage.list_notes()}
+    assert notes["Python"]["tags"] == ["lang", "code"]
+    assert notes["Django"]["tags"] == ["web", "python"]
+    assert notes["Python"]["content"] == "See [[Django]] and [[Missing]]."
+    links = storage.get_links(notes["Django"]["id"])
+    assert {(l["from_id"], l["to_id"]) for l in links} == {
+        (notes["Python"]["id"], notes["Django"]["id"]),
+        (notes["Django"]["id"], notes["Python"]["id"]),
+    }
+
+
+def test_jsonl_round_trip_json_backend(tmp_path):
+    """Test exporting JSONL and importing it into a fresh store"""
+    source = JSONStorage(data_dir=tmp_path / "a")
+    note = source.create_note("Note", "body", ["t"])
+    source.create_task("Task", priority="high")
+    
+    path = tmp_path / "export.jsonl"
+    assert bulk.write_jsonl(bulk.export_from_json(source), path) == 2
+    
+    target = JSONStorage(data_dir=tmp_path / "b")
+    assert bulk.import_to_json(target, bulk.read_records(path)) == {
+        "notes": 1, "tasks": 1, "links": 0
+    }
+    assert target.get_note(note["id"]) == source.get_note(note["id"])
+    assert target.list_tasks()[0]["priority"] == "high"
+    
+    # Re-importing keeps the existing records and assigns fresh IDs
+    bulk.import_to_json(target, bulk.read_records(path))
+    assert len(target.list_notes()) == 2
+
+
+def test_vault_into_sqlite(db, vault):
+    """Test importing into SQLite in one transaction with wikilinks resolved"""
+    counts = bulk.import_to_sqlite(bulk.read_records(vault))
+    
+    assert counts == {"notes": 3, "tasks": 0, "links": 2}
+    with connection() as conn:
+        rows = conn.execute("""
+            SELECT s.title, t.title FROM note_links l
+            JOIN notes s ON s.id = l.source_note_id
+            JOIN notes t ON t.id = l.target_note_id
+            WHERE l.link_type = 'wikilink'
+        """).fetchall()
+        tags = conn.execute("SELECT tags FROM notes WHERE title = 'Django'").fetchone()[0]
+    
+    assert sorted(tuple(r) for r in rows) == [("Django", "Python"), ("Python", "Django")]
+    assert json.loads(tags) == ["web", "python"]
+
+
+def test_sqlite_export_to_markdown_and_back(db, tmp_path, vault):
+    """Test a SQLite -> Markdown -> JSON migration keeps notes and tasks apart"""
+    bulk.import_to_sqlite(bulk.read_records(vault))
+    bulk.import_to_sqlite([{"type": "task", "title": "Ship", "tags": ["x"]}])
+    
+    exported = list(bulk.export_from_sqlite(batch_size=2))
+    assert [r["type"] for r in exported] == ["note", "note", "note", "task"]
+    assert exported[-1]["tags"] == ["x"]
+    
+    # Abandoning an export must not roll back other work on the thread's connection
+    stream = bulk.export_from_sqlite(batch_size=1)
+    next(stream)
+    with connection() as conn:
+        conn.execute("UPDATE tasks SET title = 'Shipped' WHERE title = 'Ship'")
+        stream.close()
+    assert list(bulk.export_from_sqlite())[-1]["title"] == "Shipped"
+    
+    out = tmp_path / "out"
+    assert bulk.write_markdown_vault(exported, out) == 3
+    storage = JSONStorage(data_dir=tmp_path / "data")
+    counts = bulk.import_to_json(storage, bulk.read_records(out))
+    assert counts["notes"] == 3 and counts["links"] == 2
+    assert {n["title"] for n in storage.list_notes()} == {"Python", "Django", "Plain"}
+
+
+def test_invalid_jsonl_line(tmp_path):
+    """Test that a bad line is reported with its line number"""
+    path = tmp_path / "bad.jsonl"
+    path.write_text('{"title": "ok"}\n{broken\n')
+    
+    with pytest.raises(ValueError, match="bad.jsonl:2"):
+        list(bulk.read_jsonl(path))
+
+
+def test_jsonl_line_must_be_an_object(tmp_path):
+    """Test that a non-object line is a line-numbered ValueError"""
+    path = tmp_path / "bad.jsonl"
+    path.write_text('{"title": "ok"}\n[1, 2]\n')
+    
+    with pytest.raises(ValueError, match="bad.jsonl:2: expected a JSON object"):
+        list(bulk.read_jsonl(path))
+
+
+def test_json_import_in_chunks(tmp_path):
+    """Test that chunked imports still link across chunks and normalize tags"""
+    storage = JSONStorage(data_dir=tmp_path)
+    records = [{"title": f"Note {i}", "content": f"See [[Note {(i + 1) % 5}]]", "tags": "a, b"}
+               for i in range(5)]
+    records.append({"type": "task", "title": "Task", "tags": "x"})
+    
+    assert bulk.import_to_json(storage, iter(records), chunk_size=2) == {
+        "notes": 5, "tasks": 1, "links": 5}
+    assert {tuple(n["tags"]) for n in storage.list_notes()} == {("a", "b")}
+    assert storage.list_tasks()[0]["tags"] == ["x"]
+
+
+def test_sqlite_import_normalizes_tags(db):
+    """Test that string tags are stored as a JSON list"""
+    bulk.import_to_sqlite([{"title": "A", "tags": "work, urgent"}, {"title": "B", "tags": None}])
+    
+    with connection() as conn:
+        tags = [row[0] for row in conn.execute("SELECT tags FROM notes ORDER BY id")]
+    assert [json.loads(t) for t in tags] == [["work", "urgent"], []]
+    
+    with pytest.raises(ValueError):
+        bulk.import_to_sqlite([{"title": "C", "tags": 5}])
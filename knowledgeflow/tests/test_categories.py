@@ -0,0 +1,193 @@
+"""
+Tests for the category hierarchy
+"""
+
+import pytest
+import core.database as database
+from core.database import init_database, connection, close_connections, migrate_existing_data
+from core.categories import (
+    create_category, delete_category, get_category_tree, get_subtree_ids, get_category_path,
+    move_category, get_category_counts, get_notes_by_category, get_tasks_by_category,
+    assign_category_to_notes, assign_category_to_tasks, move_category_items,
+    assign_category_by_tag, assign_category_by_search
+)
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """Point the core database at a temporary file"""
+    monkeypatch.setattr(database, "DB_PATH", tmp_path / "knowledgeflow.db")
+    init_database()
+    yield database.DB_PATH
+    close_connections()
+
+
+@pytest.fixture
+def tree(db):
+    """Work > Projects > Alpha, Work > Meetings, and Home"""
+    work = create_category("Work")
+    projects = create_category("Projects", parent_id=work)
+    alpha = create_category("Alpha", parent_id=projects)
+    meetings = create_category("Meetings", parent_id=work)
+    home = create_category("Home")
+    return {"work": work, "projects": projects, "alpha": alpha, "meetings": meetings, "home": home}
+
+
+def add_item(table, title, category_id, tags=None):
+    with connection() as conn:
+        if table == "notes":
+            return conn.execute("INSERT INTO notes (title, tags, category_id, created_at, updated_at) "
+                                "VALUES (?, ?, ?, 'now', 'now')", (title, tags, category_id)).lastrowid
+        return conn.execute("INSERT INTO tasks (title, tags, category_id, created_at) VALUES (?, ?, ?, 'now')",
+                            (title, tags, category_id)).lastrowid
+
+
+def names(node):
+    """Nested (name, [children]) view of a tree node"""
+    return (node['category'].name, [names(child) for child in node['children']])
+
+
+def test_tree_keeps_every_level(tree):
+    """Test that grandchildren are attached under their parents"""
+    roots = get_category_tree()
+    
+    assert [names(node) for node in roots.values()] == [
+        ("Home", []),
+        ("Work", [("Meetings", []), ("Projects", [("Alpha", [])])]),
+    ]
+
+
+def test_tree_cache_follows_changes(tree):
+    """Test that the cached tree is reused until a category changes"""
+    first = get_category_tree()
+    assert get_category_tree() is first
+    
+    create_category("Beta", parent_id=tree["projects"])
+    second = get_category_tree()
+    assert second is not first
+    assert names(second[tree["work"]])[1][1] == ("Projects", [("Alpha", []), ("Beta", [])])
+    
+    delete_category(tree["work"])
+    assert list(get_category_tree()) == [tree["home"]]
+
+
+def test_tree_cache_sees_other_connections(tree, db):
+    """Test that a category change committed elsewhere (another process) invalidates the cache"""
+    import sqlite3
+    
+    first = get_category_tree()
+    other = sqlite3.connect(db)
+    try:
+        other.execute("INSERT INTO categories (name, parent_id, type, created_at) VALUES ('Garden', ?, 'note', '')",
+                      (tree["home"],))
+        other.commit()
+    finally:
+        other.close()
+    
+    second = get_category_tree()
+    assert second is not first
+    assert names(second[tree["home"]]) == ("Home", [("Garden", [])])
+
+
+def test_subtree_queries(tree):
+    """Test fetching items anywhere under a category in one call"""
+    add_item("notes", "Top", tree["work"])
+    add_item("notes", "Deep", tree["alpha"])
+    add_item("notes", "Elsewhere", tree["home"])
+    add_item("tasks", "Prepare agenda", tree["meetings"])
+    
+    assert get_subtree_ids(tree["work"]) == [tree["work"], tree["projects"], tree["meetings"], tree["alpha"]]
+    assert [n['title'] for n in get_notes_by_category(tree["work"])] == ["Top"]
+    assert sorted(n['title'] for n in get_notes_by_category(tree["work"], include_descendants=True)) == [
+        "Deep", "Top"]
+    assert [t['title'] for t in get_tasks_by_category(tree["work"], include_descendants=True)] == [
+        "Prepare agenda"]
+    assert [c.name for c in get_category_path(tree["alpha"])] == ["Work", "Projects", "Alpha"]
+
+
+def test_rolled_up_counts(tree):
+    """Test direct and subtree counts per category"""
+    add_item("notes", "a", tree["alpha"])
+    add_item("notes", "b", tree["alpha"])
+    add_item("notes", "c", tree["projects"])
+    add_item("tasks", "t", tree["meetings"])
+    
+    counts = get_category_counts()
+    assert counts[tree["work"]] == {"notes": 0, "tasks": 0, "total_notes": 3, "total_tasks": 1}
+    assert counts[tree["projects"]] == {"notes": 1, "tasks": 0, "total_notes": 3, "total_tasks": 0}
+    assert counts[tree["home"]]["total_notes"] == 0
+
+
+def test_move_category(tree):
+    """Test that moving a category carries its subtree and refuses cycles"""
+    assert not move_category(tree["work"], tree["alpha"])
+    assert not move_category(tree["projects"], 999)
+    
+    assert move_category(tree["projects"], tree["home"])
+    assert get_subtree_ids(tree["home"]) == [tree["home"], tree["projects"], tree["alpha"]]
+    assert [c.name for c in get_category_path(tree["alpha"])] == ["Home", "Projects", "Alpha"]
+    assert get_subtree_ids(tree["work"]) == [tree["work"], tree["meetings"]]
+    
+    assert move_category(tree["projects"], None)
+    assert [c.name for c in get_category_path(tree["alpha"])] == ["Projects", "Alpha"]
+    assert list(get_category_tree()) == [tree["home"], tree["projects"], tree["work"]]
+
+
+def test_closure_built_for_existing_categories(tree):
+    """Test that upgrading a database with categories fills in the closure table"""
+    with connection() as conn:
+        conn.execute("DROP TABLE category_closure")
+        conn.execute("PRAGMA user_version = 3")
+    
+    assert migrate_existing_data() == 1
+    assert get_subtree_ids(tree["work"]) == [tree["work"], tree["projects"], tree["meetings"], tree["alpha"]]
+    assert get_category_counts()[tree["alpha"]]["total_notes"] == 0
+
+
+def test_bulk_assign_ids(tree):
+    """Test assigning many notes or tasks at once, counting only real changes"""
+    notes = [add_item("notes", f"n{i}", None) for i in range(5)]
+    task = add_item("tasks", "t", tree["home"])
+    
+    assert assign_category_to_notes(notes[:3] + notes[:1], tree["alpha"]) == 3
+    assert assign_category_to_notes(notes, tree["alpha"]) == 2
+    assert assign_category_to_notes(notes, 999) == 0
+    assert assign_category_to_tasks([task, 12345], tree["home"]) == 0
+    assert assign_category_to_tasks([task], None) == 1
+    
+    assert len(get_notes_by_category(tree["alpha"])) == 5
+    assert get_tasks_by_category(tree["home"]) == []
+
+
+def test_move_category_items(tree):
+    """Test emptying a category subtree into another category"""
+    add_item("notes", "top", tree["work"])
+    add_item("notes", "deep", tree["alpha"])
+    add_item("tasks", "agenda", tree["meetings"])
+    add_item("notes", "garden", tree["home"])
+    
+    assert move_category_items(tree["projects"], tree["home"], include_descendants=False) == {
+        "notes": 0, "tasks": 0}
+    assert move_category_items(tree["work"], tree["home"]) == {"notes": 2, "tasks": 1}
+    assert get_category_counts()[tree["work"]]["total_notes"] == 0
+    assert sorted(n['title'] for n in get_notes_by_category(tree["home"])) == ["deep", "garden", "top"]
+    
+    assert move_category_items(tree["home"], None, kinds=["tasks"]) == {"tasks": 1}
+    with pytest.raises(ValueError):
+        move_category_items(tree["home"], None, kinds=["links"])
+
+
+def test_assign_by_tag_and_search(tree):
+    """Test filing items by tag and by full-text match"""
+    add_item("notes", "Budget review", None, tags='["finance", "q3"]')
+    add_item("notes", "Quarterly budget", None, tags='["q3"]')
+    add_item("notes", "Broken tags", None, tags="finance")
+    add_item("tasks", "Pay invoices", None, tags='["finance"]')
+    
+    assert assign_category_by_tag("finance", tree["work"]) == {"notes": 1, "tasks": 1}
+    assert assign_category_by_tag("q3", 999) == {"notes": 0, "tasks": 0}
+    
+    assert assign_category_by_search("budget", tree["home"]) == {"notes": 2, "tasks": 0}
+    assert assign_category_by_search("budget review", tree["alpha"], kinds=["notes"]) == {"notes": 1}
+    assert assign_category_by_search("", tree["alpha"]) == {"notes": 0, "tasks": 0}
+    assert [n['title'] for n in get_notes_by_category(tree["alpha"])] == ["Budget review"]
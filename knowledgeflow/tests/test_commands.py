@@ -0,0 +1,152 @@
+"""
+Tests for the non-interactive subcommands
+"""
+
+import io
+import json
+
+import pytest
+
+from commands import main
+from core.json_storage import JSONStorage
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return JSONStorage(data_dir=tmp_path)
+
+
+def run(storage, capsys, *argv):
+    """Run a command and return (exit status, stdout lines)"""
+    status = main(list(argv), storage=storage)
+    return status, capsys.readouterr().out.splitlines()
+
+
+def test_add_and_list_ndjson(storage, capsys):
+    """Test that list --json writes one full record per line"""
+    run(storage, capsys, "task", "add", "Write report", "-p", "high", "-t", "work, q4")
+    run(storage, capsys, "task", "add", "Done already", "-s", "completed")
+    
+    status, lines = run(storage, capsys, "task", "list", "--status", "pending", "--json")
+    assert status == 0
+    records = [json.loads(line) for line in lines]
+    assert [(r["title"], r["priority"], r["tags"]) for r in records] == [
+        ("Write report", "high", ["work", "q4"])]
+    
+    _, lines = run(storage, capsys, "task", "list", "--json", "--fields", "status")
+    assert [sorted(json.loads(line)) for line in lines] == [["id", "status"]] * 2
+
+
+def test_add_from_stdin(storage, capsys, monkeypatch):
+    """Test that `add -` creates one item per NDJSON line, ignoring unknown fields"""
+    lines = [{"title": "One", "content": "First", "id": "not-kept"}, {}, {"title": "Two"}]
+    monkeypatch.setattr("sys.stdin", io.StringIO("\n".join(map(json.dumps, lines)) + "\n\n"))
+    
+    status, out = run(storage, capsys, "note", "add", "-", "--json")
+    assert status == 0
+    assert [json.loads(line)["title"] for line in out] == ["One", "Two"]
+    assert sorted(n["title"] for n in storage.list_notes()) == ["One", "Two"]
+    assert all(n["id"] != "not-kept" for n in storage.list_notes())
+
+
+def test_add_from_stdin_releases_locks_between_chunks(storage, capsys, monkeypatch):
+    """Test that stdin is never read while the storage locks are held"""
+    from contextlib import contextmanager
+    
+    monkeypatch.setattr("commands.ADD_CHUNK_SIZE", 2)
+    batch, state = storage.batch, {"inside": False, "batches": 0}
+    
+    @contextmanager
+    def tracked_batch():
+        with batch():
+            state["inside"], state["batches"] = True, state["batches"] + 1
+            try:
+                yield
+            finally:
+                state["inside"] = False
+    
+    def producer():
+        for i in range(5):
+            assert not state["inside"], "stdin read under batch()"
+            yield json.dumps({"title": f"Task {i}"}) + "\n"
+    
+    monkeypatch.setattr(storage, "batch", tracked_batch)
+    monkeypatch.setattr("sys.stdin", producer())
+    status, out = run(storage, capsys, "task", "add", "-")
+    assert status == 0 and len(out) == 5
+    assert state["batches"] == 3
+    assert len(storage.list_tasks()) == 5
+
+
+def test_update_of_deleted_item(storage, capsys, monkeypatch):
+    """Test that an item deleted after lookup is reported, not a traceback"""
+    task = storage.create_task(title="Racing")
+    monkeypatch.setattr(storage, "update_task", lambda *args, **kwargs: None)
+    
+    assert main(["task", "update", task["id"], "-s", "completed"], storage=storage) == 1
+    assert "not found" in capsys.readouterr().err
+
+
+def test_prefix_update_show_and_delete(storage, capsys):
+    """Test that commands accept unique ID prefixes and report misses"""
+    task = storage.create_task(title="Prefixed")
+    
+    status, lines = run(storage, capsys, "task", "update", task["id"][:6], "-s", "completed", "--json")
+    assert status == 0 and json.loads(lines[0])["status"] == "completed"
+    
+    _, lines = run(storage, capsys, "task", "show", task["id"][:6])
+    assert lines[0].startswith(task["id"][:8]) and "completed" in lines[0]
+    
+    assert run(storage, capsys, "task", "show", "zzzz")[0] == 1
+    assert run(storage, capsys, "task", "delete", task["id"])[0] == 0
+    assert storage.get_task(task["id"]) is None
+
+
+def test_search_tags_results_by_type(storage, capsys):
+    """Test that search output says which kind each result is"""
+    storage.create_note("Quarterly report", content="Numbers")
+    storage.create_task(title="Send report")
+    storage.create_task(title="Unrelated")
+    
+    _, lines = run(storage, capsys, "search", "report", "--json")
+    assert sorted((r["type"], r["title"]) for r in map(json.loads, lines)) == [
+        ("note", "Quarterly report"), ("task", "Send report")]
+    
+    _, lines = run(storage, capsys, "search", "report", "--type", "task", "--json")
+    assert [json.loads(line)["type"] for line in lines] == ["task"]
+
+
+def test_bad_input_fails_cleanly(storage, capsys, monkeypatch):
+    """Test that invalid stdin and arguments give an error status, not a traceback"""
+    monkeypatch.setattr("sys.stdin", io.StringIO("[1, 2]\n"))
+    assert main(["task", "add", "-"], storage=storage) == 1
+    assert "expected a JSON object" in capsys.readouterr().err
+    
+    with pytest.raises(SystemExit) as exc:
+        main(["task", "list", "--status", "bogus"], storage=storage)
+    assert exc.value.code == 2
+
+
+def test_commands_through_daemon(tmp_path, capsys):
+    """Test add, list, update and delete against a running daemon"""
+    socket = pytest.importorskip("socket")
+    if not hasattr(socket, "AF_UNIX"):
+        pytest.skip("Unix domain sockets are not available")
+    from core.client import StorageClient
+    from core.daemon import StorageDaemon
+    
+    daemon = StorageDaemon(JSONStorage(data_dir=tmp_path / "data"), tmp_path / "kf.sock")
+    daemon.start()
+    try:
+        with StorageClient(daemon.socket_path) as client:
+            status, out = run(client, capsys, "note", "add", "Hello", "-c", "body")
+            assert status == 0
+            note_id = out[0]
+            
+            _, lines = run(client, capsys, "note", "list", "--json")
+            assert [json.loads(line)["title"] for line in lines] == ["Hello"]
+            assert run(client, capsys, "note", "update", note_id[:6], "-t", "x")[0] == 0
+            assert run(client, capsys, "note", "delete", note_id[:6])[0] == 0
+        assert daemon.backend.list_notes() == []
+    finally:
+        daemon.stop()
@@ -0,0 +1,134 @@
+"""
+Tests for the storage daemon and its socket client
+"""
+
+import socket
+import threading
+
+import pytest
+
+if not hasattr(socket, "AF_UNIX"):
+    pytest.skip("Unix domain sockets are not available", allow_module_level=True)
+
+from core.client import DaemonError, StorageClient, connect, is_running
+from core.daemon import StorageDaemon
+from core.json_storage import JSONStorage, VersionConflict
+
+
+@pytest.fixture
+def daemon(tmp_path):
+    """Daemon serving a fresh JSONStorage"""
+    daemon = StorageDaemon(JSONStorage(data_dir=tmp_path / "data"), tmp_path / "kf.sock")
+    daemon.start()
+    yield daemon
+    daemon.stop()
+
+
+@pytest.fixture
+def client(daemon):
+    with StorageClient(daemon.socket_path) as client:
+        yield client
+
+
+def test_crud_round_trip(client, daemon):
+    """Test that the client behaves like the storage it fronts"""
+    note = client.create_note("Daemon note", content="Hello", tags=["x"])
+    task = client.create_task(title="Daemon task", priority="high")
+    
+    assert client.get_note(note["id"]) == note
+    assert client.update_task(task["id"], status="completed")["status"] == "completed"
+    assert [n["title"] for n in client.search_notes("hello")] == ["Daemon note"]
+    assert client.resolve_prefix("task", task["id"][:8]) == [task["id"]]
+    
+    pages = client.iter_notes(fields=("title",))
+    assert list(pages) == [{"id": note["id"], "title": "Daemon note"}]
+    
+    # The daemon's own storage saw the writes
+    assert daemon.backend.get_task(task["id"])["status"] == "completed"
+    assert client.delete_note(note["id"]) is True
+    assert client.get_note(note["id"]) is None
+
+
+def test_errors_cross_the_socket(client):
+    """Test that known exceptions are re-raised as themselves"""
+    task = client.create_task(title="Versioned")
+    _, version = client.get_versioned("task", task["id"])
+    client.update_task(task["id"], title="Changed")
+    
+    with pytest.raises(VersionConflict):
+        client.compare_and_update("task", task["id"], version, title="Mine")
+    with pytest.raises(ValueError):
+        client.resolve_prefix("bogus", "ab")
+    with pytest.raises(ValueError, match="Unknown method"):
+        client.call("_write_json")
+    with pytest.raises(AttributeError):
+        client.not_a_method()
+    with pytest.raises(DaemonError):
+        client.bulk_create("note", [42])
+
+
+def test_concurrent_clients(daemon):
+    """Test that writes from several connections are all applied"""
+    def writer(n):
+        with StorageClient(daemon.socket_path) as client:
+            for i in range(20):
+                client.create_task(title=f"Task {n}-{i}")
+    
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert len(daemon.backend.list_tasks()) == 100
+
+
+def test_connect_and_is_running(tmp_path, daemon):
+    """Test discovery of a running daemon, and cleanup on stop"""
+    assert is_running(daemon.socket_path)
+    assert connect(tmp_path / "missing.sock") is None
+    
+    client = connect(daemon.socket_path)
+    assert client is not None
+    client.close()
+    
+    daemon.stop()
+    assert not is_running(daemon.socket_path)
+    assert not daemon.socket_path.exists()
+
+
+def test_sqlite_backend_serves_crud(tmp_path, monkeypatch):
+    """Test that the SQLite backend exposes note and task CRUD"""
+    import core.database as database
+    from core.daemon import SQLITE_METHODS, SQLiteBackend
+    
+    monkeypatch.setattr(database, "DB_PATH", tmp_path / "knowledgeflow.db")
+    daemon = StorageDaemon(SQLiteBackend(), tmp_path / "kf.sock", SQLITE_METHODS,
+                           backend_name="sqlite")
+    daemon.start()
+    try:
+        # The JSON CLI must not mistake it for its own daemon
+        assert connect(daemon.socket_path) is None
+        
+        with connect(daemon.socket_path, backend="sqlite") as client:
+            assert not hasattr(client, "resolve_prefix")
+            note = client.create_note("Over the socket", content="sqlite", tags=["s"])
+            task = client.create_task("Serve CRUD", linked_note_id=note["id"])
+            
+            assert client.get_note(note["id"]) == note
+            assert client.update_task(task["id"], status="completed")["completed_at"]
+            assert [n["id"] for n in client.iter_notes(tag="s")] == [note["id"]]
+            assert [t["title"] for t in client.list_tasks(status="completed")] == ["Serve CRUD"]
+            assert client.delete_task(task["id"]) is True
+            assert client.get_task(task["id"]) is None
+    finally:
+        daemon.stop()
+        database.close_connections()
+
+
+def test_backends_get_their_own_sockets(tmp_path, monkeypatch):
+    """Test that a SQLite daemon doesn't default to the JSON CLI's socket"""
+    from core.client import default_socket_path
+    
+    monkeypatch.delenv("KNOWLEDGEFLOW_SOCKET", raising=False)
+    assert default_socket_path(tmp_path) != default_socket_path(tmp_path, "sqlite")
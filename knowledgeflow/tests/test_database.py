@@ -0,0 +1,122 @@
+"""
+Tests for the SQLite connection manager
+"""
+
+import threading
+import pytest
+import core.database as database
+from core.database import init_database, get_connection, connection, close_connections
+from core.categories import create_category, delete_category, get_category, iter_categories
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """Point the core database at a temporary file"""
+    monkeypatch.setattr(database, "DB_PATH", tmp_path / "knowledgeflow.db")
+    init_database()
+    yield database.DB_PATH
+    close_connections()
+
+
+def test_connection_reused_within_thread(db):
+    """Test that a thread gets the same connection back"""
+    first = get_connection()
+    first.close()
+    second = get_connection()
+    second.close()
+    
+    assert first is second
+
+
+def test_connection_per_thread(db):
+    """Test that other threads get their own connection"""
+    main_conn = get_connection()
+    main_conn.close()
+    
+    seen = []
+    thread = threading.Thread(target=lambda: seen.append(get_connection()))
+    thread.start()
+    thread.join()
+    
+    assert seen[0] is not main_conn
+
+
+def test_pragmas_applied(db):
+    """Test that new connections are configured"""
+    with connection() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+
+
+def test_close_rolls_back_open_transaction(db):
+    """Test that closing without commit discards changes, as before"""
+    conn = get_connection()
+    conn.execute("INSERT INTO categories (name, created_at) VALUES ('Temp', 'now')")
+    conn.close()
+    
+    with connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM categories").fetchone()[0] == 0
+
+
+def test_context_manager_commits_and_rolls_back(db):
+    """Test commit on success and rollback on error"""
+    with connection() as conn:
+        conn.execute("INSERT INTO categories (name, created_at) VALUES ('Kept', 'now')")
+    
+    with pytest.raises(RuntimeError):
+        with connection() as conn:
+            conn.execute("INSERT INTO categories (name, created_at) VALUES ('Lost', 'now')")
+            raise RuntimeError("boom")
+    
+    with connection() as conn:
+        names = [row['name'] for row in conn.execute("SELECT name FROM categories")]
+    assert names == ["Kept"]
+
+
+def test_reconnects_after_file_replaced(db):
+    """Test that a deleted database file is not served from a stale connection"""
+    get_connection().close()
+    db.unlink()
+    init_database()
+    
+    with connection() as conn:
+        conn.execute("INSERT INTO categories (name, created_at) VALUES ('Fresh', 'now')")
+    assert db.exists()
+
+
+def test_delete_category_with_children(db):
+    """Test that deleting a parent clears items filed under its children"""
+    parent = create_category("Work")
+    child = create_category("Meetings", parent_id=parent)
+    with connection() as conn:
+        conn.execute(
+            "INSERT INTO notes (title, category_id, created_at, updated_at) VALUES ('n', ?, 'now', 'now')",
+            (child,)
+        )
+    
+    assert delete_category(parent)
+    assert get_category(child) is None
+    with connection() as conn:
+        assert conn.execute("SELECT category_id FROM notes").fetchone()[0] is None
+
+
+def test_iter_categories_pages(db):
+    """Test keyset paging through categories in name order"""
+    for name in ["Delta", "Alpha", "Charlie", "Bravo"]:
+        create_category(name, type='task' if name == "Charlie" else 'note')
+    
+    first = list(iter_categories(limit=2))
+    assert [c.name for c in first] == ["Alpha", "Bravo"]
+    
+    rest = list(iter_categories(after_id=first[-1].id, batch_size=1))
+    assert [c.name for c in rest] == ["Charlie", "Delta"]
+    assert [c.name for c in iter_categories(type='task')] == ["Charlie"]
+    
+    # Abandoning a stream must not roll back other work on the thread's connection
+    stream = iter_categories(batch_size=1)
+    next(stream)
+    with connection() as conn:
+        conn.execute("UPDATE categories SET name = 'Echo' WHERE name = 'Delta'")
+        stream.close()
+    assert [c.name for c in iter_categories()][-1] == "Echo"
@@ -0,0 +1,105 @@
+"""
+Tests for file locking and concurrent JSONStorage writers
+"""
+
+import multiprocessing
+import os
+
+import pytest
+
+from core.file_lock import FileLock, LockTimeout, atomic_write_json
+from core.json_storage import JSONStorage, VersionConflict
+
+fcntl = pytest.importorskip("fcntl")
+
+
+def _create_tasks(data_dir, worker, count):
+    storage = JSONStorage(data_dir=data_dir, journal_threshold=40)
+    for i in range(count):
+        storage.create_task(f"Task {worker}-{i}")
+
+
+def _increment(data_dir, task_id, count):
+    storage = JSONStorage(data_dir=data_dir, journal_threshold=40)
+    for _ in range(count):
+        storage.modify("task", task_id,
+                       lambda task: {"description": str(int(task["description"]) + 1)},
+                       retries=1000)
+
+
+def _run(target, *args_list):
+    context = multiprocessing.get_context("fork")
+    processes = [context.Process(target=target, args=args) for args in args_list]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=60)
+        assert process.exitcode == 0
+
+
+def test_lock_is_reentrant_and_exclusive(tmp_path):
+    """Test nesting, the no-upgrade rule and blocking between holders"""
+    lock = FileLock(tmp_path / "data.lock")
+    other = FileLock(tmp_path / "data.lock", timeout=0.05)
+    
+    with lock():
+        with lock(shared=True):
+            lock.write(b"42")
+        assert lock.read() == b"42"
+        with pytest.raises(LockTimeout):
+            other.acquire(shared=True)
+    assert not lock.held
+    
+    with lock(shared=True):
+        with other(shared=True):
+            pass
+        with pytest.raises(RuntimeError):
+            lock.acquire()
+
+
+def test_atomic_write_uses_unique_temp_files(tmp_path):
+    """Test that no fixed .tmp name is used or left behind"""
+    target = tmp_path / "data.json"
+    atomic_write_json(target, {"a": 1})
+    atomic_write_json(target, {"a": 2})
+    
+    assert target.read_text() == '{"a": 2}'
+    assert os.listdir(tmp_path) == ["data.json"]
+
+
+def test_concurrent_writers_lose_nothing(tmp_path):
+    """Test that processes creating tasks at once, with compactions, all land"""
+    JSONStorage(data_dir=tmp_path)
+    _run(_create_tasks, *[(tmp_path, worker, 50) for worker in range(4)])
+    
+    titles = {task["title"] for task in JSONStorage(data_dir=tmp_path).list_tasks()}
+    assert titles == {f"Task {w}-{i}" for w in range(4) for i in range(50)}
+
+
+def test_compare_and_update(tmp_path):
+    """Test that a stale version is rejected and a fresh one accepted"""
+    first = JSONStorage(data_dir=tmp_path)
+    second = JSONStorage(data_dir=tmp_path)
+    task = first.create_task("Shared", description="0")
+    
+    record, version = first.get_versioned("task", task["id"])
+    assert record["description"] == "0"
+    second.update_task(task["id"], description="changed")
+    assert first.version("task") > version
+    
+    with pytest.raises(VersionConflict):
+        first.compare_and_update("task", task["id"], version, description="1")
+    
+    record, version = first.get_versioned("task", task["id"])
+    assert record["description"] == "changed"
+    assert first.compare_and_update("task", task["id"], version, description="1")["description"] == "1"
+    assert first.compare_and_update("task", "missing", version, description="1") is None
+    assert first.get_versioned("task", "missing")[0] is None
+
+
+def test_modify_retries_under_contention(tmp_path):
+    """Test read-modify-write increments from several processes"""
+    task = JSONStorage(data_dir=tmp_path).create_task("Counter", description="0")
+    _run(_increment, *[(tmp_path, task["id"], 25) for _ in range(4)])
+    
+    assert JSONStorage(data_dir=tmp_path).get_task(task["id"])["description"] == "100"
@@ -103,6 +103,9 @@ class TestJSONStorage:
         
         results = temp_storage.search_notes("javascript")
         assert len(results) == 1
+        
+        # A partial word matches by prefix
+        assert [n["title"] for n in temp_storage.search_notes("tut")] == ["Python Tutorial"]
     
     # ===== TASK TESTS =====
     
@@ -223,6 +226,41 @@ class TestJSONStorage:
         links = temp_storage.get_links(task["id"])
         assert len(links) == 0
     
+    def test_link_directions_and_dedup(self, temp_storage):
+        """Test forward/backlink lookups and that a pair is only linked once"""
+        a = temp_storage.create_note(title="A")
+        b = temp_storage.create_note(title="B")
+        
+        first = temp_storage.create_link(a["id"], b["id"])
+        assert temp_storage.create_link(a["id"], b["id"], link_type="other") == first
+        back = temp_storage.create_link(b["id"], a["id"])
+        
+        assert temp_storage.get_links(a["id"], direction="out") == [first]
+        assert temp_storage.get_links(a["id"], direction="in") == [back]
+        assert temp_storage.get_links(a["id"]) == [first, back]
+        assert temp_storage.bulk_link([(a["id"], b["id"]), (a["id"], a["id"])]) == 1
+        
+        # The indexes are rebuilt from disk in a fresh instance
+        reloaded = JSONStorage(data_dir=temp_storage.data_dir)
+        assert len(reloaded.get_links(a["id"])) == 3
+        assert reloaded.create_link(b["id"], a["id"]) == back
+    
+    def test_delete_without_links_leaves_links_alone(self, temp_storage):
+        """Test that deleting an unlinked item doesn't touch the links files"""
+        a = temp_storage.create_note(title="A")
+        b = temp_storage.create_note(title="B")
+        lonely = temp_storage.create_task(title="Lonely")
+        temp_storage.create_link(a["id"], b["id"])
+        temp_storage.compact()
+        
+        links_files = sorted(temp_storage.data_dir.glob("links*"))
+        before = [(p, p.stat().st_mtime_ns) for p in links_files]
+        temp_storage.delete_task(lonely["id"])
+        assert [(p, p.stat().st_mtime_ns) for p in sorted(temp_storage.data_dir.glob("links*"))] == before
+        
+        temp_storage.delete_note(b["id"])
+        assert temp_storage.get_links(a["id"]) == []
+    
     # ===== UNIFIED SEARCH TEST =====
     
     def test_search_all(self, temp_storage):
@@ -235,3 +273,309 @@ class TestJSONStorage:
         
         assert len(results["notes"]) == 1
         assert len(results["tasks"]) == 1
+
+
+class TestResidentCache:
+    """Test suite for the resident in-memory cache"""
+    
+    def test_reads_file_once(self, temp_storage, monkeypatch):
+        """Test that lookups are served from memory once loaded"""
+        note = temp_storage.create_note(title="Cached")
+        temp_storage.list_notes()
+        
+        calls = []
+        original = temp_storage._read_json
+        monkeypatch.setattr(temp_storage, "_read_json",
+                            lambda path: calls.append(path) or original(path))
+        
+        for _ in range(5):
+            assert temp_storage.get_note(note["id"])["title"] == "Cached"
+        temp_storage.list_notes(tag="missing")
+        
+        assert calls == []
+    
+    def test_external_write_invalidates(self, temp_storage):
+        """Test that a change made by another instance is picked up"""
+        note = temp_storage.create_note(title="Before")
+        other = JSONStorage(data_dir=temp_storage.data_dir)
+        other.update_note(note["id"], title="After, with a longer title")
+        
+        assert temp_storage.get_note(note["id"])["title"] == "After, with a longer title"
+    
+    def test_returned_records_are_copies(self, temp_storage):
+        """Test that mutating a returned record does not touch the cache"""
+        note = temp_storage.create_note(title="Original", tags=["a"])
+        fetched = temp_storage.get_note(note["id"])
+        fetched["title"] = "Mutated"
+        fetched["tags"].append("b")
+        
+        again = temp_storage.get_note(note["id"])
+        assert again["title"] == "Original"
+        assert again["tags"] == ["a"]
+    
+    def test_indexes_follow_updates(self, temp_storage):
+        """Test that status/priority/tag indexes track updates and deletes"""
+        task = temp_storage.create_task(title="Task", status="pending", priority="low")
+        temp_storage.create_task(title="Other", status="pending", priority="high")
+        temp_storage.update_task(task["id"], status="completed")
+        
+        assert [t["title"] for t in temp_storage.list_tasks(status="pending")] == ["Other"]
+        assert len(temp_storage.list_tasks(status="completed", priority="low")) == 1
+        
+        temp_storage.delete_task(task["id"])
+        assert temp_storage.list_tasks(status="completed") == []
+    
+    def test_non_resident_mode(self, temp_storage):
+        """Test that resident=False still behaves the same"""
+        storage = JSONStorage(data_dir=temp_storage.data_dir, resident=False)
+        note = storage.create_note(title="Plain", tags=["x"])
+        
+        assert storage.get_note(note["id"])["title"] == "Plain"
+        assert len(storage.list_notes(tag="x")) == 1
+
+
+class TestJournal:
+    """Test suite for the append-only mutation journal"""
+    
+    def test_writes_append_to_journal(self, temp_storage):
+        """Test that mutations go to the journal, not the snapshot"""
+        note = temp_storage.create_note(title="Journaled")
+        temp_storage.update_note(note["id"], title="Renamed")
+        
+        assert temp_storage._read_json(temp_storage.notes_file) == []
+        journal = temp_storage.data_dir / "notes.journal.jsonl"
+        assert len(journal.read_text().splitlines()) == 2
+    
+    def test_replay_over_snapshot(self, temp_storage):
+        """Test that a fresh instance replays the journal"""
+        keep = temp_storage.create_note(title="Keep", tags=["a"])
+        drop = temp_storage.create_note(title="Drop")
+        temp_storage.update_note(keep["id"], title="Kept")
+        temp_storage.delete_note(drop["id"])
+        
+        fresh = JSONStorage(data_dir=temp_storage.data_dir)
+        notes = fresh.list_notes()
+        assert [n["title"] for n in notes] == ["Kept"]
+        assert len(fresh.list_notes(tag="a")) == 1
+    
+    def test_compaction_threshold(self, temp_storage):
+        """Test that the journal is folded into the snapshot past the threshold"""
+        storage = JSONStorage(data_dir=temp_storage.data_dir, journal_threshold=3)
+        for i in range(3):
+            storage.create_task(title=f"Task {i}")
+        
+        assert not (storage.data_dir / "tasks.journal.jsonl").exists()
+        assert len(storage._read_json(storage.tasks_file)) == 3
+        assert len(JSONStorage(data_dir=storage.data_dir).list_tasks()) == 3
+    
+    def test_manual_compact(self, temp_storage):
+        """Test compacting every collection on demand"""
+        note = temp_storage.create_note(title="Note")
+        task = temp_storage.create_task(title="Task")
+        temp_storage.create_link(note["id"], task["id"])
+        temp_storage.compact()
+        
+        assert list(temp_storage.data_dir.glob("*.journal.jsonl")) == []
+        assert len(temp_storage._read_json(temp_storage.links_file)) == 1
+        assert len(temp_storage.get_links(task["id"])) == 1
+    
+    def test_torn_tail_is_ignored(self, temp_storage):
+        """Test that a partially written last entry does not break replay"""
+        temp_storage.create_note(title="Whole")
+        with open(temp_storage.data_dir / "notes.journal.jsonl", "a") as f:
+            f.write('{"op": "create", "rec')
+        
+        fresh = JSONStorage(data_dir=temp_storage.data_dir)
+        assert [n["title"] for n in fresh.list_notes()] == ["Whole"]
+        
+        fresh.create_note(title="After")
+        again = JSONStorage(data_dir=temp_storage.data_dir)
+        assert [n["title"] for n in again.list_notes()] == ["Whole", "After"]
+
+
+class TestResolvePrefix:
+    """Test short-ID lookups"""
+    
+    def test_unique_prefix(self, temp_storage):
+        """Test that a short ID resolves to the one matching record"""
+        note = temp_storage.create_note(title="Note")
+        temp_storage.create_note(title="Other")
+        
+        assert temp_storage.resolve_prefix("note", note["id"][:8]) == [note["id"]]
+        assert temp_storage.resolve_prefix("note", note["id"]) == [note["id"]]
+        assert temp_storage.resolve_prefix("task", note["id"][:8]) == []
+    
+    def test_ambiguous_prefix_returns_all(self, temp_storage, monkeypatch):
+        """Test that colliding prefixes return every candidate, sorted"""
+        ids = iter(["abc123", "abd456", "abc789", "zzz000"])
+        monkeypatch.setattr("core.json_storage.uuid.uuid4", lambda: next(ids))
+        for i in range(4):
+            temp_storage.create_note(title=f"Note {i}")
+        
+        assert temp_storage.resolve_prefix("note", "abc") == ["abc123", "abc789"]
+        assert temp_storage.resolve_prefix("note", "ab") == ["abc123", "abc789", "abd456"]
+        assert temp_storage.resolve_prefix("note", "abe") == []
+        assert temp_storage.resolve_prefix("note", "ABC") == ["abc123", "abc789"]
+    
+    def test_imported_ids_keep_their_case(self, temp_storage):
+        """Test that imported mixed-case IDs resolve by prefix"""
+        temp_storage.bulk_create("note", [{"id": "Imported-A1", "title": "Old"}])
+        
+        assert temp_storage.resolve_prefix("note", "Imp") == ["Imported-A1"]
+        assert temp_storage.resolve_prefix("note", "imp") == []
+    
+    def test_tracks_deletes_and_reloads(self, temp_storage):
+        """Test that the prefix index follows deletes and survives a reload"""
+        tasks = [temp_storage.create_task(title=f"Task {i}") for i in range(5)]
+        temp_storage.delete_task(tasks[0]["id"])
+        
+        assert temp_storage.resolve_prefix("task", tasks[0]["id"]) == []
+        fresh = JSONStorage(data_dir=temp_storage.data_dir)
+        assert fresh.resolve_prefix("task", tasks[1]["id"][:8]) == [tasks[1]["id"]]
+        assert len(fresh.resolve_prefix("task", "")) == 4
+    
+    def test_unknown_kind(self, temp_storage):
+        """Test that an unknown kind is rejected"""
+        with pytest.raises(ValueError):
+            temp_storage.resolve_prefix("link", "abc")
+
+
+class TestShardedLayout:
+    """Test the sharded snapshot layout and migrations"""
+    
+    @pytest.fixture
+    def sharded_storage(self, tmp_path):
+        return JSONStorage(data_dir=tmp_path, sharded=True, journal_threshold=1)
+    
+    def test_creates_manifest(self, sharded_storage):
+        """Test that a new sharded store has a manifest and no notes.json"""
+        assert (sharded_storage.data_dir / "notes" / "manifest.json").exists()
+        assert not sharded_storage.notes_file.exists()
+        assert sharded_storage.list_notes() == []
+    
+    def test_update_rewrites_only_touched_shard(self, sharded_storage):
+        """Test that compaction only rewrites the shard holding the record"""
+        notes = [sharded_storage.create_note(title=f"Note {i}") for i in range(40)]
+        shard_dir = sharded_storage.data_dir / "notes"
+        before = {p.name: p.stat().st_mtime_ns for p in shard_dir.glob("*.json")}
+        
+        target = notes[7]
+        sharded_storage.update_note(target["id"], content="changed")
+        
+        after = {p.name: p.stat().st_mtime_ns for p in shard_dir.glob("*.json")}
+        changed = {name for name in after if after[name] != before.get(name)}
+        assert changed == {f"{target['id'][:2]}.json", "manifest.json"}
+    
+    def test_round_trip_through_reload(self, sharded_storage):
+        """Test that records, order and deletes survive a reload"""
+        notes = [sharded_storage.create_note(title=f"Note {i}", tags=["t"]) for i in range(10)]
+        sharded_storage.delete_note(notes[3]["id"])
+        
+        fresh = JSONStorage(data_dir=sharded_storage.data_dir)
+        titles = [n["title"] for n in fresh.list_notes(tag="t")]
+        assert titles == [f"Note {i}" for i in range(10) if i != 3]
+        assert fresh.search_notes("note")
+    
+    def test_journal_replays_over_shards(self, tmp_path):
+        """Test that uncompacted journal entries apply on top of the shards"""
+        storage = JSONStorage(data_dir=tmp_path, sharded=True)
+        task = storage.create_task(title="Task")
+        storage.update_task(task["id"], status="completed")
+        
+        fresh = JSONStorage(data_dir=tmp_path)
+        assert fresh.get_task(task["id"])["status"] == "completed"
+        fresh.compact()
+        assert not list(tmp_path.glob("*.journal.jsonl"))
+        assert JSONStorage(data_dir=tmp_path).get_task(task["id"])["status"] == "completed"
+    
+    def test_migrate_to_sharded_and_back(self, temp_storage):
+        """Test converting existing single-file data both ways"""
+        notes = [temp_storage.create_note(title=f"Note {i}") for i in range(20)]
+        temp_storage.create_task(title="Task")
+        
+        temp_storage.migrate_layout(sharded=True)
+        data_dir = temp_storage.data_dir
+        assert not temp_storage.notes_file.exists()
+        assert not list(data_dir.glob("*.journal.jsonl"))
+        fresh = JSONStorage(data_dir=data_dir)
+        assert [n["id"] for n in fresh.list_notes()] == [n["id"] for n in notes]
+        assert len(fresh.list_tasks()) == 1
+        
+        fresh.create_note(title="Late")
+        fresh.migrate_layout(sharded=False)
+        assert not (data_dir / "notes").exists()
+        again = JSONStorage(data_dir=data_dir)
+        assert len(again.list_notes()) == 21
+        assert len(again._read_json(again.notes_file)) == 21
+    
+    def test_reshard_with_new_prefix_len(self, sharded_storage):
+        """Test changing the shard prefix length removes the old shards"""
+        for i in range(10):
+            sharded_storage.create_note(title=f"Note {i}")
+        
+        sharded_storage.migrate_layout(sharded=True, prefix_len=1)
+        
+        shard_names = {p.stem for p in (sharded_storage.data_dir / "notes").glob("*.json")}
+        assert all(len(name) == 1 for name in shard_names - {"manifest"})
+        assert len(JSONStorage(data_dir=sharded_storage.data_dir).list_notes()) == 10
+
+
+class TestIterators:
+    """Test the streaming iter_notes/iter_tasks APIs"""
+    
+    def test_pages_with_after_id(self, temp_storage):
+        """Test keyset pagination over notes in ID order"""
+        notes = [temp_storage.create_note(title=f"Note {i}") for i in range(7)]
+        
+        pages, after_id = [], None
+        while True:
+            page = list(temp_storage.iter_notes(after_id=after_id, limit=3))
+            if not page:
+                break
+            pages.append([n["id"] for n in page])
+            after_id = page[-1]["id"]
+        
+        ids = sorted(n["id"] for n in notes)
+        assert pages == [ids[0:3], ids[3:6], ids[6:]]
+        assert [n["id"] for n in temp_storage.iter_notes()] == ids
+    
+    def test_filters_and_projection(self, temp_storage):
+        """Test server-side filtering and field projection"""
+        temp_storage.create_task(title="A", status="completed", tags=["x"])
+        b = temp_storage.create_task(title="B", tags=["x"])
+        c = temp_storage.create_task(title="C", tags=["x"])
+        
+        pending = list(temp_storage.iter_tasks(status="pending", tag="x",
+                                               fields=("title", "tags")))
+        assert sorted(pending, key=lambda t: t["title"]) == [
+            {"id": b["id"], "title": "B", "tags": ["x"]},
+            {"id": c["id"], "title": "C", "tags": ["x"]}]
+        
+        pending[0]["tags"].append("mutated")
+        assert temp_storage.get_task(pending[0]["id"])["tags"] == ["x"]
+        
+        first, second = (t["id"] for t in pending)
+        after_first = list(temp_storage.iter_tasks(status="pending", after_id=first))
+        assert [t["id"] for t in after_first] == [second]
+    
+    def test_safe_to_modify_while_iterating(self, temp_storage):
+        """Test that creating and deleting during iteration does not break it"""
+        notes = sorted((temp_storage.create_note(title=f"Note {i}") for i in range(3)),
+                       key=lambda n: n["id"])
+        
+        seen = []
+        for note in temp_storage.iter_notes():
+            seen.append(note["id"])
+            if note["id"] == notes[0]["id"]:
+                temp_storage.delete_note(notes[1]["id"])
+        
+        assert seen == [notes[0]["id"], notes[2]["id"]]
+    
+    def test_deleted_after_id_resumes(self, temp_storage):
+        """Test that a cursor whose note was deleted still resumes at the next ID"""
+        ids = sorted(temp_storage.create_note(title=f"Note {i}")["id"] for i in range(5))
+        
+        temp_storage.delete_note(ids[1])
+        assert [n["id"] for n in temp_storage.iter_notes(after_id=ids[1])] == ids[2:]
+        assert list(temp_storage.iter_notes(after_id="~")) == []
+        assert [n["id"] for n in temp_storage.iter_notes(after_id="")] == [ids[0]] + ids[2:]
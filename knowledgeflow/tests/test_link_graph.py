@@ -0,0 +1,154 @@
+"""
+Tests for the in-memory link graph
+"""
+
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+import core.database as database
+from core.database import close_connections, connection, init_database
+from core.link_graph import LinkGraph
+from core.links import create_link, delete_link, sync_links
+from core.notes import create_note, delete_note
+
+
+@pytest.fixture
+def graph():
+    """1 -> 2 -> 3 -> 4, 1 -> 3 (related), 5 <-> 6, 7 alone"""
+    return LinkGraph.from_edges(
+        [(1, 2), (2, 3), (3, 4), (1, 3, "related"), (5, 6), (6, 5), (1, 2, "duplicate")],
+        notes=range(1, 8))
+
+
+def test_neighbors_and_neighborhood(graph):
+    """Test one-hop lookups and BFS distances in each direction"""
+    assert sorted(graph.neighbors(1)) == [(2, "reference"), (3, "related")]
+    assert graph.neighbors(3, direction="in") == [(1, "related"), (2, "reference")]
+    assert graph.link_count == 6
+    
+    assert graph.neighborhood(1, depth=2, direction="out") == {1: 0, 2: 1, 3: 1, 4: 2}
+    assert graph.neighborhood(4, depth=1, direction="in") == {4: 0, 3: 1}
+    assert graph.neighborhood(1, depth=5, link_types=["reference"]) == {1: 0, 2: 1, 3: 2, 4: 3}
+    assert graph.neighborhood(99) == {}
+
+
+def test_shortest_path(graph):
+    """Test fewest-hop paths, direction and type filters"""
+    assert graph.shortest_path(1, 4) == [1, 3, 4]
+    assert graph.shortest_path(1, 4, link_types="reference") == [1, 2, 3, 4]
+    assert graph.shortest_path(4, 1) is None
+    assert graph.shortest_path(4, 1, direction="in") == [4, 3, 1]
+    assert graph.shortest_path(1, 4, max_depth=1) is None
+    assert graph.shortest_path(1, 5) is None
+    assert graph.shortest_path(7, 7) == [7]
+
+
+def test_incremental_updates(graph):
+    """Test that overlay links and removals are seen before and after compaction"""
+    assert graph.add_link(4, 5, "wikilink")
+    assert not graph.add_link(1, 2)
+    assert graph.shortest_path(1, 6) == [1, 3, 4, 5, 6]
+    
+    assert graph.remove_link(1, 3)
+    assert not graph.remove_link(1, 3)
+    assert graph.shortest_path(1, 6) == [1, 2, 3, 4, 5, 6]
+    
+    assert graph.remove_note(3)
+    assert 3 not in graph and len(graph) == 6
+    assert graph.shortest_path(1, 6) is None
+    assert graph.neighbors(2) == []
+    
+    before = (graph.components(), graph.neighborhood(4, depth=3))
+    graph.compact()
+    assert (graph.components(), graph.neighborhood(4, depth=3)) == before
+    assert graph.link_count == 4
+
+
+def test_components(graph):
+    """Test weakly connected components, largest first"""
+    assert [sorted(c) for c in graph.components()] == [[1, 2, 3, 4], [5, 6], [7]]
+    
+    graph.add_link(7, 1)
+    assert sorted(graph.components()[0]) == [1, 2, 3, 4, 7]
+
+
+def test_pagerank():
+    """Test PageRank against a hand-checked star and a dangling node"""
+    # Everyone links to the hub; the hub links nowhere
+    graph = LinkGraph.from_edges([(leaf, 0) for leaf in range(1, 5)])
+    ranks = graph.pagerank()
+    
+    assert sum(ranks.values()) == pytest.approx(1.0)
+    assert graph.most_central(1)[0][0] == 0
+    assert ranks[1] == pytest.approx(ranks[4])
+    assert ranks[0] > 3 * ranks[1]
+    
+    graph.add_link(0, 1)
+    assert graph.most_central(2)[1][0] == 1
+
+
+def test_large_graph_matches_small_steps():
+    """Test the vectorized traversals on a random graph against a plain BFS"""
+    rng = np.random.default_rng(7)
+    edges = {(int(a), int(b)) for a, b in rng.integers(0, 2000, size=(8000, 2))}
+    graph = LinkGraph.from_edges(sorted(edges), notes=range(2000))
+    
+    out = {}
+    for a, b in edges:
+        out.setdefault(a, set()).add(b)
+    expected, frontier = {0: 0}, [0]
+    for hops in range(1, 4):
+        frontier = [b for a in frontier for b in out.get(a, ()) if b not in expected]
+        expected.update((b, hops) for b in frontier)
+    assert graph.neighborhood(0, depth=3, direction="out") == expected
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """Point the core database at a temporary file"""
+    monkeypatch.setattr(database, "DB_PATH", tmp_path / "knowledgeflow.db")
+    init_database()
+    yield database.DB_PATH
+    close_connections()
+
+
+def add_note(title, content=""):
+    now = datetime.now().isoformat()
+    with connection() as conn:
+        return conn.execute(
+            "INSERT INTO notes (title, content, created_at, updated_at) VALUES (?, ?, ?, ?)",
+            (title, content, now, now)
+        ).lastrowid
+
+
+def test_tracks_database_changes(db):
+    """Test that a loaded graph follows create_link/delete_link/sync_links"""
+    a, b, c = add_note("A"), add_note("B"), add_note("C")
+    create_link(a, b)
+    graph = LinkGraph.from_database()
+    assert graph.neighbors(a) == [(b, "reference")]
+    
+    create_link(b, c, "related")
+    assert graph.shortest_path(a, c) == [a, b, c]
+    
+    delete_link(a, b)
+    sync_links(a, "See [[C]]")
+    assert graph.neighbors(a) == [(c, "wikilink")]
+    assert graph.neighbors(a) == LinkGraph.from_database(track=False).neighbors(a)
+
+
+def test_tracks_note_deletes(db):
+    """Test that deleting a note drops it and its links from a tracked graph"""
+    a, b = create_note("A").id, create_note("B").id
+    graph = LinkGraph.from_database()
+    c = create_note("C").id
+    create_link(a, b)
+    create_link(c, a)
+    assert c in graph
+    
+    assert delete_note(a)
+    assert a not in graph
+    assert graph.neighbors(c) == [] and graph.neighbors(b, direction="in") == []
+    assert set(graph.pagerank()) == {b, c}
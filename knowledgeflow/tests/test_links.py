@@ -0,0 +1,76 @@
+"""
+Tests for note linking
+"""
+
+import pytest
+from datetime import datetime
+import core.database as database
+from core.database import init_database, connection, close_connections
+from core.links import (
+    create_link, get_forward_links, auto_create_links, sync_links, resolve_titles, WIKILINK
+)
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """Point the core database at a temporary file"""
+    monkeypatch.setattr(database, "DB_PATH", tmp_path / "knowledgeflow.db")
+    init_database()
+    yield database.DB_PATH
+    close_connections()
+
+
+def add_note(title, content=""):
+    """Insert a note row directly"""
+    now = datetime.now().isoformat()
+    with connection() as conn:
+        cursor = conn.execute(
+            "INSERT INTO notes (title, content, created_at, updated_at) VALUES (?, ?, ?, ?)",
+            (title, content, now, now)
+        )
+        return cursor.lastrowid
+
+
+def test_resolve_titles(db):
+    """Test resolving many titles, including unknown and duplicate ones"""
+    first = add_note("Python")
+    add_note("Python")
+    rust = add_note("Rust")
+    
+    titles = ["Python", "Rust", "Missing", "Python"] + [f"T{i}" for i in range(1200)]
+    
+    assert resolve_titles(titles) == {"Python": first, "Rust": rust}
+
+
+def test_auto_create_links_many(db):
+    """Test that every referenced note is linked in one pass"""
+    targets = [add_note(f"Note {i}") for i in range(50)]
+    content = " ".join(f"[[Note {i}]]" for i in range(50)) + " [[Nowhere]]"
+    source = add_note("Hub", content)
+    
+    assert auto_create_links(source, content) == 50
+    assert auto_create_links(source, content) == 0
+    assert sorted(link[0] for link in get_forward_links(source)) == targets
+
+
+def test_sync_removes_dropped_links(db):
+    """Test that removing [[Title]] from content removes the link"""
+    python = add_note("Python")
+    rust = add_note("Rust")
+    source = add_note("Languages")
+    
+    assert sync_links(source, "[[Python]] and [[Rust]]") == (2, 0)
+    assert sync_links(source, "only [[Rust]] now") == (0, 1)
+    
+    assert [link[0] for link in get_forward_links(source)] == [rust]
+    assert get_forward_links(source)[0][2] == WIKILINK
+
+
+def test_sync_keeps_manual_links_and_skips_self(db):
+    """Test that hand-made links survive and notes don't link to themselves"""
+    other = add_note("Other")
+    source = add_note("Self")
+    create_link(source, other, "related")
+    
+    assert sync_links(source, "see [[Self]]") == (0, 0)
+    assert [(link[0], link[2]) for link in get_forward_links(source)] == [(other, "related")]
@@ -0,0 +1,99 @@
+"""
+Tests for schema migrations and query plans
+"""
+
+import sqlite3
+import pytest
+import core.database as database
+from core.database import (
+    init_database, migrate_existing_data, get_schema_version, connection,
+    close_connections, SCHEMA_VERSION
+)
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """Point the core database at a temporary file"""
+    monkeypatch.setattr(database, "DB_PATH", tmp_path / "knowledgeflow.db")
+    yield database.DB_PATH
+    close_connections()
+
+
+def test_fresh_database_is_current(db):
+    """Test that init_database leaves the schema at the latest version"""
+    init_database()
+    
+    assert get_schema_version() == SCHEMA_VERSION
+    assert migrate_existing_data() == 0
+
+
+def test_legacy_database_is_upgraded(db):
+    """Test that a prototype-era database gains columns, indexes and search"""
+    legacy = sqlite3.connect(db)
+    legacy.executescript("""
+        CREATE TABLE notes (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL,
+                            content TEXT, tags TEXT, created_at TEXT, updated_at TEXT);
+        CREATE TABLE tasks (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL,
+                            description TEXT, status TEXT DEFAULT 'pending',
+                            priority TEXT DEFAULT 'medium', due_date TEXT, created_at TEXT);
+        INSERT INTO notes (title, content, tags) VALUES ('Old note', 'kept content', '[]');
+    """)
+    legacy.close()
+    
+    init_database()
+    
+    with connection() as conn:
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(tasks)")]
+        indexes = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")]
+        found = conn.execute("SELECT rowid FROM notes_fts WHERE notes_fts MATCH 'kept'").fetchall()
+    
+    assert {'tags', 'category_id', 'linked_note_id', 'completed_at'} <= set(columns)
+    assert 'idx_note_links_target' in indexes
+    assert len(found) == 1
+    assert get_schema_version() == SCHEMA_VERSION
+
+
+HOT_QUERIES = {
+    "notes_by_category": (
+        "SELECT id, title, tags, created_at FROM notes WHERE category_id = ? ORDER BY created_at DESC",
+        (1,),
+    ),
+    "tasks_by_category": (
+        "SELECT id, title, status, priority, due_date FROM tasks WHERE category_id = ? ORDER BY priority, due_date",
+        (1,),
+    ),
+    "backlinks": (
+        "SELECT n.id, n.title, nl.link_type FROM note_links nl JOIN notes n ON nl.source_note_id = n.id "
+        "WHERE nl.target_note_id = ?",
+        (1,),
+    ),
+    "forward_links": (
+        "SELECT n.id, n.title, nl.link_type FROM note_links nl JOIN notes n ON nl.target_note_id = n.id "
+        "WHERE nl.source_note_id = ?",
+        (1,),
+    ),
+    "note_by_title": ("SELECT id FROM notes WHERE title = ?", ("Python",)),
+    "tasks_by_status": ("SELECT * FROM tasks WHERE status = ? ORDER BY due_date", ("pending",)),
+    "child_categories": ("SELECT id FROM categories WHERE parent_id = ?", (1,)),
+    "notes_in_category_subtree": (
+        "SELECT id, title FROM notes WHERE category_id IN "
+        "(SELECT descendant_id FROM category_closure WHERE ancestor_id = ?) ORDER BY created_at DESC",
+        (1,),
+    ),
+    "category_ancestors": (
+        "SELECT ancestor_id FROM category_closure WHERE descendant_id = ? ORDER BY depth DESC",
+        (1,),
+    ),
+}
+
+
+@pytest.mark.parametrize("name", sorted(HOT_QUERIES))
+def test_hot_queries_do_not_scan(db, name):
+    """Test that hot queries are answered by index searches, not table scans"""
+    init_database()
+    sql, params = HOT_QUERIES[name]
+    
+    with connection() as conn:
+        plan = [row['detail'] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+    
+    assert not [step for step in plan if step.startswith("SCAN")], plan
@@ -0,0 +1,109 @@
+"""
+Tests for model hydration from database rows
+"""
+
+import json
+import sqlite3
+import tracemalloc
+import pytest
+from core.models import Category, Note, NoteRow, Task, TaskRow, compile_hydrator, hydrate
+
+
+@pytest.fixture
+def conn():
+    """In-memory database with the notes/tasks columns"""
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.execute("""
+        CREATE TABLE tasks (
+            id INTEGER PRIMARY KEY, title TEXT, description TEXT, status TEXT,
+            priority TEXT, due_date TEXT, tags TEXT, category_id INTEGER,
+            linked_note_id INTEGER, created_at TEXT, completed_at TEXT
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE notes (
+            id INTEGER PRIMARY KEY, title TEXT, content TEXT, tags TEXT,
+            category_id INTEGER, created_at TEXT, updated_at TEXT
+        )
+    """)
+    yield conn
+    conn.close()
+
+
+def add_tasks(conn, n):
+    conn.executemany(
+        "INSERT INTO tasks (title, description, status, priority, tags, created_at) "
+        "VALUES (?, NULL, 'pending', 'high', ?, '2024-01-01')",
+        [(f"Task {i}", json.dumps(["work", f"t{i}"])) for i in range(n)]
+    )
+
+
+def test_from_db_row_accepts_sqlite_row(conn):
+    """Test that from_db_row works on sqlite3.Row (which has no .get)"""
+    add_tasks(conn, 1)
+    conn.execute("INSERT INTO notes (title, content, tags, created_at, updated_at) "
+                 "VALUES ('N', NULL, '[\"a\"]', 'c', 'u')")
+    
+    task = Task.from_db_row(conn.execute("SELECT * FROM tasks").fetchone())
+    note = Note.from_db_row(conn.execute("SELECT * FROM notes").fetchone())
+    
+    assert task.title == "Task 0" and task.description == "" and task.tags == ["work", "t0"]
+    assert note.content == "" and note.tags == ["a"] and note.category_id is None
+
+
+def test_from_db_row_accepts_partial_dict():
+    """Test dict rows with only some columns keep defaults for the rest"""
+    task = Task.from_db_row({"id": 3, "title": "T", "tags": None, "extra": 1})
+    category = Category.from_db_row({"id": 1, "name": "C", "parent_id": 0, "type": "note",
+                                     "created_at": "now"})
+    
+    assert (task.id, task.status, task.tags) == (3, "pending", [])
+    assert category.parent_id is None
+
+
+def test_hydrator_is_cached():
+    """Test that the column mapping is compiled once per column list"""
+    columns = ("id", "title", "tags")
+    assert compile_hydrator(TaskRow, columns) is compile_hydrator(TaskRow, columns)
+
+
+def test_slim_rows_decode_tags_lazily(conn):
+    """Test that TaskRow keeps tags as text until they are read"""
+    add_tasks(conn, 3)
+    
+    rows = list(hydrate(conn.execute("SELECT * FROM tasks ORDER BY id"), TaskRow, batch_size=2))
+    
+    assert [r.title for r in rows] == ["Task 0", "Task 1", "Task 2"]
+    assert rows[1]._tags == '["work", "t1"]'
+    assert rows[1].tags == ["work", "t1"]
+    assert rows[1]._tags == ["work", "t1"]
+    assert not hasattr(rows[0], "__dict__")
+    assert rows[0].to_model() == Task.from_db_row(conn.execute("SELECT * FROM tasks WHERE id = 1").fetchone())
+
+
+def test_projection_into_slim_rows(conn):
+    """Test hydrating rows that only have some columns"""
+    conn.execute("INSERT INTO notes (title, content, tags) VALUES ('N', 'body', '[]')")
+    
+    rows = list(hydrate(conn.execute("SELECT id, title FROM notes"), NoteRow))
+    
+    assert rows == [NoteRow(id=1, title="N")]
+    assert rows[0].tags == []
+
+
+def test_slim_rows_use_less_memory(conn):
+    """Test that 10k TaskRows allocate well under the dataclass version"""
+    add_tasks(conn, 10000)
+    raw = conn.execute("SELECT * FROM tasks").fetchall()
+    
+    def allocated(cls):
+        build = compile_hydrator(cls, raw[0].keys())
+        tracemalloc.start()
+        objects = [build(row) for row in raw]
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del objects
+        return size
+    
+    assert allocated(TaskRow) < allocated(Task) * 0.6
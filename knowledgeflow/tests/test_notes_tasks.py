@@ -0,0 +1,70 @@
+"""
+Tests for note and task CRUD on the core SQLite database
+"""
+
+import pytest
+
+import core.database as database
+from core.database import close_connections, init_database
+from core.notes import create_note, delete_note, get_note, iter_notes, list_notes, update_note
+from core.tasks import create_task, delete_task, get_task, iter_tasks, list_tasks, update_task
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """Point the core database at a temporary file"""
+    monkeypatch.setattr(database, "DB_PATH", tmp_path / "knowledgeflow.db")
+    init_database()
+    yield database.DB_PATH
+    close_connections()
+
+
+def test_note_round_trip(db):
+    """Test create, get, update and delete of a note"""
+    note = create_note("First", content="Body", tags=["a", "b"])
+    
+    assert get_note(note.id) == note
+    updated = update_note(note.id, content="Changed", tags=["c"], title=None, bogus=1)
+    assert (updated.title, updated.content, updated.tags) == ("First", "Changed", ["c"])
+    assert delete_note(note.id) is True
+    assert get_note(note.id) is None
+    assert update_note(note.id, title="Gone") is None
+    assert delete_note(note.id) is False
+
+
+def test_notes_filter_and_stream(db):
+    """Test tag filtering and keyset paging over notes"""
+    ids = [create_note(f"Note {i}", tags=["even"] if i % 2 == 0 else []).id for i in range(5)]
+    
+    assert {n.id for n in list_notes(tag="even")} == set(ids[::2])
+    assert [n.id for n in iter_notes(batch_size=2)] == ids
+    assert [n.id for n in iter_notes(tag="even", after_id=ids[0], limit=1)] == [ids[2]]
+
+
+def test_task_round_trip(db):
+    """Test create, get, update and delete of a task, including completed_at"""
+    note = create_note("Spec")
+    task = create_task("Write it", priority="high", tags=["x"], linked_note_id=note.id)
+    
+    assert get_task(task.id) == task
+    done = update_task(task.id, status="completed")
+    assert done.completed_at is not None and done.priority == "high"
+    assert update_task(task.id, status="pending").completed_at is None
+    
+    # Deleting the linked note leaves the task in place
+    assert delete_note(note.id) is True
+    assert get_task(task.id).linked_note_id is None
+    assert delete_task(task.id) is True
+    assert update_task(task.id, title="Gone") is None
+
+
+def test_tasks_filter_and_stream(db):
+    """Test status/priority/tag filters on listing and streaming"""
+    a = create_task("A", priority="high", tags=["t"])
+    b = create_task("B", status="completed")
+    c = create_task("C", priority="high")
+    
+    assert [t.id for t in list_tasks(priority="high")] == [a.id, c.id]
+    assert [t.id for t in list_tasks(status="completed")] == [b.id]
+    assert [t.id for t in iter_tasks(tag="t")] == [a.id]
+    assert [t.id for t in iter_tasks(after_id=a.id, batch_size=1)] == [b.id, c.id]
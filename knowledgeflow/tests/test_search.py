@@ -0,0 +1,107 @@
+"""
+Tests for SQLite FTS5 search
+"""
+
+import json
+import pytest
+from datetime import datetime
+import core.database as database
+from core.database import init_database, get_connection, close_connections, rebuild_search_index
+from core import search
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """Point the core database at a temporary file"""
+    monkeypatch.setattr(database, "DB_PATH", tmp_path / "knowledgeflow.db")
+    init_database()
+    yield database.DB_PATH
+    close_connections()
+
+
+def add_note(title, content="", tags=None):
+    """Insert a note row directly"""
+    conn = get_connection()
+    now = datetime.now().isoformat()
+    cursor = conn.execute(
+        "INSERT INTO notes (title, content, tags, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+        (title, content, json.dumps(tags or []), now, now)
+    )
+    conn.commit()
+    conn.close()
+    return cursor.lastrowid
+
+
+def test_to_fts_query():
+    """Test that user input is quoted and prefixes are kept"""
+    assert search.to_fts_query("hello wor*") == '"hello" AND "wor"*'
+    assert search.to_fts_query("hello wor") == '"hello" AND "wor"*'
+    assert search.to_fts_query("a b", operator="or", prefix_last=False) == '"a" OR "b"'
+    assert search.to_fts_query("(*)") == ""
+
+
+def test_search_notes_ranked_with_snippet(db):
+    """Test bm25 ranking and highlighted snippets"""
+    add_note("Cooking", "A python is a snake")
+    add_note("Python Basics", "Variables and loops")
+    
+    hits = search.search_notes("python")
+    
+    assert [h['title'] for h in hits] == ["Python Basics", "Cooking"]
+    assert "[python]" in hits[1]['snippet']
+    assert hits[0]['score'] > hits[1]['score']
+
+
+def test_partial_last_word_matches(db):
+    """Test that a partial last word finds notes, as the old LIKE search did"""
+    add_note("Python Basics", "Variables and loops")
+    
+    assert [h['title'] for h in search.search_notes("pyth")] == ["Python Basics"]
+    assert [h['title'] for h in search.search_notes("loops basi")] == ["Python Basics"]
+    assert search.search_notes("pyth loops") == []
+
+
+def test_triggers_follow_updates_and_deletes(db):
+    """Test that the external-content index tracks the notes table"""
+    note_id = add_note("Draft", "about golang")
+    
+    conn = get_connection()
+    conn.execute("UPDATE notes SET content = 'about rust' WHERE id = ?", (note_id,))
+    conn.commit()
+    conn.close()
+    assert search.search_notes("golang") == []
+    assert len(search.search_notes("rust")) == 1
+    
+    conn = get_connection()
+    conn.execute("DELETE FROM notes WHERE id = ?", (note_id,))
+    conn.commit()
+    conn.close()
+    assert search.search_notes("rust") == []
+
+
+def test_search_tasks(db):
+    """Test task search over title, description and tags"""
+    conn = get_connection()
+    now = datetime.now().isoformat()
+    conn.execute(
+        "INSERT INTO tasks (title, description, tags, created_at) VALUES (?, ?, ?, ?)",
+        ("Write report", "quarterly numbers", '["work"]', now)
+    )
+    conn.commit()
+    conn.close()
+    
+    assert search.search_tasks("work report")[0]['status'] == "pending"
+    assert search.search_tasks("quart*")[0]['title'] == "Write report"
+
+
+def test_rebuild_indexes_existing_rows(db):
+    """Test that rows written without the triggers are picked up by a rebuild"""
+    conn = get_connection()
+    conn.execute("DROP TRIGGER notes_fts_insert")
+    conn.commit()
+    conn.close()
+    add_note("Legacy", "written before search existed")
+    assert search.search_notes("legacy") == []
+    
+    rebuild_search_index()
+    assert len(search.search_notes("legacy")) == 1
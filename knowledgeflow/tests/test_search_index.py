@@ -0,0 +1,140 @@
+"""
+Tests for the inverted full-text index
+"""
+
+import pytest
+from pathlib import Path
+import tempfile
+import shutil
+from core.search_index import InvertedIndex, tokenize
+from core.json_storage import JSONStorage
+
+
+@pytest.fixture
+def index():
+    """Create an index with a few documents"""
+    idx = InvertedIndex(("title", "content", "tags"))
+    idx.add({"id": "a", "title": "Python Tutorial", "content": "Learn Python programming", "tags": ["code"]})
+    idx.add({"id": "b", "title": "JavaScript Guide", "content": "Learn JavaScript", "tags": ["code"]})
+    idx.add({"id": "c", "title": "Cooking", "content": "Python is also a snake", "tags": []})
+    return idx
+
+
+@pytest.fixture
+def temp_storage():
+    """Create a temporary storage instance"""
+    temp_dir = Path(tempfile.mkdtemp())
+    storage = JSONStorage(data_dir=temp_dir)
+    yield storage
+    shutil.rmtree(temp_dir)
+
+
+class TestInvertedIndex:
+    """Test suite for InvertedIndex"""
+    
+    def test_tokenize(self):
+        """Test tokenization lowercases and splits on non-word characters"""
+        assert tokenize("Hello, World! re-use") == ["hello", "world", "re", "use"]
+    
+    def test_positions(self, index):
+        """Test that postings record token positions"""
+        assert index.postings["python"]["a"] == [0, 3]
+        assert index.postings["snake"]["c"] == [5]
+    
+    def test_single_term_ranked(self, index):
+        """Test that documents with more occurrences rank higher"""
+        ids = [doc_id for doc_id, _ in index.search("python")]
+        assert ids == ["a", "c"]
+    
+    def test_and_or(self, index):
+        """Test AND and OR multi-term queries"""
+        assert [d for d, _ in index.search("learn python")] == ["a"]
+        assert {d for d, _ in index.search("snake javascript", operator="or")} == {"b", "c"}
+        assert index.search("snake javascript") == []
+    
+    def test_prefix(self, index):
+        """Test prefix queries"""
+        assert {d for d, _ in index.search("java*")} == {"b"}
+        assert {d for d, _ in index.search("prog* python")} == {"a"}
+    
+    def test_last_term_is_prefix(self, index):
+        """Test that a partial last word still matches, as substring search used to"""
+        assert {d for d, _ in index.search("javasc")} == {"b"}
+        assert {d for d, _ in index.search("learn prog")} == {"a"}
+        assert index.search("prog learn") == []
+        assert index.search("javasc", prefix_last=False) == []
+    
+    def test_extend_matches_add(self, index):
+        """Test that bulk indexing builds the same sorted term list as one add at a time"""
+        records = [
+            {"id": "a", "title": "Python Tutorial", "content": "Learn Python programming", "tags": ["code"]},
+            {"id": "b", "title": "JavaScript Guide", "content": "Learn JavaScript", "tags": ["code"]},
+            {"id": "a", "title": "Python Basics", "content": "Loops", "tags": []},
+        ]
+        bulk = InvertedIndex(index.fields)
+        bulk.extend(records)
+        one_by_one = InvertedIndex(index.fields)
+        for record in records:
+            one_by_one.add(record)
+        
+        assert bulk._terms == one_by_one._terms == sorted(bulk.postings)
+        assert bulk.expand_prefix("p") == ["python"]
+        assert bulk.search("learn") == one_by_one.search("learn")
+    
+    def test_remove_and_update(self, index):
+        """Test that removed and re-added documents are reflected"""
+        index.remove("c")
+        assert [d for d, _ in index.search("python")] == ["a"]
+        assert "snake" not in index.postings
+        
+        index.add({"id": "a", "title": "Rust", "content": "", "tags": []})
+        assert index.search("python") == []
+        assert [d for d, _ in index.search("rust")] == ["a"]
+    
+    def test_save_and_load(self, index, tmp_path):
+        """Test persistence with a staleness stamp"""
+        path = tmp_path / "index.json"
+        index.save(path, (1, 2, 3))
+        
+        loaded = InvertedIndex.load(path, (1, 2, 3), index.fields)
+        assert loaded.search("python") == index.search("python")
+        assert InvertedIndex.load(path, (9, 9, 9), index.fields) is None
+
+
+class TestStorageSearch:
+    """Test suite for JSONStorage search backed by the index"""
+    
+    def test_ranked_by_bm25(self, temp_storage):
+        """Test that results come back by relevance, not file order"""
+        temp_storage.create_note(title="Misc", content="mentions python once among many other words here")
+        temp_storage.create_note(title="Python", content="python python")
+        
+        results = temp_storage.search_notes("python")
+        assert [n["title"] for n in results] == ["Python", "Misc"]
+    
+    def test_index_follows_mutations(self, temp_storage):
+        """Test that updates and deletes are reflected in search"""
+        note = temp_storage.create_note(title="Draft about Go")
+        temp_storage.update_note(note["id"], title="Final about Rust")
+        assert temp_storage.search_notes("go") == []
+        assert len(temp_storage.search_notes("rust")) == 1
+        
+        temp_storage.delete_note(note["id"])
+        assert temp_storage.search_notes("rust") == []
+    
+    def test_index_persisted_across_instances(self, temp_storage):
+        """Test that the index file is reused after compaction"""
+        temp_storage.create_task(title="Write report", tags=["work"])
+        temp_storage.compact()
+        assert (temp_storage.data_dir / "tasks.index.json").exists()
+        
+        fresh = JSONStorage(data_dir=temp_storage.data_dir)
+        fresh.create_task(title="Review report")
+        assert len(fresh.search_tasks("report")) == 2
+        assert len(fresh.search_tasks("work report")) == 1
+        assert len(fresh.search_all("rep*")["tasks"]) == 2
+    
+    def test_punctuation_query_falls_back(self, temp_storage):
+        """Test that queries without word characters still substring-match"""
+        temp_storage.create_note(title="C++ tips")
+        assert len(temp_storage.search_notes("++")) == 1
@@ -0,0 +1,145 @@
+"""
+Tests for embedding-based semantic search
+"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from core.json_storage import JSONStorage
+from core.semantic import HashingEmbedder, SemanticSearch, VectorIndex
+
+
+class CountingEmbedder(HashingEmbedder):
+    """HashingEmbedder that records how many texts it embedded"""
+    
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.embedded = 0
+    
+    def embed(self, texts):
+        self.embedded += len(texts)
+        return super().embed(texts)
+
+
+@pytest.fixture
+def storage(tmp_path):
+    """JSONStorage with a few notes"""
+    storage = JSONStorage(data_dir=tmp_path)
+    storage.create_note("Python packaging", "Building wheels with setuptools", ["python"])
+    storage.create_note("Sourdough", "Feeding the starter and baking bread", ["cooking"])
+    storage.create_note("Django views", "Class based views in a python web framework", ["python"])
+    return storage
+
+
+def test_hashing_embedder_is_deterministic():
+    """Test that the same text always gives the same unit vector"""
+    embedder = HashingEmbedder(dim=64)
+    first, second = embedder.embed(["hello world", "hello world"])
+    
+    assert first.dtype == np.float32
+    assert np.array_equal(first, second)
+    assert np.isclose(np.linalg.norm(first), 1.0)
+
+
+def test_search_ranks_related_notes_first(storage):
+    """Test that the closest note in wording ranks first"""
+    semantic = SemanticSearch(storage)
+    
+    results = semantic.search_notes("baking bread", k=2)
+    
+    assert len(results) == 2
+    assert results[0]["title"] == "Sourdough"
+    assert results[0]["score"] >= results[1]["score"]
+
+
+def test_sync_only_embeds_changed_records(storage):
+    """Test that unchanged records are not re-embedded"""
+    embedder = CountingEmbedder()
+    semantic = SemanticSearch(storage, embedder=embedder)
+    
+    assert semantic.sync("notes") == 3
+    assert semantic.sync("notes") == 0
+    
+    note = storage.list_notes()[0]
+    storage.update_note(note["id"], content="Publishing to PyPI")
+    assert semantic.sync("notes") == 1
+    assert embedder.embedded == 4
+
+
+def test_search_skips_sync_while_storage_is_unchanged(storage, monkeypatch):
+    """Test that queries don't rescan storage until its version moves"""
+    semantic = SemanticSearch(storage)
+    semantic.search_notes("bread")
+    
+    list_notes = storage.list_notes
+    scans = []
+    monkeypatch.setattr(storage, "list_notes", lambda: scans.append(1) or list_notes())
+    semantic.search_notes("bread")
+    semantic.search_notes("python")
+    assert scans == []
+    
+    storage.create_note("Rye bread", "Baking with rye")
+    assert semantic.search_notes("rye bread", k=1)[0]["title"] == "Rye bread"
+    assert scans == [1]
+
+
+def test_deleted_records_are_dropped(storage):
+    """Test that deleting a record removes it from the index"""
+    semantic = SemanticSearch(storage)
+    semantic.sync("notes")
+    
+    doomed = storage.search_notes("sourdough")[0]
+    storage.delete_note(doomed["id"])
+    
+    results = semantic.search_notes("baking bread", k=5)
+    assert doomed["id"] not in [r["id"] for r in results]
+    assert len(results) == 2
+
+
+def test_index_persists_across_instances(storage):
+    """Test that a new SemanticSearch reuses vectors stored on disk"""
+    SemanticSearch(storage).sync("notes")
+    
+    embedder = CountingEmbedder()
+    semantic = SemanticSearch(storage, embedder=embedder)
+    assert semantic.sync("notes") == 0
+    assert semantic.search_notes("web framework", k=1)[0]["title"] == "Django views"
+
+
+def test_changing_embedder_rebuilds(storage):
+    """Test that vectors from a different embedder are discarded"""
+    SemanticSearch(storage, embedder=HashingEmbedder(dim=128)).sync("notes")
+    
+    semantic = SemanticSearch(storage, embedder=HashingEmbedder(dim=64))
+    assert semantic.sync("notes") == 3
+
+
+def test_vector_index_grows_and_removes(tmp_path):
+    """Test upserts past capacity and swap-removal keep ids aligned"""
+    embedder = HashingEmbedder(dim=32)
+    index = VectorIndex(tmp_path / "items.vectors", embedder.name, embedder.dim)
+    ids = [f"id{i}" for i in range(100)]
+    texts = [f"item number {i}" for i in range(100)]
+    index.upsert(ids, embedder.embed(texts), texts)
+    
+    index.remove(["id0", "id50"])
+    index.save()
+    
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["items.meta.json", "items.vectors"]
+    
+    reopened = VectorIndex(tmp_path / "items.vectors", embedder.name, embedder.dim)
+    assert len(reopened) == 98
+    assert reopened.capacity >= 98
+    top_id, score = reopened.search(embedder.embed(["item number 99"])[0], k=1)[0]
+    assert top_id == "id99"
+    assert score == pytest.approx(1.0, abs=1e-5)
+
+
+def test_search_tasks(storage):
+    """Test semantic search over tasks"""
+    storage.create_task("Fix login bug", "Users cannot sign in with email")
+    storage.create_task("Water plants", "Garden and balcony")
+    semantic = SemanticSearch(storage)
+    
+    assert semantic.search_tasks("sign in problem", k=1)[0]["title"] == "Fix login bug"
@@ -0,0 +1,140 @@
+"""
+Startup-time budget for the CLI
+
+Runs `python -X importtime` on the CLI's entry modules in a fresh
+interpreter and fails if importing them gets slower than the budget,
+or if a heavy dependency (openai, rich.markdown, ...) starts being
+imported up front again.
+
+It also times a whole cold `cli_v2.py note list` run against an empty
+data directory, interpreter startup included.
+
+Budgets can be scaled for slow machines with KF_STARTUP_BUDGET_SCALE.
+Run this file directly for a report of the slowest imports:
+    python tests/test_startup.py [module]
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+# Milliseconds of import time allowed per entry module (median of several runs).
+# cli_v2 is held to the 100ms interactive-startup target; rich.console alone
+# accounts for roughly half of it
+BUDGETS_MS = {
+    "cli_v2": 100,
+    "commands": 70,
+    "core.json_storage": 80,
+    "core.client": 90,
+}
+
+# Milliseconds of wall-clock time allowed for a cold `cli_v2.py note list`
+COMMAND_BUDGET_MS = 100
+
+# Modules that must only be imported when a command actually needs them
+DEFERRED = ("openai", "agents.summarizer", "rich.markdown", "rich.table", "rich.panel",
+            "numpy", "sqlite3", "core.database", "socketserver", "socket")
+
+
+def import_profile(module: str, cache_dir: Path):
+    """
+    Import a module in a fresh interpreter under -X importtime
+    
+    Returns:
+        Tuple of (total import time in ms, {module name: cumulative ms})
+    """
+    env = dict(os.environ, PYTHONPATH=str(PROJECT_ROOT), PYTHONPYCACHEPREFIX=str(cache_dir))
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=PROJECT_ROOT, env=env, capture_output=True, text=True, check=True)
+    
+    modules = {}
+    total = 0
+    started = False
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line[13:]:
+            continue
+        _, cumulative, name = line[12:].split("|")
+        if not cumulative.strip().isdigit():
+            continue  # the header line
+        ms = int(cumulative) / 1000
+        modules[name.strip()] = ms
+        top_level = not name.startswith("  ")
+        # Lines before `site` is done belong to interpreter startup
+        if top_level and started:
+            total += ms
+        if top_level and name.strip() == "site":
+            started = True
+    return total, modules
+
+
+def median_import_ms(module: str, cache_dir: Path, runs: int = 7):
+    """Median import time over several runs, after one run to warm the bytecode cache"""
+    import_profile(module, cache_dir)
+    profiles = [import_profile(module, cache_dir) for _ in range(runs)]
+    return statistics.median(total for total, _ in profiles), profiles[-1][1]
+
+
+@pytest.mark.parametrize("module", sorted(BUDGETS_MS))
+def test_import_within_budget(module, tmp_path):
+    """Test that importing an entry module stays within its budget"""
+    budget = BUDGETS_MS[module] * float(os.getenv("KF_STARTUP_BUDGET_SCALE", "1"))
+    total, modules = median_import_ms(module, tmp_path)
+    
+    slowest = sorted(modules.items(), key=lambda item: -item[1])[:10]
+    report = ", ".join(f"{name} {ms:.1f}ms" for name, ms in slowest)
+    assert total <= budget, f"import {module} took {total:.1f}ms (budget {budget:.0f}ms): {report}"
+
+
+def test_cold_list_command_within_budget(tmp_path):
+    """Test that a whole `cli_v2.py note list` run, interpreter included, stays within budget"""
+    budget = COMMAND_BUDGET_MS * float(os.getenv("KF_STARTUP_BUDGET_SCALE", "1"))
+    env = dict(os.environ, PYTHONPYCACHEPREFIX=str(tmp_path / "pycache"),
+               KNOWLEDGEFLOW_SOCKET=str(tmp_path / "no-daemon.sock"))
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    command = [sys.executable, str(PROJECT_ROOT / "cli_v2.py"), "--data-dir", str(tmp_path / "data"),
+               "note", "list"]
+    
+    def run_ms():
+        start = time.perf_counter()
+        subprocess.run(command, cwd=tmp_path, env=env, capture_output=True, check=True)
+        return (time.perf_counter() - start) * 1000
+    
+    run_ms()  # warm the bytecode cache and create the data files
+    total = statistics.median(run_ms() for _ in range(5))
+    assert total <= budget, f"cli_v2.py note list took {total:.1f}ms (budget {budget:.0f}ms)"
+
+
+def test_heavy_modules_are_deferred(tmp_path):
+    """Test that the CLI doesn't import AI, markdown or SQLite support at startup"""
+    _, modules = import_profile("cli_v2", tmp_path)
+    
+    loaded = [name for name in DEFERRED if name in modules]
+    assert loaded == []
+
+
+def test_commands_skip_rich(tmp_path):
+    """Test that the non-interactive commands never load the terminal UI"""
+    _, modules = import_profile("commands", tmp_path)
+    
+    assert not any(name == "rich" or name.startswith("rich.") for name in modules)
+
+
+if __name__ == "__main__":
+    import tempfile
+    
+    targets = sys.argv[1:] or sorted(BUDGETS_MS)
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for target in targets:
+            total, modules = median_import_ms(target, Path(cache_dir))
+            budget = BUDGETS_MS.get(target)
+            print(f"{target}: {total:.1f}ms" + (f" (budget {budget}ms)" if budget else ""))
+            for name, ms in sorted(modules.items(), key=lambda item: -item[1])[:15]:
+                print(f"    {ms:8.1f}ms  {name.strip()}")
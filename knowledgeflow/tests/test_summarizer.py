@@ -0,0 +1,243 @@
+"""
+Tests for SummarizerAgent's async batch path and result cache against a
+local stub server
+"""
+
+import asyncio
+import json
+import threading
+import time
+import pytest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+pytest.importorskip("openai")
+
+from agents.cache import SummaryCache, cache_key
+from agents.summarizer import SummarizerAgent
+from agents.rate_limit import TokenBucket
+
+
+class StubOpenAI(BaseHTTPRequestHandler):
+    """Answers /v1/chat/completions like the OpenAI API would"""
+    
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        user_text = body["messages"][-1]["content"].split("\n")[2]
+        
+        with server.lock:
+            server.requests += 1
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            fail_status = server.fail_statuses.pop(0) if server.fail_statuses else None
+        
+        time.sleep(server.delay)
+        with server.lock:
+            server.in_flight -= 1
+        
+        if fail_status:
+            self._reply(fail_status, {"error": {"message": "try again", "type": "server_error"}},
+                        {"retry-after": "0"})
+            return
+        
+        self._reply(200, {
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "created": 0,
+            "model": body["model"],
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": f"Summary of {user_text}"},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2}
+        })
+    
+    def _reply(self, status, payload, headers=None):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+    
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    """Run the stub API on a free local port"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubOpenAI)
+    server.lock = threading.Lock()
+    server.requests = 0
+    server.in_flight = 0
+    server.max_in_flight = 0
+    server.fail_statuses = []
+    server.delay = 0.02
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """Result cache in a temporary directory"""
+    cache = SummaryCache(tmp_path / "cache.db")
+    yield cache
+    cache.close()
+
+
+@pytest.fixture
+def agent(stub_server, cache):
+    """Summarizer pointed at the stub server"""
+    return SummarizerAgent(api_key="test-key", cache=cache,
+                           base_url=f"http://127.0.0.1:{stub_server.server_port}/v1")
+
+
+def notes(n):
+    return [{"id": f"n{i}", "title": f"Note {i}", "content": "body"} for i in range(n)]
+
+
+def test_batch_summarize_concurrent(agent, stub_server):
+    """Test that the batch runs concurrently but within the limit"""
+    summaries = agent.batch_summarize(notes(12), concurrency=4)
+    
+    assert summaries == {f"n{i}": f"Summary of Title: Note {i}" for i in range(12)}
+    assert 1 < stub_server.max_in_flight <= 4
+
+
+def test_retries_429_and_5xx(agent, stub_server):
+    """Test that rate limits and server errors are retried"""
+    stub_server.fail_statuses = [429, 503, 500]
+    
+    summaries = agent.batch_summarize(notes(1))
+    
+    assert summaries == {"n0": "Summary of Title: Note 0"}
+    assert stub_server.requests == 4
+
+
+def test_gives_up_after_max_retries(stub_server):
+    """Test that persistent failures are reported, not raised"""
+    agent = SummarizerAgent(api_key="test-key", max_retries=1, use_cache=False,
+                            base_url=f"http://127.0.0.1:{stub_server.server_port}/v1")
+    stub_server.fail_statuses = [500, 500]
+    
+    summaries = agent.batch_summarize(notes(1))
+    
+    assert summaries["n0"].startswith("Error summarizing")
+    assert stub_server.requests == 2
+
+
+def test_stream_yields_as_completed(agent, stub_server):
+    """Test the streaming API returns every item"""
+    async def collect():
+        results = []
+        async for item_id, summary in agent.abatch_summarize_stream(
+                [{"id": "t1", "title": "Ship", "description": "release"}], item_type="task"):
+            results.append((item_id, summary))
+        await agent.aclose()
+        return results
+    
+    assert asyncio.run(collect()) == [("t1", "Summary of Task: Ship")]
+
+
+def test_token_bucket_waits_for_refill():
+    """Test that the bucket throttles once its capacity is spent"""
+    now = [0.0]
+    bucket = TokenBucket(rate_per_minute=60, capacity=2, clock=lambda: now[0])
+    
+    async def drain():
+        await bucket.acquire()
+        await bucket.acquire()
+        assert bucket.tokens == 0
+        now[0] += 1.0  # one second refills one token at 60/min
+        await bucket.acquire()
+    
+    asyncio.run(drain())
+    assert bucket.tokens == 0
+
+
+class TestSummaryCache:
+    """Tests for the content-addressed result cache"""
+    
+    def test_repeat_batch_served_from_cache(self, agent, stub_server):
+        """Test that summarizing the same items twice only calls the API once"""
+        first = agent.batch_summarize(notes(5))
+        assert stub_server.requests == 5
+        
+        second = agent.batch_summarize(notes(5))
+        
+        assert second == first
+        assert stub_server.requests == 5
+        assert agent.cache_stats() == {"hits": 5, "misses": 5, "entries": 5}
+    
+    def test_shared_between_sync_and_async(self, agent, stub_server):
+        """Test that summarize_note reuses a batch result for the same note"""
+        note = notes(1)[0]
+        agent.batch_summarize([note])
+        
+        assert agent.summarize_note(note) == "Summary of Title: Note 0"
+        assert stub_server.requests == 1
+    
+    def test_key_includes_prompt_inputs(self, agent, stub_server):
+        """Test that changing max_words or the content misses the cache"""
+        agent.summarize_text("alpha")
+        agent.summarize_text("alpha", max_words=10)
+        agent.summarize_text("beta")
+        agent.generate_title("alpha")
+        
+        assert stub_server.requests == 4
+        agent.generate_title("alpha")
+        assert stub_server.requests == 4
+    
+    def test_errors_not_cached(self, agent, stub_server):
+        """Test that a failed summary is retried on the next call"""
+        stub_server.fail_statuses = [400]
+        
+        assert agent.summarize_text("alpha").startswith("Error summarizing")
+        assert agent.summarize_text("alpha") == "Summary of alpha"
+        assert stub_server.requests == 2
+    
+    def test_ttl_expiry(self, tmp_path):
+        """Test that entries older than the TTL are misses"""
+        cache = SummaryCache(tmp_path / "cache.db", ttl_seconds=60)
+        key = cache_key("gpt-4o", "text")
+        cache.set(key, "summary")
+        cache._conn.execute("UPDATE results SET created_at = created_at - 120")
+        
+        assert cache.get(key) is None
+        assert cache.stats() == {"hits": 0, "misses": 1, "entries": 0}
+        cache.close()
+    
+    def test_lru_eviction(self, tmp_path):
+        """Test that the least recently used entry is evicted first"""
+        cache = SummaryCache(tmp_path / "cache.db", max_entries=2)
+        cache.set("a", "1")
+        time.sleep(0.01)
+        cache.set("b", "2")
+        time.sleep(0.01)
+        cache.get("a")
+        time.sleep(0.01)
+        cache.set("c", "3")
+        
+        assert cache.get("a") == "1"
+        assert cache.get("b") is None
+        assert cache.get("c") == "3"
+        assert cache.stats()["entries"] == 2
+        cache.close()
+    
+    def test_persists_across_instances(self, tmp_path):
+        """Test that results survive reopening the cache file"""
+        cache = SummaryCache(tmp_path / "cache.db")
+        cache.set("key", "value")
+        cache.close()
+        
+        reopened = SummaryCache(tmp_path / "cache.db")
+        assert reopened.get("key") == "value"
+        assert reopened.stats()["entries"] == 1
+        reopened.close()
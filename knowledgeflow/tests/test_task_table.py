@@ -0,0 +1,127 @@
+"""
+Tests for the columnar task table
+"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from core.json_storage import JSONStorage
+from core.task_table import TaskTable
+
+
+@pytest.fixture
+def storage(tmp_path):
+    """JSONStorage with a mix of tasks"""
+    storage = JSONStorage(data_dir=tmp_path)
+    storage.create_task("Write report", "Quarterly numbers", priority="high",
+                        due_date="2024-05-01", tags=["work"])
+    storage.create_task("Buy milk", priority="low", tags=["home", "shopping"])
+    storage.create_task("Fix bug", "Crash on start", priority="high", tags=["work", "code"])
+    storage.update_task(storage.list_tasks(priority="low")[0]["id"], status="completed")
+    return storage
+
+
+def test_rows_read_like_task_dicts(storage):
+    """Test that views compare equal to the stored dictionaries"""
+    table = storage.task_table()
+    
+    assert len(table) == 3
+    for task in storage.list_tasks():
+        view = table.get(task["id"])
+        assert view == task
+        assert dict(view) == task
+    assert [dict(view) for view in table] == storage.list_tasks()
+
+
+def test_filters_match_list_tasks(storage):
+    """Test that mask filters return the same tasks as the dict store"""
+    table = storage.task_table()
+    
+    for status in (None, "pending", "completed", "in_progress"):
+        for priority in (None, "low", "medium", "high"):
+            expected = storage.list_tasks(status=status, priority=priority)
+            assert [dict(v) for v in table.list_tasks(status, priority)] == expected
+            assert table.count(status, priority) == len(expected)
+    
+    assert [v["title"] for v in table.list_tasks(tag="work")] == ["Write report", "Fix bug"]
+    assert table.list_tasks(tag="missing") == []
+    assert table.list_tasks(status="unknown") == []
+    assert [v["title"] for v in table.list_tasks(due_before="2024-06-01")] == ["Write report"]
+    assert table.count_by("priority") == {"low": 1, "high": 2}
+
+
+def test_columns_use_compact_types(storage):
+    """Test that enums, timestamps and tags are stored as integers"""
+    table = storage.task_table()
+    
+    assert table.status.dtype == np.int8
+    assert table.priority.dtype == np.int8
+    assert table.times["created_at"].dtype == np.int64
+    assert set(table.tag_vocab.values) == {"work", "home", "shopping", "code"}
+    # Identical tag lists share one interned tuple
+    work = table.list_tasks(tag="code")[0]
+    table.add({"id": "extra", "title": "More work", "tags": ["work", "code"]})
+    assert table.tag_ids[table.rows["extra"]] is table.tag_ids[table.rows[work["id"]]]
+
+
+def test_timestamps_round_trip_verbatim():
+    """Test that unusual timestamp strings come back unchanged"""
+    record = {"id": "a", "title": "T", "description": "", "status": "pending",
+              "priority": "medium", "due_date": "2024-05-01", "tags": [],
+              "linked_note_id": None, "created_at": "2024-01-02T03:04:05.000001",
+              "updated_at": "2024-01-02T03:04:05+02:00"}
+    table = TaskTable.from_records([record])
+    
+    assert dict(table.get("a")) == record
+    assert table.times["created_at"][0] != table.times["due_date"][0]
+
+
+def test_update_remove_and_compaction():
+    """Test mutations, including reclaiming deleted rows"""
+    table = TaskTable(capacity=4)
+    for i in range(3000):
+        table.add({"id": f"t{i}", "title": f"Task {i}", "status": "pending",
+                   "created_at": f"2024-01-01T00:00:{i % 60:02d}"})
+    
+    assert table.update("t5", status="in-progress", tags=["x"])
+    assert not table.update("nope", status="completed")
+    assert table.get("t5")["status"] == "in-progress"
+    assert table.count(status="in-progress", tag="x") == 1
+    
+    for i in range(0, 3000, 2):
+        assert table.remove(f"t{i}")
+    assert not table.remove("t0")
+    
+    assert len(table) == 1500
+    assert table._size == 1500  # deleted rows were reclaimed
+    assert table.count(status="pending") == 1499
+    assert [v["id"] for v in table][:3] == ["t1", "t3", "t5"]
+    assert table.get("t7")["created_at"] == "2024-01-01T00:00:07"
+    assert table.get("t4") is None
+
+
+def test_task_table_follows_writes(storage):
+    """Test that the resident table is updated in place, not rebuilt"""
+    table = storage.task_table()
+    
+    new = storage.create_task("New task", tags=["work"])
+    storage.update_task(new["id"], status="in_progress")
+    storage.delete_task(storage.list_tasks(priority="low")[0]["id"])
+    
+    assert storage.task_table() is table
+    assert table.count() == 3
+    assert dict(table.get(new["id"])) == storage.get_task(new["id"])
+    assert [t["title"] for t in storage.list_tasks(status="in_progress")] == ["New task"]
+    assert [t["title"] for t in storage.iter_tasks(tag="work", status="in_progress")] == ["New task"]
+    assert [dict(view) for view in table] == storage.list_tasks()
+
+
+def test_reload_from_another_process(storage):
+    """Test that changes made by another JSONStorage rebuild the table"""
+    other = JSONStorage(data_dir=storage.data_dir)
+    other.create_task("From elsewhere", priority="high")
+    
+    assert [t["title"] for t in storage.list_tasks(priority="high")] == [
+        "Write report", "Fix bug", "From elsewhere"]
+    assert storage.task_table().count(priority="high") == 3
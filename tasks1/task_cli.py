@@ -15,9 +15,16 @@ import argparse
 import json
 import os
 import sys
+import tempfile
+from contextlib import contextmanager
 from dataclasses import dataclass, asdict
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import Iterator, List, Dict, Any
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locking
+    fcntl = None
 
 DB_PATH = os.path.join(os.path.dirname(__file__), 'tasks.json')
 
@@ -76,11 +83,28 @@ def save_db(db: Dict[str, Any], path: str = DB_PATH) -> None:
 
 
 def _write_json(path: str, data: Dict[str, Any]) -> None:
-    tmp_path = f"{path}.tmp"
-    with open(tmp_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-        f.write('\n')
-    os.replace(tmp_path, path)
+    # A unique temp file per writer, so concurrent saves can't clobber each other
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)),
+                                    prefix=f".{os.path.basename(path)}.", suffix='.tmp')
+    try:
+        os.chmod(tmp_path, 0o644)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+            f.write('\n')
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+@contextmanager
+def _locked(path: str) -> Iterator[None]:
+    """Hold an exclusive lock on the DB for a read-modify-write."""
+    with open(f"{path}.lock", 'a') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield
 
 
 # Core operations
@@ -93,12 +117,13 @@ def add_task(title: str, description: str, path: str = DB_PATH) -> int:
     if not description:
         raise ValueError('Description is required and cannot be empty.')
 
-    db = load_db(path)
-    new_id = int(db.get('next_id', 1))
-    task = Task(id=new_id, title=title, description=description)
-    db['tasks'].append(asdict(task))
-    db['next_id'] = new_id + 1
-    save_db(db, path)
+    with _locked(path):
+        db = load_db(path)
+        new_id = int(db.get('next_id', 1))
+        task = Task(id=new_id, title=title, description=description)
+        db['tasks'].append(asdict(task))
+        db['next_id'] = new_id + 1
+        save_db(db, path)
     return new_id
 
 
@@ -112,18 +137,19 @@ def list_tasks(path: str = DB_PATH) -> List[Dict[str, Any]]:
 
 def delete_task(task_id: int, path: str = DB_PATH) -> bool:
     """Delete a task by ID. Returns True if a task was deleted, False if not found."""
-    db = load_db(path)
-    tasks = db.get('tasks', [])
-    if not isinstance(tasks, list):
-        db['tasks'] = []
+    with _locked(path):
+        db = load_db(path)
+        tasks = db.get('tasks', [])
+        if not isinstance(tasks, list):
+            db['tasks'] = []
+            save_db(db, path)
+            return False
+
+        original_len = len(tasks)
+        tasks = [t for t in tasks if int(t.get('id', -1)) != int(task_id)]
+        deleted = len(tasks) != original_len
+        db['tasks'] = tasks
         save_db(db, path)
-        return False
-
-    original_len = len(tasks)
-    tasks = [t for t in tasks if int(t.get('id', -1)) != int(task_id)]
-    deleted = len(tasks) != original_len
-    db['tasks'] = tasks
-    save_db(db, path)
     return deleted
 
 
@@ -5,9 +5,33 @@ Adapted from tasks2 for tasks3 with pytest integration
 
 import sqlite3
 import json
+import re
 from pathlib import Path
 from datetime import datetime
-from typing import List, Optional, Dict
+from typing import Dict, Iterable, Iterator, List, Optional
+
+NOTE_COLUMNS = ("id", "title", "content", "tags", "created_at", "updated_at")
+
+QUERY_PATTERN = re.compile(r"\w+\*?")
+
+
+def to_fts_query(query: str) -> str:
+    """
+    Quote each word of a free-text query for FTS5 MATCH
+    
+    word* stays a prefix, and so does the last word, so a partial word
+    ("pyth") still finds "python".
+    """
+    words = QUERY_PATTERN.findall(query)
+    if words and not words[-1].endswith("*"):
+        words[-1] += "*"
+    terms = []
+    for term in words:
+        if term.endswith("*"):
+            terms.append(f'"{term[:-1]}"*')
+        else:
+            terms.append(f'"{term}"')
+    return " AND ".join(terms)
 
 
 class PKMS:
@@ -66,6 +90,49 @@ class PKMS:
             )
         """)
         
+        self._init_search(cursor)
+        
+        conn.commit()
+        conn.close()
+    
+    def _init_search(self, cursor):
+        """Create the FTS5 index over notes, kept in sync by triggers"""
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'notes_fts'")
+        exists = cursor.fetchone() is not None
+        
+        cursor.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts
+            USING fts5(title, content, tags, content='notes', content_rowid='id')
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS notes_fts_insert AFTER INSERT ON notes BEGIN
+                INSERT INTO notes_fts(rowid, title, content, tags)
+                VALUES (new.id, new.title, new.content, new.tags);
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS notes_fts_delete AFTER DELETE ON notes BEGIN
+                INSERT INTO notes_fts(notes_fts, rowid, title, content, tags)
+                VALUES ('delete', old.id, old.title, old.content, old.tags);
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS notes_fts_update AFTER UPDATE ON notes BEGIN
+                INSERT INTO notes_fts(notes_fts, rowid, title, content, tags)
+                VALUES ('delete', old.id, old.title, old.content, old.tags);
+                INSERT INTO notes_fts(rowid, title, content, tags)
+                VALUES (new.id, new.title, new.content, new.tags);
+            END
+        """)
+        
+        # Index notes that existed before the search table did
+        if not exists:
+            cursor.execute("INSERT INTO notes_fts(notes_fts) VALUES ('rebuild')")
+    
+    def rebuild_search_index(self):
+        """Rebuild the full-text index from the notes table"""
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("INSERT INTO notes_fts(notes_fts) VALUES ('rebuild')")
         conn.commit()
         conn.close()
     
@@ -119,17 +186,77 @@ class PKMS:
         
         return notes
     
+    def iter_notes(self, tag: Optional[str] = None, after_id: Optional[int] = None,
+                   limit: Optional[int] = None, fields: Optional[Iterable[str]] = None,
+                   batch_size: int = 200) -> Iterator[Dict]:
+        """
+        Stream notes newest first, fetching rows in batches
+        
+        Args:
+            tag: Only notes with this tag
+            after_id: Resume after this note (the last ID of the previous page)
+            limit: Maximum number of notes to yield
+            fields: Only select these columns (id is always included); tags
+                are only decoded when selected
+            batch_size: Rows fetched from SQLite at a time
+        """
+        columns = ["id"]
+        for field in fields or NOTE_COLUMNS:
+            if field not in NOTE_COLUMNS:
+                raise ValueError(f"Unknown note field: {field}")
+            if field not in columns:
+                columns.append(field)
+        
+        sql = f"SELECT {', '.join(columns)} FROM notes"
+        where, params = [], []
+        if tag:
+            where.append("EXISTS (SELECT 1 FROM json_each(notes.tags) WHERE value = ?)")
+            params.append(tag)
+        if after_id is not None:
+            # Keyset pagination: seek past the previous page on the primary key
+            where.append("id < ?")
+            params.append(after_id)
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY id DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        try:
+            cursor = conn.execute(sql, params)
+            decode_tags = "tags" in columns
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    note = dict(row)
+                    if decode_tags:
+                        note['tags'] = json.loads(note['tags'])
+                    yield note
+        finally:
+            conn.close()
+    
     def search_notes(self, query: str) -> List[Dict]:
-        """Search notes by title or content"""
+        """Search notes by title, content or tags, best match first"""
+        match = to_fts_query(query)
+        if not match:
+            return []
+        
         conn = sqlite3.connect(self.db_path)
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
         cursor.execute("""
-            SELECT * FROM notes 
-            WHERE title LIKE ? OR content LIKE ?
-            ORDER BY created_at DESC
-        """, (f"%{query}%", f"%{query}%"))
+            SELECT n.*, snippet(notes_fts, 1, '[', ']', '...', 12) AS snippet
+            FROM notes_fts
+            JOIN notes n ON n.id = notes_fts.rowid
+            WHERE notes_fts MATCH ?
+            ORDER BY bm25(notes_fts, 10.0, 1.0, 5.0)
+        """, (match,))
         
         notes = [dict(row) for row in cursor.fetchall()]
         conn.close()
@@ -168,3 +168,43 @@ def test_list_all_notes(pkms):
     # List all notes
     notes = pkms.list_notes()
     assert len(notes) == 3
+
+
+def test_search_notes_ranked(pkms):
+    """Test that search ranks title matches first and highlights snippets"""
+    pkms.create_note("Cooking", "A python is a snake, not a recipe")
+    pkms.create_note("Python Basics", "Variables and loops")
+    
+    results = pkms.search_notes("python")
+    
+    assert [note['title'] for note in results] == ["Python Basics", "Cooking"]
+    assert "[python]" in results[1]['snippet']
+
+
+def test_search_notes_prefix_and_punctuation(pkms):
+    """Test prefix queries and that FTS syntax in input is harmless"""
+    pkms.create_note("JavaScript Guide", "Learn JavaScript")
+    
+    assert len(pkms.search_notes("java*")) == 1
+    assert len(pkms.search_notes("learn javasc")) == 1
+    assert pkms.search_notes('"unbalanced AND (') == []
+
+
+def test_iter_notes_pages(pkms):
+    """Test keyset pagination, tag filtering and column projection"""
+    for i in range(5):
+        pkms.create_note(f"Note {i}", "body", ["even"] if i % 2 == 0 else ["odd"])
+    
+    first = list(pkms.iter_notes(limit=2, fields=["title"]))
+    assert first == [{"id": 5, "title": "Note 4"}, {"id": 4, "title": "Note 3"}]
+    
+    rest = list(pkms.iter_notes(after_id=first[-1]['id'], fields=["title", "tags"]))
+    assert [note['title'] for note in rest] == ["Note 2", "Note 1", "Note 0"]
+    assert rest[0]['tags'] == ["even"]
+    
+    even = list(pkms.iter_notes(tag="even", batch_size=1))
+    assert [note['title'] for note in even] == ["Note 4", "Note 2", "Note 0"]
+    assert even[0]['content'] == "body"
+    
+    with pytest.raises(ValueError):
+        list(pkms.iter_notes(fields=["title; DROP TABLE notes"]))
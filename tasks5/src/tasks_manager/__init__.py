@@ -4,7 +4,14 @@ A simple task management system with CLI and API.
 """
 
 from .storage import TaskStorage
-from .cli import main
 
 __version__ = "1.0.0"
 __all__ = ["TaskStorage", "main"]
+
+
+def __getattr__(name):
+    # The CLI (and argparse) is only loaded when main is asked for
+    if name == "main":
+        from .cli import main
+        return main
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
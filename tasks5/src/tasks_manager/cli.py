@@ -84,17 +84,29 @@ def cmd_add(args, storage: TaskStorage):
 
 def cmd_list(args, storage: TaskStorage):
     """List all tasks."""
-    tasks = storage.list_tasks(status=args.status, priority=args.priority)
+    try:
+        tasks = storage.iter_tasks(status=args.status, priority=args.priority,
+                                   after_id=args.after, limit=args.limit,
+                                   fields=("title", "status", "priority"))
+    except ValueError:
+        print(f"❌ Task not found: {args.after}")
+        sys.exit(1)
     
-    if not tasks:
+    # Print each task as it is read rather than building the whole list
+    count = 0
+    for task in tasks:
+        if count == 0:
+            print(f"\n📋 Tasks:")
+            print("-" * 60)
+        print(format_task(task))
+        count += 1
+    
+    if count == 0:
         print("📭 No tasks found.")
         return
     
-    print(f"\n📋 Tasks ({len(tasks)} total):")
-    print("-" * 60)
-    for task in tasks:
-        print(format_task(task))
     print("-" * 60)
+    print(f"{count} shown")
 
 
 def cmd_show(args, storage: TaskStorage):
@@ -183,6 +195,8 @@ def main():
     list_parser.add_argument("-p", "--priority",
                             choices=["low", "medium", "high"],
                             help="Filter by priority")
+    list_parser.add_argument("-n", "--limit", type=int, help="Show at most this many tasks")
+    list_parser.add_argument("--after", help="Start after this task ID (for paging)")
     
     # Show command
     show_parser = subparsers.add_parser("show", help="Show task details")
@@ -5,10 +5,16 @@ Handles persistent storage of tasks in JSON format.
 
 import json
 import os
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Dict, Optional
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional
 from datetime import datetime
-import uuid
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locking
+    fcntl = None
 
 
 class TaskStorage:
@@ -25,10 +31,24 @@ class TaskStorage:
             storage_path = Path.home() / ".tasks" / "tasks.json"
         self.storage_path = Path(storage_path)
         self.storage_path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock_path = self.storage_path.with_suffix('.lock')
         
         # Initialize empty file if it doesn't exist
-        if not self.storage_path.exists():
-            self._save_tasks([])
+        with self._locked():
+            if not self.storage_path.exists():
+                self._save_tasks([])
+    
+    @contextmanager
+    def _locked(self):
+        """
+        Hold an exclusive advisory lock for a read-modify-write.
+        
+        Readers don't need it: the file is only ever replaced whole.
+        """
+        with open(self.lock_path, 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
     
     def _load_tasks(self) -> List[Dict]:
         """Load all tasks from storage."""
@@ -40,11 +60,21 @@ class TaskStorage:
     
     def _save_tasks(self, tasks: List[Dict]):
         """Save all tasks to storage atomically."""
-        # Write to temp file first, then rename (atomic operation)
-        temp_path = self.storage_path.with_suffix('.tmp')
-        with open(temp_path, 'w') as f:
-            json.dump(tasks, f, indent=2)
-        temp_path.replace(self.storage_path)
+        # Imported here so read-only commands start faster
+        import tempfile
+        
+        # Write to a temp file of our own first, then rename (atomic operation)
+        fd, temp_name = tempfile.mkstemp(dir=self.storage_path.parent,
+                                         prefix=f".{self.storage_path.name}.", suffix='.tmp')
+        temp_path = Path(temp_name)
+        try:
+            os.chmod(temp_path, 0o644)
+            with os.fdopen(fd, 'w') as f:
+                json.dump(tasks, f, indent=2)
+            temp_path.replace(self.storage_path)
+        except BaseException:
+            temp_path.unlink(missing_ok=True)
+            raise
     
     def create_task(self, title: str, description: str = "", 
                    status: str = "pending", priority: str = "medium",
@@ -59,11 +89,11 @@ class TaskStorage:
             priority: Task priority (low, medium, high)
             due_date: Due date (ISO format string)
             tags: List of tags
-            
+        
         Returns:
             Created task dictionary
         """
-        tasks = self._load_tasks()
+        import uuid
         
         task = {
             "id": str(uuid.uuid4()),
@@ -77,8 +107,10 @@ class TaskStorage:
             "updated_at": datetime.now().isoformat()
         }
         
-        tasks.append(task)
-        self._save_tasks(tasks)
+        with self._locked():
+            tasks = self._load_tasks()
+            tasks.append(task)
+            self._save_tasks(tasks)
         return task
     
     def list_tasks(self, status: Optional[str] = None, 
@@ -89,7 +121,7 @@ class TaskStorage:
         Args:
             status: Filter by status
             priority: Filter by priority
-            
+        
         Returns:
             List of task dictionaries
         """
@@ -99,16 +131,59 @@ class TaskStorage:
             tasks = [t for t in tasks if t["status"] == status]
         if priority:
             tasks = [t for t in tasks if t["priority"] == priority]
-            
+        
         return tasks
     
+    def iter_tasks(self, status: Optional[str] = None, priority: Optional[str] = None,
+                   after_id: Optional[str] = None, limit: Optional[int] = None,
+                   fields: Optional[Iterable[str]] = None) -> Iterator[Dict]:
+        """
+        Iterate tasks in file order, optionally filtered and paginated.
+        
+        Args:
+            status: Filter by status
+            priority: Filter by priority
+            after_id: Start after this task (the last ID of the previous page)
+            limit: Maximum number of tasks to yield
+            fields: Only include these fields (the id is always included)
+        
+        Returns:
+            Iterator of task dictionaries
+        
+        Raises:
+            ValueError: If after_id is not a stored task
+        """
+        tasks = self._load_tasks()
+        
+        start = 0
+        if after_id is not None:
+            for i, task in enumerate(tasks):
+                if task["id"] == after_id:
+                    start = i + 1
+                    break
+            else:
+                raise ValueError(f"Unknown after_id: {after_id}")
+        
+        matching = (
+            task for task in islice(tasks, start, None)
+            if (not status or task["status"] == status)
+            and (not priority or task["priority"] == priority)
+        )
+        if limit is not None:
+            matching = islice(matching, limit)
+        if fields is None:
+            return matching
+        
+        fields = tuple(fields)
+        return ({"id": task["id"], **{f: task.get(f) for f in fields}} for task in matching)
+    
     def get_task(self, task_id: str) -> Optional[Dict]:
         """
         Get a specific task by ID.
         
         Args:
             task_id: Task ID
-            
+        
         Returns:
             Task dictionary or None if not found
         """
@@ -125,22 +200,23 @@ class TaskStorage:
         Args:
             task_id: Task ID
             **kwargs: Fields to update
-            
+        
         Returns:
             Updated task dictionary or None if not found
         """
-        tasks = self._load_tasks()
-        
-        for task in tasks:
-            if task["id"] == task_id:
-                # Update fields
-                for key, value in kwargs.items():
-                    if key in task and value is not None:
-                        task[key] = value
-                task["updated_at"] = datetime.now().isoformat()
-                
-                self._save_tasks(tasks)
-                return task
+        with self._locked():
+            tasks = self._load_tasks()
+            
+            for task in tasks:
+                if task["id"] == task_id:
+                    # Update fields
+                    for key, value in kwargs.items():
+                        if key in task and value is not None:
+                            task[key] = value
+                    task["updated_at"] = datetime.now().isoformat()
+                    
+                    self._save_tasks(tasks)
+                    return task
         
         return None
     
@@ -150,18 +226,19 @@ class TaskStorage:
         
         Args:
             task_id: Task ID
-            
+        
         Returns:
             True if deleted, False if not found
         """
-        tasks = self._load_tasks()
-        original_len = len(tasks)
-        
-        tasks = [t for t in tasks if t["id"] != task_id]
-        
-        if len(tasks) < original_len:
-            self._save_tasks(tasks)
-            return True
+        with self._locked():
+            tasks = self._load_tasks()
+            original_len = len(tasks)
+            
+            tasks = [t for t in tasks if t["id"] != task_id]
+            
+            if len(tasks) < original_len:
+                self._save_tasks(tasks)
+                return True
         return False
     
     def search_tasks(self, query: str) -> List[Dict]:
@@ -170,7 +247,7 @@ class TaskStorage:
         
         Args:
             query: Search query
-            
+        
         Returns:
             List of matching tasks
         """
@@ -0,0 +1,56 @@
+"""
+Startup-time budget for the tasks CLI
+"""
+
+import ast
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+SRC = Path(__file__).parent.parent / "src"
+
+# Milliseconds allowed for `import tasks_manager.cli` (scale with TASKS_STARTUP_BUDGET_SCALE)
+CLI_BUDGET_MS = 60
+
+# Times the import in the child; only builtin modules are loaded before it
+PROBE = ("import sys, time; start = time.perf_counter(); import {module}; "
+         "print(((time.perf_counter() - start) * 1000, sorted(sys.modules)))")
+
+
+def import_profile(module: str, cache_dir: str):
+    """Import a module in a fresh interpreter; returns (ms, names of loaded modules)."""
+    env = dict(os.environ, PYTHONPATH=str(SRC), PYTHONPYCACHEPREFIX=cache_dir)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    result = subprocess.run([sys.executable, "-c", PROBE.format(module=module)],
+                            env=env, capture_output=True, text=True, check=True)
+    return ast.literal_eval(result.stdout)
+
+
+def test_cli_import_within_budget():
+    """Test that the CLI starts quickly and defers write-only imports."""
+    budget = CLI_BUDGET_MS * float(os.getenv("TASKS_STARTUP_BUDGET_SCALE", "1"))
+    with tempfile.TemporaryDirectory() as cache_dir:
+        import_profile("tasks_manager.cli", cache_dir)
+        runs = sorted((import_profile("tasks_manager.cli", cache_dir) for _ in range(5)),
+                      key=lambda run: run[0])
+    total, modules = runs[len(runs) // 2]
+    
+    assert total <= budget, f"import took {total:.1f}ms (budget {budget:.0f}ms)"
+    assert "tempfile" not in modules and "uuid" not in modules
+
+
+def test_storage_import_skips_cli():
+    """Test that using TaskStorage as a library doesn't load argparse."""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        _, modules = import_profile("tasks_manager.storage", cache_dir)
+    
+    assert "tasks_manager.cli" not in modules
+    assert "argparse" not in modules
+
+
+if __name__ == "__main__":
+    test_cli_import_within_budget()
+    test_storage_import_skips_cli()
+    print("✅ All tests passed!")
@@ -4,6 +4,7 @@ Tests for TaskStorage
 
 import os
 import tempfile
+import threading
 from pathlib import Path
 import sys
 
@@ -90,6 +91,54 @@ def test_search_tasks():
         assert len(coding_results) == 2
 
 
+
+def test_iter_tasks_pages():
+    """Test paging through tasks with after_id, limit and fields."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        storage = TaskStorage(os.path.join(tmpdir, "tasks.json"))
+        
+        for i in range(5):
+            storage.create_task(f"Task {i}", priority="high" if i % 2 else "low")
+        
+        first = list(storage.iter_tasks(limit=2, fields=["title"]))
+        assert first == [{"id": first[0]["id"], "title": "Task 0"},
+                         {"id": first[1]["id"], "title": "Task 1"}]
+        
+        rest = list(storage.iter_tasks(after_id=first[-1]["id"]))
+        assert [t["title"] for t in rest] == ["Task 2", "Task 3", "Task 4"]
+        
+        high = list(storage.iter_tasks(priority="high", after_id=first[0]["id"]))
+        assert [t["title"] for t in high] == ["Task 1", "Task 3"]
+        
+        try:
+            storage.iter_tasks(after_id="missing")
+            assert False, "expected ValueError"
+        except ValueError:
+            pass
+
+
+
+def test_concurrent_writers():
+    """Test that parallel writers don't lose each other's tasks."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "tasks.json")
+        
+        def writer(n):
+            # A storage per thread, as separate CLI processes would have
+            storage = TaskStorage(path)
+            for i in range(25):
+                storage.create_task(f"Task {n}-{i}")
+        
+        threads = [threading.Thread(target=writer, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert len(TaskStorage(path).list_tasks()) == 100
+        assert not [name for name in os.listdir(tmpdir) if name.endswith(".tmp")]
+
+
 if __name__ == "__main__":
     # Run tests
     test_create_task()
@@ -97,4 +146,6 @@ if __name__ == "__main__":
     test_update_task()
     test_delete_task()
     test_search_tasks()
+    test_iter_tasks_pages()
+    test_concurrent_writers()
     print("✅ All tests passed!")
@@ -13,6 +13,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent / "knowledgeflow"))
 
 from main import init_db, create_note, create_task, DB_PATH
+from core.database import close_connections
 
 
 def setup_test_db():
@@ -84,6 +85,7 @@ if __name__ == "__main__":
         print(f"\n❌ Test failed: {e}\n")
     finally:
         # Cleanup
+        close_connections()
         if DB_PATH.exists():
             os.remove(DB_PATH)
             print("🧹 Test database cleaned up")
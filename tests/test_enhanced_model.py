@@ -11,7 +11,7 @@ from pathlib import Path
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent / "knowledgeflow"))
 
-from core.database import init_database, get_connection, DB_PATH
+from core.database import init_database, get_connection, close_connections, DB_PATH
 from core.links import create_link, get_forward_links, get_backlinks, detect_links_in_content, auto_create_links
 from core.categories import (
     create_category, get_all_categories, assign_category_to_note,
@@ -229,6 +229,7 @@ def run_all_tests():
     
     finally:
         # Cleanup
+        close_connections()
         if DB_PATH.exists():
             os.remove(DB_PATH)
             print("\n🧹 Test database cleaned up")